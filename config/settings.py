@@ -8,6 +8,13 @@ from typing import Dict, List, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+# Relative paths in the configs below are resolved against the app root, not the working directory
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def app_path(path: str) -> str:
+    """Absolute location of a configured path; relative ones live under the app root"""
+    return os.path.join(APP_ROOT, os.path.expanduser(path))
+
 class MatrixLevel(Enum):
     ARCHITECT = "Architect"
     ORACLE = "Oracle" 
@@ -88,9 +95,34 @@ API_CONFIG = {
     "vapi_base_url": "https://api.vapi.ai",
     "timeout": 30,
     "max_retries": 3,
+    "retry": {
+        "backoff_base": 0.5,  # seconds, doubled per attempt with full jitter
+        "backoff_max": 8.0
+    },
+    "circuit_breaker": {
+        "failure_threshold": 5,  # consecutive failures before an endpoint fails fast
+        "recovery_timeout": 30   # seconds before a probe request is let through
+    },
+    "connection_pool": {
+        "pool_connections": 10,  # number of host pools kept alive
+        "pool_maxsize": 20,      # keep-alive connections per host
+        "pool_block": True       # wait for a free connection instead of opening extras
+    },
+    "max_concurrency": 10,  # in-flight requests for async batch fetches
+    "sync_page_size": 100,  # calls per page when syncing /call incrementally
+    "sync_max_page_size": 1000,  # largest page requested to get past calls sharing one createdAt
+    "response_cache": {
+        "max_entries": 512,
+        "ttl": {  # seconds per endpoint; endpoints not listed are never cached
+            "/assistant": 300,
+            "/phone-number": 600,
+            "/call": 30
+        }
+    },
     "rate_limit": {
         "calls_per_minute": 60,
-        "calls_per_hour": 1000
+        "calls_per_hour": 1000,
+        "default_retry_after": 5  # seconds to back off on a 429 without Retry-After
     },
     "webhook_endpoints": {
         "call_started": "/webhook/call-started",
@@ -104,7 +136,63 @@ DATABASE_CONFIG = {
     "url": "sqlite:///matrix_vapi.db",
     "echo": False,
     "pool_size": 10,
-    "max_overflow": 20
+    "max_overflow": 20,
+    "bulk_chunk_size": 1000,  # rows per executemany batch in bulk writes
+    "stream_batch_size": 1000,  # rows fetched per round trip by streaming iterators
+    "sqlite_pragmas": {
+        "journal_mode": "WAL",  # readers no longer block on the writer
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,  # 256 MB
+        "cache_size": -65536,  # negative = KiB, i.e. 64 MB per connection
+        "busy_timeout": 5000,  # ms
+        "temp_store": "MEMORY"
+    }
+}
+
+# Cache Configuration
+CACHE_CONFIG = {
+    "artifact_store": {
+        "path": "cache/artifacts",
+        "max_bytes": 536870912,  # 512MB
+        "compression_level": 6
+    },
+    "report_cache": {
+        "max_entries": 32,  # analytics reports kept in memory, least recently viewed evicted first
+        "path": "cache/reports"  # shared with the report scheduler process
+    },
+    "report_scheduler": {
+        "interval_minutes": 15,
+        "window_days": [1, 7, 30],  # 1 = today since midnight
+        "agent_window_days": 30  # per-agent reports
+    },
+    "call_clusters": {
+        "path": "cache/models/call_clusters.joblib",
+        "n_clusters": 4,
+        "batch_size": 1024,  # calls per partial_fit step
+        "report_sample_size": 20000  # newest calls of a report window assigned to call patterns
+    }
+}
+
+# Chart Configuration
+CHART_CONFIG = {
+    "max_points": 500,  # per time-series trace, about one point per horizontal pixel
+    "top_n": 10,  # agent bars and pie slices shown; the rest are summed into "Other"
+    "max_payload_bytes": 262144  # 256KB of serialized Plotly JSON per figure
+}
+
+# Call History Page Configuration
+CALL_HISTORY_CONFIG = {
+    "page_size": 25,  # call rows rendered per page
+    "page_size_options": [10, 25, 50, 100],
+    "transcript_window": 50,  # transcript entries shown before "load more"
+    "transcript_cache_entries": 64  # calls whose rendered transcript HTML is kept in memory
+}
+
+# Export Configuration
+EXPORT_CONFIG = {
+    "path": "exports",  # export files are written here chunk by chunk, then offered for download
+    "keep_files": 10,  # older exports are deleted when a new one is written
+    "compression_level": 6  # gzip level for .gz exports
 }
 
 # Logging Configuration
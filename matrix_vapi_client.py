@@ -5,8 +5,11 @@ import os
 import json
 import time
 import threading
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import tempfile
+import gzip
+import html
+import io
 import signal
 import pandas as pd
 import plotly.express as px
@@ -16,15 +19,33 @@ import uuid
 import requests
 from typing import Dict, List, Optional, Any
 
+from config.settings import API_CONFIG, DATABASE_CONFIG, CALL_HISTORY_CONFIG
+from models.database import DatabaseManager
+from utils.http_session import create_pooled_session
+from utils.rate_limiter import (RateLimitScheduler, get_shared_scheduler, parse_retry_after,
+                                PRIORITY_INTERACTIVE)
+from utils.resilience import RetryPolicy, get_shared_breakers
+from utils.response_cache import ResponseCache
+from utils.artifact_store import CallArtifactStore, FINAL_CALL_STATUSES
+from utils.async_vapi_client import fetch_call_artifacts
+from utils.call_sync import CallSyncEngine, parse_vapi_timestamp
+from utils.figure_budget import figure_json, top_n_labels
+from utils.call_index import CallFilterIndex
+from utils.transcript_search import TranscriptSearchIndex
+from utils.transcript_renderer import TranscriptRenderer
+from utils.call_export import CallExporter, export_mime, metadata_path, read_backup
+from utils.analytics_engine import MatrixAnalyticsEngine
+from utils.report_scheduler import standard_report_windows
+
 # VAPI API Configuration
 try:
     VAPI_API_KEY = st.secrets["VAPI_API_KEY"]
-    VAPI_BASE_URL = "https://api.vapi.ai"
+    VAPI_BASE_URL = API_CONFIG['vapi_base_url']
 except KeyError:
     st.error("🔑 VAPI_API_KEY not found in Streamlit secrets. Please add it to your secrets.toml file.")
     st.info("Create a .streamlit/secrets.toml file with: VAPI_API_KEY = 'your_api_key_here'")
     VAPI_API_KEY = ""
-    VAPI_BASE_URL = "https://api.vapi.ai"
+    VAPI_BASE_URL = API_CONFIG['vapi_base_url']
 
 # Enhanced AI Agents with comprehensive details
 AI_AGENTS = {
@@ -542,30 +563,101 @@ st.set_page_config(
 
 # Enhanced VAPI API Client Class with additional features
 class MatrixVAPIClient:
-    def __init__(self, api_key: str, base_url: str = "https://api.vapi.ai"):
+    def __init__(self, api_key: str, base_url: str = "https://api.vapi.ai", timeout: float = None,
+                 scheduler: RateLimitScheduler = None, artifact_store: CallArtifactStore = None):
         self.api_key = api_key
         self.base_url = base_url
+        self.timeout = timeout or API_CONFIG['timeout']
+        self.retry_policy = RetryPolicy()
+        # Every client in the process draws from the same rate limit buckets and breakers
+        self.scheduler = scheduler or get_shared_scheduler()
+        self.breakers = get_shared_breakers()
+        self.cache = ResponseCache()
+        # Transcripts and recordings of finished calls persist across sessions
+        self.artifact_store = artifact_store or CallArtifactStore()
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
-    
-    def get_assistants(self) -> List[Dict]:
+        # One pooled keep-alive session per client so repeated lookups reuse connections
+        self.session = create_pooled_session(self.headers)
+    
+    def _request(self, method: str, path: str, priority: int = PRIORITY_INTERACTIVE, **kwargs) -> requests.Response:
+        """Send a rate-limited, retried request through the pooled session and raise on HTTP errors"""
+        kwargs.setdefault('timeout', self.timeout)
+        breaker = self.breakers.get(path)
+        attempt = 0
+        while True:
+            if not breaker.allow_request():
+                raise breaker.open_error()
+            try:
+                self.scheduler.acquire(priority)
+                try:
+                    response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    breaker.record_failure()
+                    request_sent = not isinstance(e, requests.ConnectTimeout)
+                    if not self.retry_policy.should_retry(method, attempt, request_sent=request_sent):
+                        raise
+                    time.sleep(self.retry_policy.backoff(attempt))
+                    attempt += 1
+                    continue
+                
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                    if not self.retry_policy.should_retry(method, attempt, status=response.status_code):
+                        break
+                    retry_after = response.headers.get('Retry-After')
+                    time.sleep(self.retry_policy.backoff(attempt, parse_retry_after(retry_after) if retry_after else None))
+                else:
+                    # Any 4xx, 429 included, means the endpoint is up
+                    breaker.record_success()
+                    if response.status_code != 429 or not self.retry_policy.should_retry(method, attempt, status=429):
+                        break
+                    # Throttled requests were never processed, so hold all lanes and resend
+                    self.scheduler.penalize(parse_retry_after(response.headers.get('Retry-After')))
+            finally:
+                # Exits that recorded no outcome (e.g. ChunkedEncodingError) must not strand a half-open probe
+                breaker.release_probe()
+            attempt += 1
+        
+        response.raise_for_status()
+        return response
+    
+    def _get_json(self, path: str, params: Dict = None, refresh: bool = False,
+                  priority: int = PRIORITY_INTERACTIVE) -> Any:
+        """Read-through cached GET; stale or refreshed entries are revalidated conditionally"""
+        key = self.cache.key_for(path, params)
+        entry = self.cache.lookup(key)
+        if entry and entry.is_fresh() and not refresh:
+            return self.cache.value_of(entry)
+        
+        headers = entry.validators() if entry else {}
+        response = self._request("GET", path, priority=priority, params=params, headers=headers)
+        if response.status_code == 304 and entry:
+            self.cache.revalidated(key, path)
+            return self.cache.value_of(entry)
+        
+        value = response.json()
+        self.cache.store(key, path, value, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return value
+    
+    def close(self):
+        """Release pooled connections"""
+        self.session.close()
+    
+    def get_assistants(self, refresh: bool = False) -> List[Dict]:
         """Get all assistants from VAPI"""
         try:
-            response = requests.get(f"{self.base_url}/assistant", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json("/assistant", refresh=refresh)
         except Exception as e:
             st.error(f"Matrix Error - Failed to access assistant network: {e}")
             return []
     
-    def get_assistant(self, assistant_id: str) -> Optional[Dict]:
+    def get_assistant(self, assistant_id: str, refresh: bool = False) -> Optional[Dict]:
         """Get specific assistant details"""
         try:
-            response = requests.get(f"{self.base_url}/assistant/{assistant_id}", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(f"/assistant/{assistant_id}", refresh=refresh)
         except Exception as e:
             st.error(f"Matrix Error - Agent {assistant_id} not found in network: {e}")
             return None
@@ -573,11 +665,9 @@ class MatrixVAPIClient:
     def create_assistant(self, assistant_data: Dict) -> Optional[Dict]:
         """Create new assistant"""
         try:
-            response = requests.post(f"{self.base_url}/assistant", 
-                                   headers=self.headers, 
-                                   json=assistant_data)
-            response.raise_for_status()
-            return response.json()
+            result = self._request("POST", "/assistant", json=assistant_data).json()
+            self.cache.invalidate("/assistant")
+            return result
         except Exception as e:
             st.error(f"Matrix Error - Failed to create new agent: {e}")
             return None
@@ -585,11 +675,9 @@ class MatrixVAPIClient:
     def update_assistant(self, assistant_id: str, assistant_data: Dict) -> Optional[Dict]:
         """Update existing assistant"""
         try:
-            response = requests.patch(f"{self.base_url}/assistant/{assistant_id}", 
-                                    headers=self.headers, 
-                                    json=assistant_data)
-            response.raise_for_status()
-            return response.json()
+            result = self._request("PATCH", f"/assistant/{assistant_id}", json=assistant_data).json()
+            self.cache.invalidate("/assistant")
+            return result
         except Exception as e:
             st.error(f"Matrix Error - Failed to update agent {assistant_id}: {e}")
             return None
@@ -597,59 +685,76 @@ class MatrixVAPIClient:
     def delete_assistant(self, assistant_id: str) -> bool:
         """Delete assistant"""
         try:
-            response = requests.delete(f"{self.base_url}/assistant/{assistant_id}", headers=self.headers)
-            response.raise_for_status()
+            self._request("DELETE", f"/assistant/{assistant_id}")
+            self.cache.invalidate("/assistant")
             return True
         except Exception as e:
             st.error(f"Matrix Error - Failed to delete agent {assistant_id}: {e}")
             return False
     
+    def list_calls(self, limit: int = 100, created_at_gt: str = None, created_at_le: str = None,
+                   updated_at_gt: str = None, priority: int = PRIORITY_INTERACTIVE,
+                   created_at_lt: str = None) -> List[Dict]:
+        """List one page of calls (newest first), raising on failure"""
+        params = {'limit': limit}
+        if created_at_gt:
+            params['createdAtGt'] = created_at_gt
+        if created_at_le:
+            params['createdAtLe'] = created_at_le
+        if created_at_lt:
+            params['createdAtLt'] = created_at_lt
+        if updated_at_gt:
+            params['updatedAtGt'] = updated_at_gt
+        return self._request("GET", "/call", priority=priority, params=params).json()
+    
     def get_calls(self, limit: int = 100) -> List[Dict]:
         """Get call history"""
         try:
-            response = requests.get(f"{self.base_url}/call?limit={limit}", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self.list_calls(limit=limit)
         except Exception as e:
             st.error(f"Matrix Error - Failed to access call logs: {e}")
             return []
     
-    def get_call_details(self, call_id: str) -> Optional[Dict]:
+    def get_call_details(self, call_id: str, refresh: bool = False) -> Optional[Dict]:
         """Get specific call details"""
         try:
-            response = requests.get(f"{self.base_url}/call/{call_id}", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(f"/call/{call_id}", refresh=refresh)
         except Exception as e:
             st.error(f"Matrix Error - Call {call_id} not found in logs: {e}")
             return None
     
-    def get_call_recording(self, call_id: str) -> Optional[str]:
+    def get_call_recording(self, call_id: str, persist: bool = True) -> Optional[str]:
         """Get call recording URL"""
         try:
-            response = requests.get(f"{self.base_url}/call/{call_id}/recording", headers=self.headers)
-            response.raise_for_status()
-            return response.json().get('recordingUrl')
+            recording_url = self.artifact_store.get(call_id, 'recording')
+            if recording_url:
+                return recording_url
+            recording_url = self._request("GET", f"/call/{call_id}/recording").json().get('recordingUrl')
+            if recording_url and persist:
+                self.artifact_store.put(call_id, 'recording', recording_url)
+            return recording_url
         except Exception as e:
             st.error(f"Matrix Error - Recording for call {call_id} not found: {e}")
             return None
     
-    def get_call_transcript(self, call_id: str) -> Optional[Dict]:
+    def get_call_transcript(self, call_id: str, persist: bool = True) -> Optional[Dict]:
         """Get call transcript"""
         try:
-            response = requests.get(f"{self.base_url}/call/{call_id}/transcript", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            transcript = self.artifact_store.get(call_id, 'transcript')
+            if transcript:
+                return transcript
+            transcript = self._request("GET", f"/call/{call_id}/transcript").json()
+            if transcript and persist:
+                self.artifact_store.put(call_id, 'transcript', transcript)
+            return transcript
         except Exception as e:
             st.error(f"Matrix Error - Transcript for call {call_id} not found: {e}")
             return None
     
-    def get_phone_numbers(self) -> List[Dict]:
+    def get_phone_numbers(self, refresh: bool = False) -> List[Dict]:
         """Get available phone numbers"""
         try:
-            response = requests.get(f"{self.base_url}/phone-number", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json("/phone-number", refresh=refresh)
         except Exception as e:
             st.error(f"Matrix Error - Failed to access phone network: {e}")
             return []
@@ -657,11 +762,9 @@ class MatrixVAPIClient:
     def create_phone_number(self, phone_data: Dict) -> Optional[Dict]:
         """Create new phone number"""
         try:
-            response = requests.post(f"{self.base_url}/phone-number", 
-                                   headers=self.headers, 
-                                   json=phone_data)
-            response.raise_for_status()
-            return response.json()
+            result = self._request("POST", "/phone-number", json=phone_data).json()
+            self.cache.invalidate("/phone-number")
+            return result
         except Exception as e:
             st.error(f"Matrix Error - Failed to create phone number: {e}")
             return None
@@ -675,11 +778,7 @@ class MatrixVAPIClient:
             if end_date:
                 params['endDate'] = end_date
             
-            response = requests.get(f"{self.base_url}/analytics", 
-                                  headers=self.headers, 
-                                  params=params)
-            response.raise_for_status()
-            return response.json()
+            return self._request("GET", "/analytics", params=params).json()
         except Exception as e:
             st.error(f"Matrix Error - Failed to access analytics: {e}")
             return None
@@ -693,6 +792,60 @@ def get_matrix_vapi_client():
 
 matrix_vapi_client = get_matrix_vapi_client()
 
+# Initialize Matrix database
+@st.cache_resource
+def get_matrix_database():
+    return DatabaseManager(DATABASE_CONFIG['url'])
+
+matrix_db = get_matrix_database()
+
+# Call history filter index, kept current by matrix_db's call listeners
+@st.cache_resource
+def get_call_filter_index():
+    return CallFilterIndex(matrix_db)
+
+call_filter_index = get_call_filter_index()
+
+# Full-text transcript search; transcripts stored before it existed are indexed once per process
+@st.cache_resource
+def get_transcript_search():
+    try:
+        search_index = TranscriptSearchIndex(matrix_db)
+        search_index.backfill()
+        return search_index
+    except NotImplementedError:
+        return None
+
+transcript_search = get_transcript_search()
+
+@st.cache_resource
+def get_transcript_renderer():
+    return TranscriptRenderer()
+
+transcript_renderer = get_transcript_renderer()
+
+# Streaming exports, written to disk chunk by chunk instead of built in memory
+@st.cache_resource
+def get_call_exporter():
+    return CallExporter(matrix_db)
+
+call_exporter = get_call_exporter()
+
+# Window reports, shared through the report cache with the report scheduler process
+@st.cache_resource
+def get_analytics_engine():
+    return MatrixAnalyticsEngine(matrix_db)
+
+analytics_engine = get_analytics_engine()
+
+# Export format choices -> (format, gzip)
+EXPORT_CHOICES = {
+    "NDJSON (gzip)": ('ndjson', True),
+    "NDJSON": ('ndjson', False),
+    "CSV (gzip)": ('csv', True),
+    "CSV": ('csv', False),
+}
+
 
 # Session State Management
 def initialize_matrix_session_state():
@@ -709,8 +862,12 @@ def initialize_matrix_session_state():
         st.session_state.call_duration = 0
     if 'call_logs' not in st.session_state:
         st.session_state.call_logs = []
-    if 'call_history' not in st.session_state:
-        st.session_state.call_history = []
+    if 'active_call_id' not in st.session_state:
+        st.session_state.active_call_id = None
+    if 'call_history_page' not in st.session_state:
+        st.session_state.call_history_page = 0
+    if 'expanded_call_id' not in st.session_state:
+        st.session_state.expanded_call_id = None
     if 'call_analytics' not in st.session_state:
         st.session_state.call_analytics = defaultdict(int)
     if 'agent_performance' not in st.session_state:
@@ -743,6 +900,11 @@ def initialize_matrix_session_state():
 # Initialize Matrix session state
 initialize_matrix_session_state()
 
+# Apply the saved per-minute VAPI limit; update_limits is a no-op unless the value changed
+if matrix_vapi_client:
+    matrix_vapi_client.scheduler.update_limits(
+        calls_per_minute=st.session_state.user_preferences.get('security', {}).get('api_rate_limit'))
+
 # Matrix-themed CSS styling
 st.markdown("""
 <style>
@@ -967,6 +1129,187 @@ def format_duration(seconds):
         minutes = int((seconds % 3600) // 60)
         return f"{hours}h {minutes}m"
 
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_figure_json(chart_key: str, data_version: int, _build_figure) -> str:
+    """Downsampled, serialized figure, rebuilt only when the call data changes"""
+    return figure_json(_build_figure())
+
+def show_figure(chart_key, build_figure):
+    """Render a figure from its cached JSON payload"""
+    payload = cached_figure_json(chart_key, matrix_db.get_data_version(), build_figure)
+    st.plotly_chart(json.loads(payload), use_container_width=True)
+
+def offer_export(path, label, fmt='ndjson', compress=False):
+    """Download button for a finished export file, plus one for its metadata sidecar if it has one"""
+    with open(path, 'rb') as export_file:
+        st.download_button(label=label, data=export_file, file_name=os.path.basename(path),
+                           mime=export_mime(fmt, compress))
+    sidecar_path = metadata_path(path)
+    if os.path.exists(sidecar_path):
+        with open(sidecar_path, 'rb') as sidecar_file:
+            st.download_button(label="📋 Download Export Metadata", data=sidecar_file,
+                               file_name=os.path.basename(sidecar_path), mime="application/json",
+                               key=f"metadata_{os.path.basename(path)}")
+
+def open_uploaded_backup(uploaded_file):
+    """Text stream over an uploaded NDJSON backup, decompressing .gz uploads"""
+    uploaded_file.seek(0)
+    if uploaded_file.name.endswith('.gz'):
+        return gzip.open(uploaded_file, 'rt', encoding='utf-8')
+    return io.TextIOWrapper(uploaded_file, encoding='utf-8')
+
+def local_to_utc(moment):
+    """Naive UTC for a naive local datetime; call times are stored and compared in naive UTC"""
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+def transcript_for_storage(transcript):
+    """Serialize a structured VAPI transcript for the CallRecord text column"""
+    if transcript is None or isinstance(transcript, str):
+        return transcript
+    return json.dumps(transcript)
+
+def imported_call_record(call):
+    """Map an exported call (current or pre-database backup format) onto CallRecord columns"""
+    started_at = parse_vapi_timestamp(call.get('started_at') or call.get('timestamp')) or datetime.utcnow()
+    metadata = call.get('metadata') or {
+        'matrix_level': call.get('matrix_level', 'Operator'),
+        'overrides': call.get('overrides', {})
+    }
+    return {
+        'id': call.get('id') or str(uuid.uuid4()),
+        'agent_id': call.get('agent_id') or 'unknown',
+        'agent_name': call.get('agent_name') or 'Unknown',
+        'phone_number': call.get('phone_number'),
+        'customer_number': call.get('customer_number'),
+        'status': call.get('status') or 'completed',
+        'duration': call.get('duration') or 0.0,
+        'cost': call.get('cost') or 0.0,
+        'recording_url': call.get('recording_url'),
+        'transcript': transcript_for_storage(call.get('transcript')),
+        'summary': call.get('summary'),
+        'started_at': started_at,
+        'ended_at': parse_vapi_timestamp(call.get('ended_at')),
+        'created_at': parse_vapi_timestamp(call.get('created_at')) or started_at,
+        'metadata': metadata
+    }
+
+def render_call_details(call):
+    """Full detail view of one call: info, recording, transcript and actions"""
+    call_metadata = call.get('metadata') or {}
+    col_info1, col_info2 = st.columns(2)
+    
+    with col_info1:
+        st.write(f"**Call ID:** `{call.get('id', 'Unknown')[:8]}...`")
+        st.write(f"**Agent:** {call.get('agent_name', 'Unknown')}")
+        st.write(f"**Status:** {call.get('status', 'unknown').title()}")
+        st.write(f"**Duration:** {format_duration(call.get('duration', 0))}")
+    
+    with col_info2:
+        st.write(f"**Cost:** ${call.get('cost', 0):.3f}")
+        st.write(f"**Phone:** {call.get('phone_number') or 'N/A'}")
+        st.write(f"**Customer:** {call.get('customer_number') or 'N/A'}")
+        matrix_level = call_metadata.get('matrix_level') or st.session_state.agents.get(call['agent_name'], {}).get('matrix_level', 'Operator')
+        st.write(f"**Matrix Level:** {matrix_level}")
+    
+    # Audio player section
+    if call.get('recording_url'):
+        st.markdown("#### 🎵 Call Recording")
+        st.markdown(f"""
+        <div class="audio-player">
+            <audio controls style="width: 100%;">
+                <source src="{call['recording_url']}" type="audio/mpeg">
+                <source src="{call['recording_url']}" type="audio/wav">
+                Your browser does not support the audio element.
+            </audio>
+        </div>
+        """, unsafe_allow_html=True)
+    
+        # Download link
+        st.markdown(f"[📥 Download Recording]({call['recording_url']})")
+    else:
+        # Try to get recording from VAPI
+        if matrix_vapi_client and st.button(f"🎵 Get Recording", key=f"get_recording_{call['id']}"):
+            with st.spinner("Fetching recording from VAPI..."):
+                recording_url = matrix_vapi_client.get_call_recording(
+                    call['id'], persist=call.get('status') in FINAL_CALL_STATUSES)
+                if recording_url:
+                    matrix_db.update_call_record(call['id'], {'recording_url': recording_url})
+                    st.success("✅ Recording found!")
+                    st.rerun()
+                else:
+                    st.warning("⚠️ No recording available for this call")
+    
+    # Transcript section
+    if call.get('transcript'):
+        st.markdown("#### 📝 Call Transcript")
+    
+        # Escaped fragments are cached per call; long transcripts show a window with "load more"
+        transcript_limit_key = f"transcript_limit_{call['id']}"
+        transcript_limit = st.session_state.get(transcript_limit_key, CALL_HISTORY_CONFIG['transcript_window'])
+        transcript_html, total_entries = transcript_renderer.render(call['id'], call['transcript'], transcript_limit)
+        st.markdown(transcript_html, unsafe_allow_html=True)
+        if total_entries > transcript_limit:
+            if st.button(f"⬇️ Load More ({transcript_limit} of {total_entries} shown)",
+                         key=f"more_transcript_{call['id']}"):
+                st.session_state[transcript_limit_key] = transcript_limit + CALL_HISTORY_CONFIG['transcript_window']
+                st.rerun()
+    else:
+        # Try to get transcript from VAPI
+        if matrix_vapi_client and st.button(f"📝 Get Transcript", key=f"get_transcript_{call['id']}"):
+            with st.spinner("Fetching transcript from VAPI..."):
+                transcript = matrix_vapi_client.get_call_transcript(
+                    call['id'], persist=call.get('status') in FINAL_CALL_STATUSES)
+                if transcript:
+                    matrix_db.update_call_record(call['id'], {'transcript': transcript_for_storage(transcript)})
+                    st.success("✅ Transcript found!")
+                    st.rerun()
+                else:
+                    st.warning("⚠️ No transcript available for this call")
+    
+    # Action buttons
+    col_action1, col_action2, col_action3 = st.columns(3)
+    
+    with col_action1:
+        if st.button(f"📊 Analyze", key=f"analyze_{call['id']}"):
+            st.info("🔍 Call analysis feature coming soon...")
+    
+    with col_action2:
+        if st.button(f"📤 Export", key=f"export_{call['id']}"):
+            # Export call data as JSON
+            export_data = {
+                'call_data': call,
+                'export_timestamp': datetime.now().isoformat()
+            }
+    
+            json_data = json.dumps(export_data, indent=2, default=str)
+            st.download_button(
+                label="💾 Download Call Data",
+                data=json_data,
+                file_name=f"call_{call['id'][:8]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                mime="application/json",
+                key=f"download_{call['id']}"
+            )
+    
+    with col_action3:
+        if st.button(f"🔄 Refresh", key=f"refresh_{call['id']}"):
+            # Refresh call data from VAPI
+            if matrix_vapi_client:
+                with st.spinner("Refreshing call data..."):
+                    updated_call = matrix_vapi_client.get_call_details(call['id'], refresh=True)
+                    if updated_call:
+                        # Update the call record
+                        call_update = {}
+                        for key, value in updated_call.items():
+                            if key in ['recordingUrl', 'transcript', 'duration', 'cost', 'status']:
+                                call_update[key.replace('recordingUrl', 'recording_url')] = value
+                        if 'transcript' in call_update:
+                            call_update['transcript'] = transcript_for_storage(call_update['transcript'])
+                        matrix_db.update_call_record(call['id'], call_update)
+                        st.success("✅ Call data refreshed!")
+                        st.rerun()
+                    else:
+                        st.warning("⚠️ Could not refresh call data")
+
 def start_matrix_call(agent_name, agent_id, overrides=None):
     """Start a call with the specified agent"""
     try:
@@ -974,22 +1317,25 @@ def start_matrix_call(agent_name, agent_id, overrides=None):
         # For now, we'll simulate the call start
         st.session_state.call_active = True
         st.session_state.selected_agent = agent_name
-        st.session_state.call_start_time = datetime.now()
+        st.session_state.call_start_time = datetime.utcnow()
         
         # Add to call history
         call_record = {
             'id': str(uuid.uuid4()),
             'agent_name': agent_name,
             'agent_id': agent_id,
-            'timestamp': datetime.now().isoformat(),
+            'started_at': st.session_state.call_start_time,
             'status': 'connected',
             'duration': 0,
             'cost': 0,
-            'matrix_level': st.session_state.agents[agent_name].get('matrix_level', 'Operator'),
-            'overrides': overrides or {}
+            'metadata': {
+                'matrix_level': st.session_state.agents[agent_name].get('matrix_level', 'Operator'),
+                'overrides': overrides or {}
+            }
         }
         
-        st.session_state.call_history.append(call_record)
+        matrix_db.create_call_record(call_record)
+        st.session_state.active_call_id = call_record['id']
         return True, f"Neural link established with {agent_name}"
         
     except Exception as e:
@@ -998,25 +1344,31 @@ def start_matrix_call(agent_name, agent_id, overrides=None):
 def end_matrix_call():
     """End the current call"""
     if st.session_state.call_active and st.session_state.call_start_time:
-        duration = (datetime.now() - st.session_state.call_start_time).total_seconds()
+        ended_at = datetime.utcnow()
+        duration = (ended_at - st.session_state.call_start_time).total_seconds()
         
         # Update call history
-        if st.session_state.call_history:
-            last_call = st.session_state.call_history[-1]
-            last_call['duration'] = duration
-            last_call['status'] = 'disconnected'
+        if st.session_state.active_call_id:
+            call_update = {
+                'duration': duration,
+                'status': 'disconnected',
+                'ended_at': ended_at
+            }
             
             # Calculate cost
             agent_name = st.session_state.selected_agent
             if agent_name in st.session_state.agents:
                 cost_per_minute = st.session_state.agents[agent_name].get('cost_per_minute', 0.12)
                 cost = (duration / 60) * cost_per_minute
-                last_call['cost'] = cost
+                call_update['cost'] = cost
                 
                 # Update cost tracking
                 st.session_state.cost_tracking['total_cost'] += cost
                 st.session_state.cost_tracking['daily_cost'] += cost
                 st.session_state.cost_tracking['cost_by_agent'][agent_name] += cost
+            
+            matrix_db.update_call_record(st.session_state.active_call_id, call_update)
+            st.session_state.active_call_id = None
         
         st.session_state.call_active = False
         st.session_state.selected_agent = None
@@ -1045,7 +1397,7 @@ with st.sidebar:
         if st.session_state.selected_agent:
             st.write(f"**Connected to:** {st.session_state.selected_agent}")
             if st.session_state.call_start_time:
-                duration = (datetime.now() - st.session_state.call_start_time).total_seconds()
+                duration = (datetime.utcnow() - st.session_state.call_start_time).total_seconds()
                 st.write(f"**Duration:** {format_duration(duration)}")
         
         if st.button("🔌 Disconnect", use_container_width=True):
@@ -1079,7 +1431,7 @@ with st.sidebar:
     st.markdown("### 📊 Quick Stats")
     st.metric("Total Agents", len(st.session_state.agents))
     st.metric("Active Squads", len(st.session_state.squads))
-    st.metric("Total Calls", len(st.session_state.call_history))
+    st.metric("Total Calls", matrix_db.count_call_records())
     st.metric("Total Cost", f"${st.session_state.cost_tracking['total_cost']:.2f}")
 
 # Main content area based on current page
@@ -1180,31 +1532,11 @@ elif st.session_state.current_page == "call_history":
     if matrix_vapi_client and st.button("🔄 Sync with VAPI", use_container_width=True):
         with st.spinner("Syncing call history from VAPI..."):
             try:
-                vapi_calls = matrix_vapi_client.get_calls(limit=50)
-                
-                # Update session state with VAPI data
-                for vapi_call in vapi_calls:
-                    call_record = {
-                        'id': vapi_call.get('id'),
-                        'agent_name': vapi_call.get('assistantId', 'Unknown Agent'),
-                        'agent_id': vapi_call.get('assistantId'),
-                        'timestamp': vapi_call.get('createdAt', datetime.now().isoformat()),
-                        'status': vapi_call.get('status', 'completed'),
-                        'duration': vapi_call.get('duration', 0),
-                        'cost': vapi_call.get('cost', 0),
-                        'phone_number': vapi_call.get('phoneNumber', ''),
-                        'customer_number': vapi_call.get('customer', {}).get('number', ''),
-                        'recording_url': vapi_call.get('recordingUrl'),
-                        'transcript': vapi_call.get('transcript'),
-                        'matrix_level': 'Operator'  # Default, would need to map from agent
-                    }
-                    
-                    # Check if call already exists
-                    existing_call = next((call for call in st.session_state.call_history if call['id'] == call_record['id']), None)
-                    if not existing_call:
-                        st.session_state.call_history.append(call_record)
+                agent_names = {info['id']: name for name, info in st.session_state.agents.items()}
+                sync_engine = CallSyncEngine(matrix_vapi_client, matrix_db, agent_names)
+                sync_result = sync_engine.sync()
                 
-                st.success(f"✅ Synced {len(vapi_calls)} calls from VAPI")
+                st.success(f"✅ Synced {sync_result['synced']} new or updated calls from VAPI")
                 st.rerun()
                 
             except Exception as e:
@@ -1225,14 +1557,14 @@ elif st.session_state.current_page == "call_history":
     with col_filter4:
         sort_order = st.selectbox("Sort Order", ["Newest First", "Oldest First"])
     
-    # Filter call history
-    filtered_history = st.session_state.call_history.copy()
+    # Filter call history - filters and sort are resolved by the call filter index
+    history_filters = {}
     
     if status_filter != "All":
-        filtered_history = [call for call in filtered_history if call.get('status') == status_filter]
+        history_filters['status'] = status_filter
     
     if agent_filter != "All Agents":
-        filtered_history = [call for call in filtered_history if call.get('agent_name') == agent_filter]
+        history_filters['agent_name'] = agent_filter
     
     # Date filtering
     if date_filter != "All Time":
@@ -1245,175 +1577,120 @@ elif st.session_state.current_page == "call_history":
         elif date_filter == "This Month":
             start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         
-        filtered_history = [call for call in filtered_history 
-                          if datetime.fromisoformat(call.get('timestamp', '').replace('Z', '+00:00').replace('+00:00', '')) >= start_date]
+        # Calendar boundaries are local; the stored call times they are compared with are UTC
+        history_filters['start_date'] = local_to_utc(start_date)
+    
+    # Transcript search within the same agent and date filters
+    if transcript_search:
+        with st.expander("🔎 Search Transcripts"):
+            col_search1, col_search2 = st.columns([3, 1])
+            
+            with col_search1:
+                search_query = st.text_input("Search", placeholder="refund invoice, cancel*", key="transcript_query")
+            
+            with col_search2:
+                speaker_filter = st.selectbox("Speaker", ["Anyone", "assistant", "user"], key="transcript_speaker")
+            
+            if search_query:
+                search_results = transcript_search.search(
+                    search_query, role=None if speaker_filter == "Anyone" else speaker_filter,
+                    agent_name=history_filters.get('agent_name'), start_date=history_filters.get('start_date'))
+                st.caption(f"{len(search_results)} best matches")
+                for result in search_results:
+                    st.markdown(f"""
+                    <div class="transcript-container">
+                        <strong style="color: #00ffff;">{html.escape(str(result['agent_name']))} • {result['started_at']} • {html.escape(result['role'] or 'unknown')}</strong>
+                        <code>{html.escape(result['call_id'][:8])}</code><br>
+                        {result['snippet']}
+                    </div>
+                    """, unsafe_allow_html=True)
+    
+    # Page through the filtered history in the database; a filter change starts again at page 1
+    history_view = (status_filter, agent_filter, date_filter, sort_order)
+    if st.session_state.get('call_history_view') != history_view:
+        st.session_state.call_history_view = history_view
+        st.session_state.call_history_page = 0
     
-    # Sort history
-    filtered_history.sort(key=lambda x: x.get('timestamp', ''), 
-                        reverse=(sort_order == "Newest First"))
+    page_size_options = CALL_HISTORY_CONFIG['page_size_options']
+    page_size = st.session_state.get('call_history_page_size', CALL_HISTORY_CONFIG['page_size'])
+    
+    # The in-memory index resolves the filters to the page's call ids; only those rows are read
+    total_records, page, page_ids = call_filter_index.query_page(
+        st.session_state.call_history_page, page_size, newest_first=(sort_order == "Newest First"), **history_filters)
+    page_count = max(1, -(-total_records // page_size))
+    filtered_history = matrix_db.get_call_records_by_ids(page_ids)
     
     if filtered_history:
-        st.markdown(f"### 📊 Call Records ({len(filtered_history)} found)")
+        st.markdown(f"### 📊 Call Records ({total_records} found)")
+        
+        col_page1, col_page2, col_page3, col_page4 = st.columns([1, 2, 1, 1])
         
-        # Display call records with audio players
+        with col_page1:
+            if st.button("◀ Previous", disabled=page == 0, use_container_width=True):
+                st.session_state.call_history_page = page - 1
+                st.rerun()
+        
+        with col_page2:
+            st.markdown(f"<div style='text-align: center;'>Page {page + 1} of {page_count} • "
+                        f"calls {page * page_size + 1}-{page * page_size + len(filtered_history)}</div>",
+                        unsafe_allow_html=True)
+        
+        with col_page3:
+            if st.button("Next ▶", disabled=page >= page_count - 1, use_container_width=True):
+                st.session_state.call_history_page = page + 1
+                st.rerun()
+        
+        with col_page4:
+            selected_page_size = st.selectbox("Page Size", page_size_options,
+                                              index=page_size_options.index(page_size) if page_size in page_size_options else 0,
+                                              label_visibility="collapsed")
+            if selected_page_size != page_size:
+                st.session_state.call_history_page_size = selected_page_size
+                st.session_state.call_history_page = page * page_size // selected_page_size
+                st.rerun()
+        
+        # One compact row per call; only the expanded call renders its player, transcript and actions
         for call in filtered_history:
-            with st.expander(f"📞 {call.get('agent_name', 'Unknown Agent')} - {call.get('timestamp', 'Unknown Time')[:19].replace('T', ' ')}"):
-                col_info1, col_info2 = st.columns(2)
-                
-                with col_info1:
-                    st.write(f"**Call ID:** `{call.get('id', 'Unknown')[:8]}...`")
-                    st.write(f"**Agent:** {call.get('agent_name', 'Unknown')}")
-                    st.write(f"**Status:** {call.get('status', 'unknown').title()}")
-                    st.write(f"**Duration:** {format_duration(call.get('duration', 0))}")
-                
-                with col_info2:
-                    st.write(f"**Cost:** ${call.get('cost', 0):.3f}")
-                    st.write(f"**Phone:** {call.get('phone_number', 'N/A')}")
-                    st.write(f"**Customer:** {call.get('customer_number', 'N/A')}")
-                    st.write(f"**Matrix Level:** {call.get('matrix_level', 'Operator')}")
-                
-                # Audio player section
-                if call.get('recording_url'):
-                    st.markdown("#### 🎵 Call Recording")
-                    st.markdown(f"""
-                    <div class="audio-player">
-                        <audio controls style="width: 100%;">
-                            <source src="{call['recording_url']}" type="audio/mpeg">
-                            <source src="{call['recording_url']}" type="audio/wav">
-                            Your browser does not support the audio element.
-                        </audio>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Download link
-                    st.markdown(f"[📥 Download Recording]({call['recording_url']})")
-                else:
-                    # Try to get recording from VAPI
-                    if matrix_vapi_client and st.button(f"🎵 Get Recording", key=f"get_recording_{call['id']}"):
-                        with st.spinner("Fetching recording from VAPI..."):
-                            recording_url = matrix_vapi_client.get_call_recording(call['id'])
-                            if recording_url:
-                                call['recording_url'] = recording_url
-                                st.success("✅ Recording found!")
-                                st.rerun()
-                            else:
-                                st.warning("⚠️ No recording available for this call")
-                
-                # Transcript section
-                if call.get('transcript'):
-                    st.markdown("#### 📝 Call Transcript")
-                    
-                    transcript_data = call['transcript']
-                    if isinstance(transcript_data, str):
-                        st.markdown(f"""
-                        <div class="transcript-container">
-                            {transcript_data}
-                        </div>
-                        """, unsafe_allow_html=True)
-                    elif isinstance(transcript_data, list):
-                        # Handle structured transcript
-                        transcript_html = ""
-                        for entry in transcript_data:
-                            speaker = entry.get('role', 'Unknown')
-                            text = entry.get('message', entry.get('text', ''))
-                            timestamp = entry.get('timestamp', '')
-                            
-                            transcript_html += f"""
-                            <div style="margin-bottom: 10px;">
-                                <strong style="color: #00ffff;">[{timestamp}] {speaker}:</strong><br>
-                                <span style="margin-left: 20px;">{text}</span>
-                            </div>
-                            """
-                        
-                        st.markdown(f"""
-                        <div class="transcript-container">
-                            {transcript_html}
-                        </div>
-                        """, unsafe_allow_html=True)
-                else:
-                    # Try to get transcript from VAPI
-                    if matrix_vapi_client and st.button(f"📝 Get Transcript", key=f"get_transcript_{call['id']}"):
-                        with st.spinner("Fetching transcript from VAPI..."):
-                            transcript = matrix_vapi_client.get_call_transcript(call['id'])
-                            if transcript:
-                                call['transcript'] = transcript
-                                st.success("✅ Transcript found!")
-                                st.rerun()
-                            else:
-                                st.warning("⚠️ No transcript available for this call")
-                
-                # Action buttons
-                col_action1, col_action2, col_action3 = st.columns(3)
-                
-                with col_action1:
-                    if st.button(f"📊 Analyze", key=f"analyze_{call['id']}"):
-                        st.info("🔍 Call analysis feature coming soon...")
-                
-                with col_action2:
-                    if st.button(f"📤 Export", key=f"export_{call['id']}"):
-                        # Export call data as JSON
-                        export_data = {
-                            'call_data': call,
-                            'export_timestamp': datetime.now().isoformat()
-                        }
-                        
-                        json_data = json.dumps(export_data, indent=2)
-                        st.download_button(
-                            label="💾 Download Call Data",
-                            data=json_data,
-                            file_name=f"call_{call['id'][:8]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                            mime="application/json",
-                            key=f"download_{call['id']}"
-                        )
-                
-                with col_action3:
-                    if st.button(f"🔄 Refresh", key=f"refresh_{call['id']}"):
-                        # Refresh call data from VAPI
-                        if matrix_vapi_client:
-                            with st.spinner("Refreshing call data..."):
-                                updated_call = matrix_vapi_client.get_call_details(call['id'])
-                                if updated_call:
-                                    # Update the call record
-                                    for key, value in updated_call.items():
-                                        if key in ['recordingUrl', 'transcript', 'duration', 'cost', 'status']:
-                                            call[key.replace('recordingUrl', 'recording_url')] = value
-                                    st.success("✅ Call data refreshed!")
-                                    st.rerun()
-                                else:
-                                    st.warning("⚠️ Could not refresh call data")
+            is_expanded = st.session_state.expanded_call_id == call['id']
+            row_label = (f"{'▼' if is_expanded else '▶'} 📞 {call.get('agent_name', 'Unknown Agent')} - "
+                         f"{call['started_at'].strftime('%Y-%m-%d %H:%M:%S')} • {call.get('status', 'unknown').title()} • "
+                         f"{format_duration(call.get('duration') or 0)}")
+            if st.button(row_label, key=f"toggle_{call['id']}", use_container_width=True):
+                st.session_state.expanded_call_id = None if is_expanded else call['id']
+                st.rerun()
+            if is_expanded:
+                render_call_details(call)
         
         # Bulk actions
         st.markdown("### 🔧 Bulk Actions")
-        col_bulk1, col_bulk2, col_bulk3 = st.columns(3)
+        export_choice = st.selectbox("Export Format", list(EXPORT_CHOICES), key="history_export_format")
+        col_bulk1, col_bulk2, col_bulk3, col_bulk4 = st.columns(4)
         
         with col_bulk1:
             if st.button("📤 Export All", use_container_width=True):
-                export_data = {
-                    'call_history': filtered_history,
-                    'export_timestamp': datetime.now().isoformat(),
-                    'total_records': len(filtered_history),
-                    'filters_applied': {
-                        'status': status_filter,
-                        'agent': agent_filter,
-                        'date': date_filter,
-                        'sort': sort_order
-                    }
-                }
-                
-                json_data = json.dumps(export_data, indent=2)
-                st.download_button(
-                    label="💾 Download All Call Data",
-                    data=json_data,
-                    file_name=f"call_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                    mime="application/json"
-                )
+                # Bulk actions cover every filtered call, not just the current page
+                export_format, compress = EXPORT_CHOICES[export_choice]
+                try:
+                    with st.spinner("Exporting call history..."):
+                        export_path, exported = call_exporter.export_calls(
+                            export_format, compress,
+                            metadata={'filters_applied': {
+                                'status': status_filter,
+                                'agent': agent_filter,
+                                'date': date_filter,
+                                'sort': sort_order
+                            }},
+                            newest_first=(sort_order == "Newest First"), **history_filters)
+                    st.success(f"✅ Exported {exported} calls")
+                    offer_export(export_path, "💾 Download All Call Data", export_format, compress)
+                except Exception as e:
+                    st.error(f"❌ Export failed: {e}")
         
         with col_bulk2:
             if st.button("🎵 Download All Recordings", use_container_width=True):
-                recordings_with_urls = [call for call in filtered_history if call.get('recording_url')]
-                if recordings_with_urls:
-                    # Create a list of recording URLs
-                    recording_urls = [call['recording_url'] for call in recordings_with_urls]
+                recording_urls = [recording_url for (recording_url,) in
+                                  matrix_db.iter_call_record_rows(['recording_url'], **history_filters) if recording_url]
+                if recording_urls:
                     urls_text = '\n'.join(recording_urls)
                     
                     st.download_button(
@@ -1426,9 +1703,45 @@ elif st.session_state.current_page == "call_history":
                     st.warning("⚠️ No recordings available in filtered results")
         
         with col_bulk3:
+            if matrix_vapi_client and st.button("📝 Fetch Missing Artifacts", use_container_width=True):
+                missing_transcripts, missing_recordings, final_ids = [], [], set()
+                for call_id, call_status, transcript_missing, recording_missing in \
+                        matrix_db.iter_calls_missing_artifacts(**history_filters):
+                    if transcript_missing:
+                        missing_transcripts.append(call_id)
+                    if recording_missing:
+                        missing_recordings.append(call_id)
+                    if call_status in FINAL_CALL_STATUSES:
+                        final_ids.add(call_id)
+                if missing_transcripts or missing_recordings:
+                    with st.spinner(f"Fetching {len(missing_transcripts)} transcripts and {len(missing_recordings)} recordings from VAPI..."):
+                        transcripts = fetch_call_artifacts(VAPI_API_KEY, missing_transcripts, 'transcript', VAPI_BASE_URL,
+                                                           artifact_store=matrix_vapi_client.artifact_store, persist_ids=final_ids)
+                        recordings = fetch_call_artifacts(VAPI_API_KEY, missing_recordings, 'recording', VAPI_BASE_URL,
+                                                          artifact_store=matrix_vapi_client.artifact_store, persist_ids=final_ids)
+                    
+                    # Partial rows, so the upsert only updates the fetched columns of existing calls
+                    call_updates = defaultdict(dict)
+                    for call_id, transcript in transcripts.items():
+                        if transcript:
+                            call_updates[call_id]['transcript'] = transcript_for_storage(transcript)
+                    for call_id, recording_url in recordings.items():
+                        if recording_url:
+                            call_updates[call_id]['recording_url'] = recording_url
+                    if call_updates:
+                        matrix_db.bulk_upsert_call_records(
+                            {'id': call_id, **call_update} for call_id, call_update in call_updates.items())
+                    
+                    found = sum(1 for value in transcripts.values() if value) + sum(1 for value in recordings.values() if value)
+                    st.success(f"✅ Fetched {found} artifacts from VAPI")
+                    st.rerun()
+                else:
+                    st.info("📝 All filtered calls already have transcripts and recordings")
+        
+        with col_bulk4:
             if st.button("🗑️ Clear History", use_container_width=True):
                 if st.button("⚠️ Confirm Clear All", use_container_width=True):
-                    st.session_state.call_history = []
+                    matrix_db.delete_all_call_records()
                     st.success("✅ Call history cleared")
                     st.rerun()
     
@@ -1521,7 +1834,7 @@ elif st.session_state.current_page == "agent_profiles":
         if matrix_vapi_client:
             if st.button("🔄 Sync with VAPI", use_container_width=True):
                 with st.spinner("Syncing agent data from VAPI..."):
-                    vapi_agent = matrix_vapi_client.get_assistant(agent_info['id'])
+                    vapi_agent = matrix_vapi_client.get_assistant(agent_info['id'], refresh=True)
                     if vapi_agent:
                         st.success("✅ Agent found in VAPI network")
                         
@@ -1768,22 +2081,22 @@ elif st.session_state.current_page == "agent_profiles":
         
         with col_perf3:
             # Calculate success rate from call history
-            agent_calls = [call for call in st.session_state.call_history if call.get('agent_name') == selected_agent]
-            successful_calls = [call for call in agent_calls if call.get('status') in ['disconnected', 'completed']]
-            success_rate = (len(successful_calls) / len(agent_calls) * 100) if agent_calls else 0
+            agent_stats = next(iter(matrix_db.call_stats_by_agent(agent_name=selected_agent)), None)
+            success_rate = (agent_stats['successful_calls'] / agent_stats['total_calls'] * 100) if agent_stats else 0
             st.metric("Success Rate", f"{success_rate:.1f}%")
         
         with col_perf4:
             # Calculate total cost for this agent
-            total_cost = sum(call.get('cost', 0) for call in agent_calls)
+            total_cost = agent_stats['total_cost'] if agent_stats else 0
             st.metric("Total Cost", f"${total_cost:.2f}")
         
         # Performance charts
-        if agent_calls:
+        if agent_stats:
             st.markdown("#### 📈 Call Duration Trend")
             
             # Create duration trend chart
-            call_durations = [call.get('duration', 0) for call in agent_calls[-20:]]  # Last 20 calls
+            recent_calls = matrix_db.query_call_history(agent_name=selected_agent, limit=20)  # Last 20 calls
+            call_durations = [call.get('duration') or 0 for call in reversed(recent_calls)]
             call_numbers = list(range(1, len(call_durations) + 1))
             
             fig = go.Figure()
@@ -1811,12 +2124,9 @@ elif st.session_state.current_page == "agent_profiles":
             # Cost analysis
             st.markdown("#### 💰 Cost Analysis")
             
-            daily_costs = defaultdict(float)
-            for call in agent_calls:
-                call_date = call.get('timestamp', '')[:10]  # Extract date part
-                daily_costs[call_date] += call.get('cost', 0)
+            daily_costs = {day['date']: day['cost'] for day in matrix_db.daily_call_stats(agent_name=selected_agent)}
             
-            if daily_costs:
+            def build_cost_figure():
                 dates = list(daily_costs.keys())
                 costs = list(daily_costs.values())
                 
@@ -1837,8 +2147,10 @@ elif st.session_state.current_page == "agent_profiles":
                     font=dict(color='#00ff41'),
                     height=400
                 )
-                
-                st.plotly_chart(fig_cost, use_container_width=True)
+                return fig_cost
+            
+            if daily_costs:
+                show_figure(f"agent_daily_cost:{selected_agent}", build_cost_figure)
         else:
             st.info("📊 No performance data available yet. Make some calls to see analytics!")
     
@@ -1879,7 +2191,7 @@ elif st.session_state.current_page == "agent_profiles":
         if st.button("🔄 Refresh from VAPI", use_container_width=True):
             if matrix_vapi_client:
                 with st.spinner("Refreshing agent data from VAPI..."):
-                    vapi_agent = matrix_vapi_client.get_assistant(agent_info['id'])
+                    vapi_agent = matrix_vapi_client.get_assistant(agent_info['id'], refresh=True)
                     if vapi_agent:
                         # Update all available fields
                         if 'model' in vapi_agent and 'messages' in vapi_agent['model']:
@@ -1944,8 +2256,10 @@ elif st.session_state.current_page == "analytics":
     
     col_metric1, col_metric2, col_metric3, col_metric4 = st.columns(4)
     
+    call_summary = matrix_db.call_summary()
+    
     with col_metric1:
-        total_calls = len(st.session_state.call_history)
+        total_calls = call_summary['total_calls']
         st.metric("Total Calls", total_calls)
     
     with col_metric2:
@@ -1957,23 +2271,23 @@ elif st.session_state.current_page == "analytics":
         st.metric("Total Cost", f"${total_cost:.2f}")
     
     with col_metric4:
-        if st.session_state.call_history:
-            avg_duration = sum(call.get('duration', 0) for call in st.session_state.call_history) / len(st.session_state.call_history)
+        if call_summary['total_calls']:
+            avg_duration = call_summary['avg_duration']
             st.metric("Avg Call Duration", format_duration(avg_duration))
         else:
             st.metric("Avg Call Duration", "0s")
     
     # Charts and visualizations
-    if st.session_state.call_history:
+    if call_summary['total_calls']:
+        daily_stats = matrix_db.daily_call_stats()
+        agent_stats = matrix_db.call_stats_by_agent()
+        
         # Call volume over time
         st.markdown("### 📅 Call Volume Over Time")
         
-        daily_calls = defaultdict(int)
-        for call in st.session_state.call_history:
-            call_date = call.get('timestamp', '')[:10]
-            daily_calls[call_date] += 1
+        daily_calls = {day['date']: day['calls'] for day in daily_stats}
         
-        if daily_calls:
+        def build_volume_figure():
             dates = sorted(daily_calls.keys())
             volumes = [daily_calls[date] for date in dates]
             
@@ -1996,20 +2310,18 @@ elif st.session_state.current_page == "analytics":
                 font=dict(color='#00ff41'),
                 height=400
             )
-            
-            st.plotly_chart(fig_volume, use_container_width=True)
+            return fig_volume
+        
+        if daily_calls:
+            show_figure("daily_volume", build_volume_figure)
         
         # Agent usage distribution
         st.markdown("### 🔮 Agent Usage Distribution")
         
-        agent_usage = defaultdict(int)
-        for call in st.session_state.call_history:
-            agent_name = call.get('agent_name', 'Unknown')
-            agent_usage[agent_name] += 1
+        agent_usage = {stats['agent_name']: stats['total_calls'] for stats in agent_stats}
         
-        if agent_usage:
-            agents = list(agent_usage.keys())
-            usage_counts = list(agent_usage.values())
+        def build_usage_figure():
+            agents, usage_counts = top_n_labels(agent_usage.keys(), agent_usage.values())
             
             fig_usage = go.Figure()
             fig_usage.add_trace(go.Bar(
@@ -2029,8 +2341,10 @@ elif st.session_state.current_page == "analytics":
                 height=400,
                 xaxis_tickangle=-45
             )
-            
-            st.plotly_chart(fig_usage, use_container_width=True)
+            return fig_usage
+        
+        if agent_usage:
+            show_figure("agent_usage", build_usage_figure)
         
         # Cost breakdown
         st.markdown("### 💰 Cost Analysis")
@@ -2039,12 +2353,9 @@ elif st.session_state.current_page == "analytics":
         
         with col_cost1:
             # Cost by agent
-            agent_costs = defaultdict(float)
-            for call in st.session_state.call_history:
-                agent_name = call.get('agent_name', 'Unknown')
-                agent_costs[agent_name] += call.get('cost', 0)
+            agent_costs = {stats['agent_name']: stats['total_cost'] for stats in agent_stats}
             
-            if agent_costs:
+            def build_cost_pie_figure():
                 fig_cost_pie = go.Figure(data=[go.Pie(
                     labels=list(agent_costs.keys()),
                     values=list(agent_costs.values()),
@@ -2058,17 +2369,16 @@ elif st.session_state.current_page == "analytics":
                     font=dict(color='#00ff41'),
                     height=400
                 )
-                
-                st.plotly_chart(fig_cost_pie, use_container_width=True)
+                return fig_cost_pie
+            
+            if agent_costs:
+                show_figure("agent_cost_share", build_cost_pie_figure)
         
         with col_cost2:
             # Daily cost trend
-            daily_costs = defaultdict(float)
-            for call in st.session_state.call_history:
-                call_date = call.get('timestamp', '')[:10]
-                daily_costs[call_date] += call.get('cost', 0)
+            daily_costs = {day['date']: day['cost'] for day in daily_stats}
             
-            if daily_costs:
+            def build_cost_trend_figure():
                 dates = sorted(daily_costs.keys())
                 costs = [daily_costs[date] for date in dates]
                 
@@ -2091,27 +2401,23 @@ elif st.session_state.current_page == "analytics":
                     font=dict(color='#00ff41'),
                     height=400
                 )
-                
-                st.plotly_chart(fig_cost_trend, use_container_width=True)
+                return fig_cost_trend
+            
+            if daily_costs:
+                show_figure("daily_cost_trend", build_cost_trend_figure)
         
         # Performance metrics
         st.markdown("### 📊 Performance Metrics")
         
         # Success rate by agent
         agent_performance = {}
-        for agent_name in st.session_state.agents.keys():
-            agent_calls = [call for call in st.session_state.call_history if call.get('agent_name') == agent_name]
-            if agent_calls:
-                successful_calls = [call for call in agent_calls if call.get('status') in ['disconnected', 'completed']]
-                success_rate = len(successful_calls) / len(agent_calls) * 100
-                avg_duration = sum(call.get('duration', 0) for call in agent_calls) / len(agent_calls)
-                total_cost = sum(call.get('cost', 0) for call in agent_calls)
-                
-                agent_performance[agent_name] = {
-                    'success_rate': success_rate,
-                    'avg_duration': avg_duration,
-                    'total_calls': len(agent_calls),
-                    'total_cost': total_cost
+        for stats in agent_stats:
+            if stats['agent_name'] in st.session_state.agents:
+                agent_performance[stats['agent_name']] = {
+                    'success_rate': stats['successful_calls'] / stats['total_calls'] * 100,
+                    'avg_duration': stats['total_duration'] / stats['total_calls'],
+                    'total_calls': stats['total_calls'],
+                    'total_cost': stats['total_cost']
                 }
         
         if agent_performance:
@@ -2129,6 +2435,42 @@ elif st.session_state.current_page == "analytics":
             
             df_performance = pd.DataFrame(performance_data)
             st.dataframe(df_performance, use_container_width=True, hide_index=True)
+        
+        # Window reports: the same windows the report scheduler precomputes, so these are usually cache hits
+        st.markdown("### 📑 Matrix Reports")
+        
+        db_agent_names = {agent.id: agent.name for agent in matrix_db.get_all_agents()}
+        report_windows = standard_report_windows(db_agent_names)
+        
+        def report_window_label(window_name):
+            if ':agent:' in window_name:
+                days, agent_id = window_name.split(':agent:')
+                return f"{db_agent_names.get(agent_id, agent_id)} ({days})"
+            return "Today" if window_name == 'today' else f"Last {window_name}"
+        
+        selected_window = st.selectbox("Report Window", list(report_windows), format_func=report_window_label)
+        window_start, window_end, window_filters = report_windows[selected_window]
+        with st.spinner("Loading report..."):
+            window_report = analytics_engine.get_report(window_start, window_end, window_filters)
+        
+        report_overview = window_report['overview']
+        col_report1, col_report2, col_report3, col_report4 = st.columns(4)
+        with col_report1:
+            st.metric("Calls", int(report_overview['total_calls']))
+        with col_report2:
+            st.metric("Success Rate", f"{report_overview['success_rate']:.1f}%")
+        with col_report3:
+            st.metric("Cost", f"${report_overview['total_cost']:.2f}")
+        with col_report4:
+            st.metric("Avg Call Duration", format_duration(report_overview['avg_call_duration']))
+        
+        for recommendation in window_report['recommendations']:
+            st.markdown(f"- {recommendation}")
+        
+        with st.spinner("Loading dashboard..."):
+            window_dashboard = analytics_engine.get_dashboard(window_start, window_end, window_filters)
+        for figure_payload in window_dashboard.values():
+            st.plotly_chart(json.loads(figure_payload), use_container_width=True)
     
     else:
         st.info("📊 No analytics data available yet. Make some calls to see insights!")
@@ -2191,6 +2533,8 @@ elif st.session_state.current_page == "system_config":
         with col_sec2:
             max_session_duration = st.number_input("Max session duration (hours)", min_value=1, max_value=24, value=8)
             idle_timeout = st.number_input("Idle timeout (minutes)", min_value=5, max_value=120, value=30)
+            api_rate_limit = st.number_input("VAPI rate limit (calls/minute)", min_value=1, max_value=1000,
+                                             value=API_CONFIG['rate_limit']['calls_per_minute'])
         
         if st.button("💾 Save Security Settings", use_container_width=True):
             security_settings = {
@@ -2198,9 +2542,12 @@ elif st.session_state.current_page == "system_config":
                 'require_confirmation': require_confirmation,
                 'log_all_activities': log_all_activities,
                 'max_session_duration': max_session_duration,
-                'idle_timeout': idle_timeout
+                'idle_timeout': idle_timeout,
+                'api_rate_limit': api_rate_limit
             }
             st.session_state.user_preferences['security'] = security_settings
+            if matrix_vapi_client:
+                matrix_vapi_client.scheduler.update_limits(calls_per_minute=api_rate_limit)
             st.success("✅ Security settings saved")
     
     with config_tab2:
@@ -2260,6 +2607,7 @@ elif st.session_state.current_page == "system_config":
         # Data export
         st.markdown("#### 📤 Export Matrix Data")
         
+        export_choice = st.selectbox("Call History Export Format", list(EXPORT_CHOICES), key="matrix_export_format")
         col_export1, col_export2 = st.columns(2)
         
         with col_export1:
@@ -2279,47 +2627,47 @@ elif st.session_state.current_page == "system_config":
                 )
             
             if st.button("💾 Export Call History", use_container_width=True):
-                export_data = {
-                    'call_history': st.session_state.call_history,
-                    'export_timestamp': datetime.now().isoformat(),
-                    'total_calls': len(st.session_state.call_history)
-                }
-                
-                json_data = json.dumps(export_data, indent=2)
-                st.download_button(
-                    label="💾 Download Call History JSON",
-                    data=json_data,
-                    file_name=f"matrix_call_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                    mime="application/json"
-                )
+                export_format, compress = EXPORT_CHOICES[export_choice]
+                try:
+                    with st.spinner("Exporting call history..."):
+                        export_path, exported = call_exporter.export_calls(export_format, compress,
+                                                                           prefix='matrix_call_history')
+                    st.success(f"✅ Exported {exported} calls")
+                    offer_export(export_path, "💾 Download Call History", export_format, compress)
+                except Exception as e:
+                    st.error(f"❌ Export failed: {e}")
         
         with col_export2:
+            compress_backup = st.checkbox("Compress backup (gzip)", value=True)
             if st.button("💾 Export Complete Matrix", use_container_width=True):
-                complete_export = {
+                sections = {
                     'agents': st.session_state.agents,
                     'squads': st.session_state.squads,
-                    'call_history': st.session_state.call_history,
                     'cost_tracking': st.session_state.cost_tracking,
-                    'user_preferences': st.session_state.user_preferences,
-                    'export_timestamp': datetime.now().isoformat(),
-                    'version': '2.0.0'
+                    'user_preferences': st.session_state.user_preferences
                 }
-                
-                json_data = json.dumps(complete_export, indent=2)
-                st.download_button(
-                    label="💾 Download Complete Backup",
-                    data=json_data,
-                    file_name=f"matrix_complete_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                    mime="application/json"
-                )
+                try:
+                    with st.spinner("Writing complete backup..."):
+                        export_path, exported = call_exporter.export_backup(sections, compress_backup,
+                                                                            metadata={'version': '2.0.0'})
+                    st.success(f"✅ Backed up {exported} calls")
+                    offer_export(export_path, "💾 Download Complete Backup", 'ndjson', compress_backup)
+                except Exception as e:
+                    st.error(f"❌ Backup failed: {e}")
         
         # Data import
         st.markdown("#### 📥 Import Matrix Data")
         
-        uploaded_file = st.file_uploader("Choose a backup file", type=['json'])
+        uploaded_file = st.file_uploader("Choose a backup file", type=['json', 'ndjson', 'gz'])
         if uploaded_file is not None:
             try:
-                import_data = json.load(uploaded_file)
+                if uploaded_file.name.endswith('.json'):
+                    import_data = json.load(uploaded_file)
+                    import_calls = iter(import_data.pop('call_history', []))
+                else:
+                    # NDJSON backups: metadata and sections are read up front, calls stream in on import
+                    import_metadata, import_sections, import_calls = read_backup(open_uploaded_backup(uploaded_file))
+                    import_data = {**import_metadata, **import_sections}
                 
                 st.markdown("**Import Preview:**")
                 st.json(import_data)
@@ -2329,8 +2677,7 @@ elif st.session_state.current_page == "system_config":
                         st.session_state.agents.update(import_data['agents'])
                     if 'squads' in import_data:
                         st.session_state.squads.update(import_data['squads'])
-                    if 'call_history' in import_data:
-                        st.session_state.call_history.extend(import_data['call_history'])
+                    matrix_db.bulk_upsert_call_records(imported_call_record(call) for call in import_calls)
                     if 'cost_tracking' in import_data:
                         st.session_state.cost_tracking.update(import_data['cost_tracking'])
                     if 'user_preferences' in import_data:
@@ -2350,7 +2697,7 @@ elif st.session_state.current_page == "system_config":
         with col_cleanup1:
             if st.button("🗑️ Clear Call History", use_container_width=True):
                 if st.button("⚠️ Confirm Clear History", use_container_width=True):
-                    st.session_state.call_history = []
+                    matrix_db.delete_all_call_records()
                     st.success("✅ Call history cleared")
                     st.rerun()
         
@@ -2379,7 +2726,7 @@ elif st.session_state.current_page == "system_config":
         with col_sys2:
             st.write(f"**Total Agents:** {len(st.session_state.agents)}")
             st.write(f"**Total Squads:** {len(st.session_state.squads)}")
-            st.write(f"**Call History Records:** {len(st.session_state.call_history)}")
+            st.write(f"**Call History Records:** {matrix_db.count_call_records()}")
             st.write(f"**Active Connections:** {'1' if st.session_state.call_active else '0'}")
         
         # Feature status
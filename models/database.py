@@ -3,15 +3,43 @@ Enhanced Database Models for Matrix VAPI Client
 SQLAlchemy models for persistent data storage
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Boolean, JSON
+from sqlalchemy import (Column, Integer, String, Float, DateTime, Text, Boolean, JSON, Index,
+                        bindparam, case, cast, func, inspect, select, text)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from itertools import groupby, islice
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple
 import json
 
+import numpy as np
+
+from config.settings import DATABASE_CONFIG
+from utils.db_engine import create_database_engine, is_file_sqlite
+
 Base = declarative_base()
 
+# Call statuses that count as a successful connection
+SUCCESSFUL_CALL_STATUSES = ('disconnected', 'completed')
+
+# NumPy dtypes for column batches; other column types stay as object arrays
+NUMPY_DTYPES = {
+    Float: np.float64,
+    DateTime: 'datetime64[us]'
+}
+
+# SyncState key of the counter bumped on every CallRecord/Analytics/Agent write
+DATA_VERSION_KEY = "data_version"
+
+# Dialects with INSERT ... ON CONFLICT; others fall back to update-then-insert
+UPSERT_DIALECTS = {'sqlite': sqlite, 'postgresql': postgresql}
+
+# Indexes dropped by migrate_schema because a composite index now covers them
+SUPERSEDED_INDEXES = {
+    "call_records": ["ix_call_records_agent_id", "ix_call_records_agent_name", "ix_call_records_status"]
+}
+
 class Agent(Base):
     __tablename__ = "agents"
     
@@ -41,6 +69,12 @@ class Agent(Base):
 class CallRecord(Base):
     __tablename__ = "call_records"
     
+    __table_args__ = (
+        Index("ix_call_records_agent_id_created_at", "agent_id", "created_at"),
+        Index("ix_call_records_agent_name_started_at", "agent_name", "started_at"),
+        Index("ix_call_records_status_started_at", "status", "started_at"),
+    )
+    
     id = Column(String, primary_key=True)
     agent_id = Column(String, nullable=False)
     agent_name = Column(String, nullable=False)
@@ -54,9 +88,11 @@ class CallRecord(Base):
     summary = Column(Text)
     sentiment_score = Column(Float)
     quality_score = Column(Float)
-    started_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=False, index=True)
     ended_at = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Data version of the row's last insert or update: grows in commit order, a watermark for incremental readers
+    write_version = Column(Integer, index=True, server_default=text('0'))
     metadata = Column(JSON)
 
 class Squad(Base):
@@ -74,9 +110,13 @@ class Squad(Base):
 
 class Analytics(Base):
     __tablename__ = "analytics"
+    __table_args__ = (
+        Index("ix_analytics_metric_name_agent_id_date", "metric_name", "agent_id", "date"),
+        Index("ix_analytics_agent_id_date", "agent_id", "date"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    date = Column(DateTime, nullable=False)
+    date = Column(DateTime, nullable=False, index=True)
     agent_id = Column(String)
     metric_name = Column(String, nullable=False)
     metric_value = Column(Float, nullable=False)
@@ -85,6 +125,9 @@ class Analytics(Base):
 
 class SystemLog(Base):
     __tablename__ = "system_logs"
+    __table_args__ = (
+        Index("ix_system_logs_level_timestamp", "level", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     level = Column(String, nullable=False)
@@ -92,28 +135,164 @@ class SystemLog(Base):
     module = Column(String)
     function = Column(String)
     line_number = Column(Integer)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     metadata = Column(JSON)
 
+class SyncState(Base):
+    __tablename__ = "sync_state"
+    
+    key = Column(String, primary_key=True)
+    value = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class TranscriptEntry(Base):
+    """One utterance of a call transcript; content table of the transcript_fts search index"""
+    __tablename__ = "transcript_entries"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    call_id = Column(String, nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    role = Column(String)
+    message = Column(Text, nullable=False)
+    timestamp = Column(String)
+
+class CallRollup(Base):
+    __tablename__ = "call_rollups"
+    
+    granularity = Column(String, primary_key=True)  # "hour" or "day"
+    bucket_start = Column(DateTime, primary_key=True)
+    dimension = Column(String, primary_key=True)  # "agent" or "category"
+    dimension_value = Column(String, primary_key=True)
+    call_count = Column(Integer, default=0)
+    completed_calls = Column(Integer, default=0)
+    duration_sum = Column(Float, default=0.0)
+    duration_sumsq = Column(Float, default=0.0)
+    cost_sum = Column(Float, default=0.0)
+    cost_sumsq = Column(Float, default=0.0)
+    quality_count = Column(Integer, default=0)
+    quality_sum = Column(Float, default=0.0)
+    quality_sumsq = Column(Float, default=0.0)
+    sentiment_count = Column(Integer, default=0)
+    sentiment_sum = Column(Float, default=0.0)
+    sentiment_sumsq = Column(Float, default=0.0)
+    # Quality score histogram, one count per QUALITY_BINS entry
+    quality_poor = Column(Integer, default=0)
+    quality_fair = Column(Integer, default=0)
+    quality_good = Column(Integer, default=0)
+    quality_very_good = Column(Integer, default=0)
+    quality_excellent = Column(Integer, default=0)
+    # Per-call cost / (duration * quality_score), for calls where it is finite
+    efficiency_count = Column(Integer, default=0)
+    efficiency_sum = Column(Float, default=0.0)
+
+# Call record columns that feed the rollups
+ROLLUP_SOURCE_COLUMNS = ('agent_id', 'agent_name', 'status', 'started_at', 'duration', 'cost',
+                         'quality_score', 'sentiment_score')
+ROLLUP_MEASURES = ('call_count', 'completed_calls', 'duration_sum', 'duration_sumsq', 'cost_sum', 'cost_sumsq',
+                   'quality_count', 'quality_sum', 'quality_sumsq',
+                   'sentiment_count', 'sentiment_sum', 'sentiment_sumsq',
+                   'quality_poor', 'quality_fair', 'quality_good', 'quality_very_good', 'quality_excellent',
+                   'efficiency_count', 'efficiency_sum')
+# (label, upper bound, rollup measure) of the quality score bins; each bin is (previous bound, bound]
+QUALITY_BINS = (('Poor', 2, 'quality_poor'), ('Fair', 4, 'quality_fair'), ('Good', 6, 'quality_good'),
+                ('Very Good', 8, 'quality_very_good'), ('Excellent', 10, 'quality_excellent'))
+ROLLUP_GRANULARITIES = {
+    'hour': lambda moment: moment.replace(minute=0, second=0, microsecond=0),
+    'day': lambda moment: moment.replace(hour=0, minute=0, second=0, microsecond=0)
+}
+
+def rollup_contribution(call: Dict[str, Any]) -> List[float]:
+    """A call record's contribution to each rollup measure, in ROLLUP_MEASURES order"""
+    duration = call.get('duration') or 0.0
+    cost = call.get('cost') or 0.0
+    contribution = [1, 1 if call.get('status') == 'completed' else 0,
+                    duration, duration * duration, cost, cost * cost]
+    quality = call.get('quality_score')
+    for score in (quality, call.get('sentiment_score')):
+        contribution += [0, 0.0, 0.0] if score is None else [1, score, score * score]
+    lower = 0
+    for _, upper, _ in QUALITY_BINS:
+        contribution.append(1 if quality is not None and lower < quality <= upper else 0)
+        lower = upper
+    efficient = call.get('cost') is not None and quality and call.get('duration')
+    contribution += [1, call['cost'] / (call['duration'] * quality)] if efficient else [0, 0.0]
+    return contribution
+
 # Database Manager
 class DatabaseManager:
     def __init__(self, database_url: str = "sqlite:///matrix_vapi.db"):
-        self.engine = create_engine(database_url, echo=False)
+        self.engine = create_database_engine(database_url)
+        # WAL lets file-backed SQLite serve reads from a separate pool while the writer commits
+        if is_file_sqlite(database_url):
+            self.read_engine = create_database_engine(database_url, read_only=True)
+        else:
+            self.read_engine = self.engine
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.read_engine)
+        # In-process observers of committed call record writes, and the columns they need
+        self._call_listeners: List[Callable[[Optional[List[Dict[str, Any]]]], None]] = []
+        self._call_listener_columns = {'id'}
         self.create_tables()
     
     def create_tables(self):
         """Create all database tables"""
+        inspector = inspect(self.engine)
+        existing_tables = set(inspector.get_table_names())
+        rollup_columns = ({column['name'] for column in inspector.get_columns(CallRollup.__tablename__)}
+                          if CallRollup.__tablename__ in existing_tables else set())
         Base.metadata.create_all(bind=self.engine)
+        self.migrate_schema()
+        # Backfill rollups the first time an existing database gains the table or a measure
+        if CallRecord.__tablename__ in existing_tables and not set(ROLLUP_MEASURES) <= rollup_columns:
+            self.rebuild_rollups()
+    
+    def migrate_schema(self) -> List[str]:
+        """Upgrade the columns and indexes of an existing database in place, returning the indexes created"""
+        inspector = inspect(self.engine)
+        existing = {table: {index['name'] for index in inspector.get_indexes(table)}
+                    for table in Base.metadata.tables}
+        existing_columns = {table: {column['name'] for column in inspector.get_columns(table)}
+                            for table in Base.metadata.tables}
+        created = []
+        with self.engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                for column in table.columns:
+                    if column.name not in existing_columns[table.name]:
+                        column_type = column.type.compile(dialect=self.engine.dialect)
+                        default = f" DEFAULT {column.server_default.arg}" if column.server_default is not None else ""
+                        connection.execute(text(
+                            f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}{default}"))
+                for index_name in SUPERSEDED_INDEXES.get(table.name, []):
+                    if index_name in existing[table.name]:
+                        connection.execute(text(f"DROP INDEX {index_name}"))
+                for index in table.indexes:
+                    if index.name not in existing[table.name]:
+                        index.create(connection)
+                        created.append(index.name)
+            # Refresh planner statistics so the new indexes get picked up
+            if created and self.engine.dialect.name == "sqlite":
+                connection.execute(text("ANALYZE"))
+        if created and self.read_engine is not self.engine:
+            # Pooled readers keep planning against the schema they opened with
+            self.read_engine.dispose()
+        return created
     
     def get_session(self) -> Session:
         """Get database session"""
         return self.SessionLocal()
     
+    def get_read_session(self) -> Session:
+        """Get read-only database session"""
+        return self.ReadSessionLocal()
+    
     def close_session(self, session: Session):
         """Close database session"""
         session.close()
     
+    def _upsert_dialect(self):
+        """Dialect module providing insert().on_conflict_do_update(), or None"""
+        return UPSERT_DIALECTS.get(self.engine.dialect.name)
+    
     # Agent operations
     def create_agent(self, agent_data: Dict[str, Any]) -> Optional[Agent]:
         """Create new agent record"""
@@ -121,6 +300,7 @@ class DatabaseManager:
         try:
             agent = Agent(**agent_data)
             session.add(agent)
+            self._bump_data_version(session)
             session.commit()
             session.refresh(agent)
             return agent
@@ -132,7 +312,7 @@ class DatabaseManager:
     
     def get_agent(self, agent_id: str) -> Optional[Agent]:
         """Get agent by ID"""
-        session = self.get_session()
+        session = self.get_read_session()
         try:
             return session.query(Agent).filter(Agent.id == agent_id).first()
         finally:
@@ -140,7 +320,7 @@ class DatabaseManager:
     
     def get_all_agents(self) -> List[Agent]:
         """Get all agents"""
-        session = self.get_session()
+        session = self.get_read_session()
         try:
             return session.query(Agent).all()
         finally:
@@ -155,6 +335,7 @@ class DatabaseManager:
                 for key, value in update_data.items():
                     setattr(agent, key, value)
                 agent.last_updated = datetime.utcnow()
+                self._bump_data_version(session)
                 session.commit()
                 session.refresh(agent)
             return agent
@@ -171,6 +352,7 @@ class DatabaseManager:
             agent = session.query(Agent).filter(Agent.id == agent_id).first()
             if agent:
                 session.delete(agent)
+                self._bump_data_version(session)
                 session.commit()
                 return True
             return False
@@ -185,20 +367,25 @@ class DatabaseManager:
         """Create new call record"""
         session = self.get_session()
         try:
-            call_record = CallRecord(**call_data)
+            call_record = CallRecord(**{**call_data, 'write_version': self._bump_data_version(session)})
             session.add(call_record)
+            self._update_rollups(session, [call_data])
+            session.flush()
+            # Detached before commit so the record stays readable without a refresh round trip
+            session.expunge(call_record)
             session.commit()
-            session.refresh(call_record)
-            return call_record
         except Exception as e:
             session.rollback()
             raise e
         finally:
             self.close_session(session)
+        # Listeners may write (e.g. the transcript index), so the writer connection must be released first
+        self._notify_call_listeners([call_data])
+        return call_record
     
     def get_call_records(self, limit: int = 100, agent_id: str = None) -> List[CallRecord]:
         """Get call records with optional filtering"""
-        session = self.get_session()
+        session = self.get_read_session()
         try:
             query = session.query(CallRecord)
             if agent_id:
@@ -207,6 +394,454 @@ class DatabaseManager:
         finally:
             self.close_session(session)
     
+    def update_call_record(self, call_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update fields of a call record"""
+        session = self.get_session()
+        try:
+            self._update_rollups(session, [{**update_data, 'id': call_id}])
+            updated = session.query(CallRecord).filter(CallRecord.id == call_id).update(
+                {**update_data, 'write_version': self._bump_data_version(session)})
+            if updated:
+                session.commit()
+            else:
+                session.rollback()
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            self.close_session(session)
+        if updated:
+            self._notify_call_listeners([{**update_data, 'id': call_id}])
+        return updated > 0
+    
+    def delete_all_call_records(self) -> int:
+        """Delete every call record"""
+        session = self.get_session()
+        try:
+            deleted = session.query(CallRecord).delete()
+            session.query(CallRollup).delete()
+            self._bump_data_version(session)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            self.close_session(session)
+        self._notify_call_listeners(None)
+        return deleted
+    
+    def get_call_records_by_ids(self, call_ids: List[str]) -> List[Dict[str, Any]]:
+        """Call records as plain dicts, in the order of call_ids"""
+        if not call_ids:
+            return []
+        session = self.get_read_session()
+        try:
+            records = session.query(CallRecord).filter(CallRecord.id.in_(call_ids)).all()
+            by_id = {record.id: self._call_record_to_dict(record) for record in records}
+            return [by_id[call_id] for call_id in call_ids if call_id in by_id]
+        finally:
+            self.close_session(session)
+    
+    def add_call_listener(self, listener: Callable[[Optional[List[Dict[str, Any]]]], None], columns: Iterable[str]):
+        """Call listener after each committed call record write.
+
+        It receives the written rows projected onto columns (plus id), or None
+        after every call record was deleted. Writes from other processes are not seen.
+        """
+        self._call_listener_columns.update(columns)
+        self._call_listeners.append(listener)
+    
+    def _project_call_changes(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not self._call_listeners:
+            return []
+        return [{column: row[column] for column in self._call_listener_columns if column in row} for row in rows]
+    
+    def _notify_call_listeners(self, changes: Optional[List[Dict[str, Any]]]):
+        if changes is not None:
+            changes = self._project_call_changes(changes)
+        for listener in self._call_listeners:
+            listener(changes)
+    
+    def _filter_call_records(self, query, status: str = None, agent_name: str = None,
+                             agent_id: str = None, start_date: datetime = None,
+                             end_date: datetime = None):
+        """Apply call history filters; each maps onto an indexed column"""
+        if status:
+            query = query.filter(CallRecord.status == status)
+        if agent_name:
+            query = query.filter(CallRecord.agent_name == agent_name)
+        if agent_id:
+            query = query.filter(CallRecord.agent_id == agent_id)
+        if start_date:
+            query = query.filter(CallRecord.started_at >= start_date)
+        if end_date:
+            query = query.filter(CallRecord.started_at < end_date)
+        return query
+    
+    @staticmethod
+    def _call_record_to_dict(call_record: CallRecord) -> Dict[str, Any]:
+        return {column.name: getattr(call_record, column.key) for column in CallRecord.__table__.columns}
+    
+    def query_call_history(self, newest_first: bool = True, limit: int = None, offset: int = 0,
+                           **filters) -> List[Dict[str, Any]]:
+        """Filtered, sorted call history as plain dicts"""
+        session = self.get_read_session()
+        try:
+            query = self._filter_call_records(session.query(CallRecord), **filters)
+            order = CallRecord.started_at.desc() if newest_first else CallRecord.started_at.asc()
+            query = query.order_by(order).offset(offset)
+            if limit:
+                query = query.limit(limit)
+            return [self._call_record_to_dict(call_record) for call_record in query]
+        finally:
+            self.close_session(session)
+    
+    def count_call_records(self, **filters) -> int:
+        """Count call records matching the filters"""
+        session = self.get_read_session()
+        try:
+            return self._filter_call_records(session.query(func.count(CallRecord.id)), **filters).scalar()
+        finally:
+            self.close_session(session)
+    
+    def call_summary(self, **filters) -> Dict[str, Any]:
+        """Totals across the filtered call history"""
+        session = self.get_read_session()
+        try:
+            query = session.query(
+                func.count(CallRecord.id),
+                func.coalesce(func.sum(CallRecord.duration), 0.0),
+                func.coalesce(func.avg(CallRecord.duration), 0.0),
+                func.coalesce(func.sum(CallRecord.cost), 0.0)
+            )
+            total_calls, total_duration, avg_duration, total_cost = self._filter_call_records(query, **filters).one()
+            return {
+                'total_calls': total_calls,
+                'total_duration': total_duration,
+                'avg_duration': avg_duration,
+                'total_cost': total_cost
+            }
+        finally:
+            self.close_session(session)
+    
+    def call_stats_by_agent(self, **filters) -> List[Dict[str, Any]]:
+        """Per-agent call counts, successes, duration and cost"""
+        session = self.get_read_session()
+        try:
+            successful = case((CallRecord.status.in_(SUCCESSFUL_CALL_STATUSES), 1), else_=0)
+            query = session.query(
+                CallRecord.agent_name,
+                func.count(CallRecord.id),
+                func.sum(successful),
+                func.coalesce(func.sum(CallRecord.duration), 0.0),
+                func.coalesce(func.sum(CallRecord.cost), 0.0)
+            )
+            query = self._filter_call_records(query, **filters).group_by(CallRecord.agent_name)
+            return [{
+                'agent_name': agent_name,
+                'total_calls': total_calls,
+                'successful_calls': successful_calls,
+                'total_duration': total_duration,
+                'total_cost': total_cost
+            } for agent_name, total_calls, successful_calls, total_duration, total_cost in query]
+        finally:
+            self.close_session(session)
+    
+    def daily_call_stats(self, **filters) -> List[Dict[str, Any]]:
+        """Call count and cost per day, oldest first"""
+        session = self.get_read_session()
+        try:
+            day = func.date(CallRecord.started_at)
+            query = session.query(day, func.count(CallRecord.id), func.coalesce(func.sum(CallRecord.cost), 0.0))
+            query = self._filter_call_records(query, **filters).group_by(day).order_by(day)
+            return [{'date': date, 'calls': calls, 'cost': cost} for date, calls, cost in query]
+        finally:
+            self.close_session(session)
+    
+    def bulk_upsert_call_records(self, records: Iterable[Dict[str, Any]], chunk_size: int = None) -> int:
+        """Insert or update many call records in a single transaction.
+
+        Rows missing NOT NULL columns (e.g. just id and transcript) only update existing records.
+        """
+        write_versions = []
+        
+        def before_chunk(session: Session, chunk: List[Dict[str, Any]]):
+            self._update_rollups(session, chunk)
+            # Stamped on copies, so the caller's rows are left as they were
+            write_version = self._bump_data_version(session)
+            chunk[:] = [{**row, 'write_version': write_version} for row in chunk]
+            write_versions.append(write_version)
+        
+        written = self._bulk_write(CallRecord.__table__, records, upsert=True, chunk_size=chunk_size,
+                                   before_chunk=before_chunk)
+        # The transaction held the version counter, so its versions belong to these rows alone: read them
+        # back in batches rather than holding every change of the import in memory
+        if write_versions and self._call_listeners:
+            for changes in self._written_call_changes(write_versions[0], write_versions[-1]):
+                self._notify_call_listeners(changes)
+        return written
+    
+    def _written_call_changes(self, first_version: int, last_version: int,
+                              batch_size: int = None) -> Iterator[List[Dict[str, Any]]]:
+        """Listened-to columns of the calls written with versions first_version..last_version, in batches"""
+        batch_size = batch_size or DATABASE_CONFIG.get('stream_batch_size', 1000)
+        names = sorted(self._call_listener_columns)
+        rows = self._stream(lambda session: session.query(*self._columns(CallRecord, names)).filter(
+            CallRecord.write_version.between(first_version, last_version)).order_by(CallRecord.write_version),
+            batch_size)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield [dict(zip(names, row)) for row in batch]
+    
+    # Bulk operations
+    def _bulk_write(self, table, rows: Iterable[Dict[str, Any]], upsert: bool = False,
+                    chunk_size: int = None,
+                    before_chunk: Callable[[Session, List[Dict[str, Any]]], None] = None) -> int:
+        """Write rows with chunked executemany inserts (on conflict update) in one transaction.
+
+        Dialects without ON CONFLICT upsert row by row instead: update the row if it exists, insert it otherwise.
+        """
+        chunk_size = chunk_size or DATABASE_CONFIG.get('bulk_chunk_size', 1000)
+        dialect = self._upsert_dialect() if upsert else None
+        primary_key = [column.name for column in table.primary_key.columns]
+        
+        session = self.get_session()
+        written = 0
+        try:
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    if before_chunk:
+                        before_chunk(session, chunk)
+                    written += self._execute_chunk(session, table, chunk, upsert, dialect, primary_key)
+                    chunk = []
+            if chunk:
+                if before_chunk:
+                    before_chunk(session, chunk)
+                written += self._execute_chunk(session, table, chunk, upsert, dialect, primary_key)
+            session.commit()
+            return written
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            self.close_session(session)
+    
+    @staticmethod
+    def _execute_chunk(session: Session, table, chunk: List[Dict[str, Any]], upsert: bool, dialect,
+                       primary_key: List[str]) -> int:
+        # executemany needs one parameter shape, and an upsert must only overwrite the columns it was given.
+        # Only consecutive rows of one shape are batched, so a key written twice keeps its last row.
+        required = {column.name for column in table.columns
+                    if not column.nullable and column.default is None and not column.primary_key}
+        for columns, group in groupby(chunk, key=lambda row: sorted(row)):
+            group = list(group)
+            missing_key = [key for key in primary_key if key not in columns]
+            partial = not required.issubset(columns)
+            if upsert and missing_key and partial:
+                raise ValueError(f"Partial {table.name} rows need their primary key: {missing_key}")
+            if not upsert or (missing_key and dialect is None):
+                # Rows without a key (e.g. autoincrement ids) cannot conflict with existing ones
+                session.execute(table.insert(), group)
+                continue
+            updated_columns = [column for column in columns if column not in primary_key]
+            if partial or dialect is None:
+                key_matches = [table.c[key] == bindparam(f'key_{key}') for key in primary_key]
+                params = [{**{f'key_{key}': row[key] for key in primary_key},
+                           **{column: row[column] for column in updated_columns}} for row in group]
+                if partial:
+                    # Rows without every NOT NULL column cannot be inserted, so they only update existing records
+                    session.execute(table.update().where(*key_matches), params)
+                    continue
+                # Without ON CONFLICT, look each key up, then update or insert
+                existing = select(*(table.c[key] for key in primary_key)).where(*key_matches)
+                for row, row_params in zip(group, params):
+                    key_params = {f'key_{key}': row[key] for key in primary_key}
+                    if session.execute(existing, key_params).first() is None:
+                        session.execute(table.insert(), row)
+                    elif updated_columns:
+                        session.execute(table.update().where(*key_matches), row_params)
+                continue
+            statement = dialect.insert(table)
+            updates = {column: statement.excluded[column] for column in updated_columns}
+            if updates:
+                statement = statement.on_conflict_do_update(index_elements=primary_key, set_=updates)
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=primary_key)
+            session.execute(statement, group)
+        return len(chunk)
+    
+    def bulk_upsert_agents(self, agents: Iterable[Dict[str, Any]], chunk_size: int = None) -> int:
+        """Insert or update many agents in a single transaction"""
+        return self._bulk_write(Agent.__table__, agents, upsert=True, chunk_size=chunk_size,
+                                before_chunk=lambda session, chunk: self._bump_data_version(session))
+    
+    def bulk_record_metrics(self, metrics: Iterable[Dict[str, Any]], chunk_size: int = None) -> int:
+        """Record many analytics metrics in a single transaction"""
+        return self._bulk_write(Analytics.__table__, metrics, chunk_size=chunk_size,
+                                before_chunk=lambda session, chunk: self._bump_data_version(session))
+    
+    # Rollup operations
+    def _update_rollups(self, session: Session, changes: List[Dict[str, Any]]):
+        """Apply the rollup deltas of inserting or updating call records, before the write itself"""
+        changes = [change for change in changes if any(column in change for column in ROLLUP_SOURCE_COLUMNS)]
+        if not changes:
+            return
+        ids = [change['id'] for change in changes if change.get('id')]
+        current = {}
+        if ids:
+            columns = self._columns(CallRecord, ['id'] + list(ROLLUP_SOURCE_COLUMNS))
+            for row in session.query(*columns).filter(CallRecord.id.in_(ids)):
+                current[row.id] = dict(row._mapping)
+        
+        # Categories of just the agents these calls belong to, before and after the write
+        agent_ids = {change.get('agent_id') for change in changes} | {row['agent_id'] for row in current.values()}
+        agent_ids.discard(None)
+        categories = dict(session.query(Agent.id, Agent.category).filter(Agent.id.in_(agent_ids))) if agent_ids else {}
+        deltas: Dict[Tuple, List[float]] = {}
+        
+        def accumulate(call: Dict[str, Any], sign: int):
+            if not call.get('started_at'):
+                return
+            contribution = rollup_contribution(call)
+            dimensions = (('agent', call.get('agent_name') or 'Unknown'),
+                          ('category', categories.get(call.get('agent_id'), 'Uncategorized')))
+            for granularity, bucket in ROLLUP_GRANULARITIES.items():
+                for dimension, value in dimensions:
+                    delta = deltas.setdefault((granularity, bucket(call['started_at']), dimension, value),
+                                              [0] * len(ROLLUP_MEASURES))
+                    for index, amount in enumerate(contribution):
+                        delta[index] += sign * amount
+        
+        for change in changes:
+            old = current.get(change.get('id'))
+            if old is None and 'agent_name' not in change:
+                continue  # update of a call record that does not exist
+            new = {**(old or {}), **{column: change[column] for column in ROLLUP_SOURCE_COLUMNS if column in change}}
+            if old is not None:
+                accumulate(old, -1)
+                current[change['id']] = new  # later duplicates in the same batch diff against this
+            accumulate(new, 1)
+        
+        self._apply_rollup_deltas(session, deltas)
+    
+    def _apply_rollup_deltas(self, session: Session, deltas: Dict[Tuple, List[float]]):
+        deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+        if not deltas:
+            return
+        table = CallRollup.__table__
+        primary_key = [column.name for column in table.primary_key.columns]
+        rows = [dict(zip(primary_key, key), **dict(zip(ROLLUP_MEASURES, delta))) for key, delta in deltas.items()]
+        dialect = self._upsert_dialect()
+        if dialect is None:
+            # Add to the buckets that exist, insert the others
+            for row in rows:
+                updated = session.execute(
+                    table.update().where(*(table.c[column] == row[column] for column in primary_key))
+                    .values({measure: table.c[measure] + row[measure] for measure in ROLLUP_MEASURES})
+                ).rowcount
+                if not updated:
+                    session.execute(table.insert().values(row))
+        else:
+            statement = dialect.insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=primary_key,
+                set_={measure: table.c[measure] + statement.excluded[measure] for measure in ROLLUP_MEASURES}
+            )
+            session.execute(statement, rows)
+        if any(delta[0] < 0 for delta in deltas.values()):
+            session.query(CallRollup).filter(CallRollup.call_count <= 0).delete()
+    
+    def rebuild_rollups(self) -> int:
+        """Recompute every rollup from the call records, returning the number of calls rolled up"""
+        session = self.get_session()
+        try:
+            session.query(CallRollup).delete()
+            rolled_up = 0
+            columns = self._columns(CallRecord, list(ROLLUP_SOURCE_COLUMNS))
+            batch = []
+            for row in session.query(*columns).yield_per(DATABASE_CONFIG.get('stream_batch_size', 1000)):
+                batch.append(dict(row._mapping))
+                if len(batch) >= DATABASE_CONFIG.get('bulk_chunk_size', 1000):
+                    self._update_rollups(session, batch)
+                    rolled_up += len(batch)
+                    batch = []
+            self._update_rollups(session, batch)
+            session.commit()
+            return rolled_up + len(batch)
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            self.close_session(session)
+    
+    def get_call_rollups(self, granularity: str, start_date: datetime, end_date: datetime,
+                         dimension: str = 'agent') -> List[Dict[str, Any]]:
+        """Rollup rows whose bucket starts inside [start_date, end_date)"""
+        session = self.get_read_session()
+        try:
+            query = session.query(CallRollup).filter(
+                CallRollup.granularity == granularity,
+                CallRollup.dimension == dimension,
+                CallRollup.bucket_start >= start_date,
+                CallRollup.bucket_start < end_date
+            ).order_by(CallRollup.bucket_start)
+            return [{column.name: getattr(rollup, column.key) for column in CallRollup.__table__.columns}
+                    for rollup in query]
+        finally:
+            self.close_session(session)
+    
+    # Sync state operations
+    def get_sync_state(self, key: str) -> Optional[str]:
+        """Get a stored sync cursor or high-water mark"""
+        session = self.get_read_session()
+        try:
+            state = session.query(SyncState).filter(SyncState.key == key).first()
+            return state.value if state else None
+        finally:
+            self.close_session(session)
+    
+    def _bump_data_version(self, session: Session) -> int:
+        """Advance the data version inside the caller's write transaction and return the new version.
+
+        The counter row stays locked until commit, so versions are handed out in commit order.
+        """
+        table = SyncState.__table__
+        now = datetime.utcnow()
+        dialect = self._upsert_dialect()
+        if dialect is None:
+            updated = session.execute(table.update().where(table.c.key == DATA_VERSION_KEY).values(
+                value=cast(cast(table.c.value, Integer) + 1, String), updated_at=now)).rowcount
+            if not updated:
+                session.execute(table.insert().values(key=DATA_VERSION_KEY, value='1', updated_at=now))
+        else:
+            statement = dialect.insert(table).values(key=DATA_VERSION_KEY, value='1', updated_at=now)
+            session.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.key],
+                set_={'value': cast(cast(table.c.value, Integer) + 1, String),
+                      'updated_at': statement.excluded.updated_at}
+            ))
+        return int(session.query(SyncState.value).filter(SyncState.key == DATA_VERSION_KEY).scalar())
+    
+    def get_data_version(self) -> int:
+        """Counter that changes whenever call records, analytics metrics or agents change"""
+        return int(self.get_sync_state(DATA_VERSION_KEY) or 0)
+    
+    def set_sync_state(self, key: str, value: str):
+        """Store a sync cursor or high-water mark"""
+        session = self.get_session()
+        try:
+            session.merge(SyncState(key=key, value=value, updated_at=datetime.utcnow()))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            self.close_session(session)
+    
     # Analytics operations
     def record_metric(self, date: datetime, agent_id: str, metric_name: str, 
                      metric_value: float, metadata: Dict = None):
@@ -221,6 +856,7 @@ class DatabaseManager:
                 metadata=metadata
             )
             session.add(analytics)
+            self._bump_data_version(session)
             session.commit()
         except Exception as e:
             session.rollback()
@@ -231,16 +867,128 @@ class DatabaseManager:
     def get_metrics(self, start_date: datetime, end_date: datetime, 
                    agent_id: str = None, metric_name: str = None) -> List[Analytics]:
         """Get analytics metrics with filtering"""
-        session = self.get_session()
+        session = self.get_read_session()
         try:
-            query = session.query(Analytics).filter(
-                Analytics.date >= start_date,
-                Analytics.date <= end_date
-            )
-            if agent_id:
-                query = query.filter(Analytics.agent_id == agent_id)
-            if metric_name:
-                query = query.filter(Analytics.metric_name == metric_name)
+            query = self._filter_metrics(session.query(Analytics), start_date, end_date, agent_id, metric_name)
             return query.order_by(Analytics.date.desc()).all()
         finally:
             self.close_session(session)
+    
+    def _filter_metrics(self, query, start_date: datetime, end_date: datetime,
+                        agent_id: str = None, metric_name: str = None):
+        """Apply the analytics window and optional agent/metric filters"""
+        query = query.filter(
+            Analytics.date >= start_date,
+            Analytics.date <= end_date
+        )
+        if agent_id:
+            query = query.filter(Analytics.agent_id == agent_id)
+        if metric_name:
+            query = query.filter(Analytics.metric_name == metric_name)
+        return query
+    
+    # Streaming operations
+    def _stream(self, build_query: Callable[[Session], Any], batch_size: int = None) -> Iterator[Any]:
+        """Yield query results in batches of batch_size from an open read session"""
+        batch_size = batch_size or DATABASE_CONFIG.get('stream_batch_size', 1000)
+        session = self.get_read_session()
+        try:
+            yield from build_query(session).yield_per(batch_size)
+        finally:
+            self.close_session(session)
+    
+    @staticmethod
+    def _columns(model, names: List[str]) -> List[Column]:
+        return [model.__table__.columns[name] for name in names]
+    
+    def _column_batches(self, model, names: List[str], rows: Iterator[Tuple], batch_size: int = None,
+                        as_arrow: bool = False) -> Iterator[Any]:
+        """Group projected rows into column batches: dicts of NumPy arrays, or Arrow record batches"""
+        if as_arrow:
+            try:
+                import pyarrow
+            except ImportError:
+                raise ImportError("pyarrow is required for Arrow batches: pip install pyarrow")
+        batch_size = batch_size or DATABASE_CONFIG.get('stream_batch_size', 1000)
+        dtypes = [NUMPY_DTYPES.get(type(column.type), object) for column in self._columns(model, names)]
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            values = list(zip(*batch))
+            if as_arrow:
+                yield pyarrow.RecordBatch.from_pydict(dict(zip(names, map(list, values))))
+            else:
+                yield {name: np.array(column, dtype=dtype) for name, column, dtype in zip(names, values, dtypes)}
+    
+    def iter_agents(self, batch_size: int = None) -> Iterator[Agent]:
+        """Stream all agents"""
+        return self._stream(lambda session: session.query(Agent), batch_size)
+    
+    def iter_call_records(self, batch_size: int = None, **filters) -> Iterator[CallRecord]:
+        """Stream call records matching the filters, oldest first"""
+        return self._stream(lambda session: self._filter_call_records(
+            session.query(CallRecord), **filters).order_by(CallRecord.started_at), batch_size)
+    
+    def iter_metrics(self, start_date: datetime, end_date: datetime, agent_id: str = None,
+                     metric_name: str = None, batch_size: int = None) -> Iterator[Analytics]:
+        """Stream analytics metrics in the window, oldest first"""
+        return self._stream(lambda session: self._filter_metrics(
+            session.query(Analytics), start_date, end_date, agent_id, metric_name).order_by(Analytics.date), batch_size)
+    
+    def iter_call_record_rows(self, columns: List[str], batch_size: int = None, newest_first: bool = False,
+                              limit: int = None, **filters) -> Iterator[Tuple]:
+        """Stream (column, ...) tuples of call records matching the filters, oldest first unless newest_first"""
+        order = CallRecord.started_at.desc() if newest_first else CallRecord.started_at.asc()
+        return self._stream(lambda session: self._filter_call_records(
+            session.query(*self._columns(CallRecord, columns)), **filters).order_by(order).limit(limit), batch_size)
+    
+    def iter_calls_missing_artifacts(self, batch_size: int = None, **filters) -> Iterator[Tuple]:
+        """Stream (id, status, transcript missing, recording missing) of filtered calls lacking either artifact.
+
+        Presence is tested in SQL, so transcripts are never read.
+        """
+        transcript_missing = CallRecord.transcript.is_(None)
+        recording_missing = CallRecord.recording_url.is_(None) | (CallRecord.recording_url == '')
+        return self._stream(lambda session: self._filter_call_records(
+            session.query(CallRecord.id, CallRecord.status, transcript_missing, recording_missing), **filters
+        ).filter(transcript_missing | recording_missing).order_by(CallRecord.started_at), batch_size)
+    
+    def iter_metric_rows(self, columns: List[str], start_date: datetime, end_date: datetime,
+                         agent_id: str = None, metric_name: str = None, batch_size: int = None) -> Iterator[Tuple]:
+        """Stream (column, ...) tuples of analytics metrics in the window, oldest first"""
+        return self._stream(lambda session: self._filter_metrics(
+            session.query(*self._columns(Analytics, columns)), start_date, end_date, agent_id, metric_name
+        ).order_by(Analytics.date), batch_size)
+    
+    def call_record_batches(self, columns: List[str], batch_size: int = None, as_arrow: bool = False,
+                            newest_first: bool = False, limit: int = None, **filters) -> Iterator[Any]:
+        """Stream call record columns as NumPy (or Arrow) batches"""
+        rows = self.iter_call_record_rows(columns, batch_size, newest_first, limit, **filters)
+        return self._column_batches(CallRecord, columns, rows, batch_size, as_arrow)
+    
+    def call_record_batches_written_after(self, columns: List[str], after: Optional[int] = None,
+                                          batch_size: int = None) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+        """(write version of the batch's newest row, column batch) of calls inserted or updated after write
+        version `after` (every call when None), in write order"""
+        batch_size = batch_size or DATABASE_CONFIG.get('stream_batch_size', 1000)
+
+        def build_query(session):
+            query = session.query(CallRecord.write_version, *self._columns(CallRecord, columns))
+            if after is not None:
+                query = query.filter(CallRecord.write_version > after)
+            return query.order_by(CallRecord.write_version)
+
+        rows = self._stream(build_query, batch_size)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch[-1][0] or 0, next(self._column_batches(CallRecord, columns, (row[1:] for row in batch), len(batch)))
+    
+    def metric_batches(self, columns: List[str], start_date: datetime, end_date: datetime,
+                       agent_id: str = None, metric_name: str = None, batch_size: int = None,
+                       as_arrow: bool = False) -> Iterator[Any]:
+        """Stream analytics metric columns as NumPy (or Arrow) batches"""
+        rows = self.iter_metric_rows(columns, start_date, end_date, agent_id, metric_name, batch_size)
+        return self._column_batches(Analytics, columns, rows, batch_size, as_arrow)
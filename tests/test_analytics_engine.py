@@ -0,0 +1,82 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.settings import CACHE_CONFIG
+from models.database import DatabaseManager
+from utils.analytics_engine import MatrixAnalyticsEngine
+from utils.call_clustering import CLUSTER_FEATURES
+from utils.report_scheduler import precompute_reports, standard_report_windows
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setitem(CACHE_CONFIG['report_cache'], 'path', str(tmp_path / 'reports'))
+    monkeypatch.setitem(CACHE_CONFIG['call_clusters'], 'path', str(tmp_path / 'call_clusters.joblib'))
+    db = DatabaseManager(f"sqlite:///{tmp_path / 'matrix.db'}")
+    db.bulk_upsert_agents([{'id': f'agent-{n}', 'name': f'Agent {n}', 'category': 'Support',
+                            'system_prompt': 'Help.', 'status': 'active'} for n in range(3)])
+    db.bulk_upsert_call_records([
+        {'id': f'call-{n}', 'agent_id': f'agent-{n % 3}', 'agent_name': f'Agent {n % 3}',
+         'status': 'completed' if n % 4 else 'failed', 'started_at': datetime(2026, 1, 1) + timedelta(minutes=97 * n),
+         'duration': 30.0 + n if n % 11 else 0.0, 'cost': 0.1 * (n % 7 + 1), 'quality_score': 3.0 + n % 7, 'sentiment_score': 0.5}
+        for n in range(60)
+    ])
+    return MatrixAnalyticsEngine(db)
+
+
+def assert_same(rollup, raw, path='report'):
+    if isinstance(rollup, dict):
+        assert {str(key) for key in rollup} == {str(key) for key in raw}, path
+        raw_by_key = {str(key): value for key, value in raw.items()}
+        for key, value in rollup.items():
+            assert_same(value, raw_by_key[str(key)], f"{path}/{key}")
+    elif isinstance(rollup, list):
+        assert len(rollup) == len(raw), path
+        for index, (left, right) in enumerate(zip(rollup, raw)):
+            assert_same(left, right, f"{path}[{index}]")
+    elif isinstance(rollup, (int, float)) and not isinstance(rollup, bool):
+        assert (math.isnan(rollup) and math.isnan(raw)) or rollup == pytest.approx(raw, rel=1e-4), path
+    else:
+        assert rollup == raw, path
+
+
+def test_rollup_report_matches_the_raw_call_report(engine):
+    start, end = datetime(2026, 1, 1, 3), datetime(2026, 1, 4, 5)
+    rollup_report = engine.generate_comprehensive_report(start, end)
+    # Off the hour, the same window is served from the call rows
+    raw_report = engine.generate_comprehensive_report(start, end + timedelta(seconds=1))
+
+    assert rollup_report['overview']['total_calls'] > 0
+    assert rollup_report['cost_analysis']['most_efficient_agents']
+    assert sum(rollup_report['quality_metrics']['quality_distribution'].values()) > 0
+    assert_same(rollup_report, raw_report)
+
+
+def test_page_windows_are_served_from_the_scheduler_precompute(engine, monkeypatch):
+    now = datetime(2026, 1, 4, 5, 30)
+    monkeypatch.setattr('utils.report_scheduler.standard_report_windows',
+                        lambda agent_ids: standard_report_windows(agent_ids, now))
+    precompute_reports(engine)
+
+    # A page process shares only the on-disk store with the scheduler
+    page_engine = MatrixAnalyticsEngine(engine.db)
+    monkeypatch.setattr(page_engine, 'generate_comprehensive_report', lambda *args: pytest.fail('recomputed'))
+    monkeypatch.setattr(page_engine, 'load_calls_frame', lambda *args, **kwargs: pytest.fail('recomputed'))
+    for start, end, filters in standard_report_windows(['agent-0', 'agent-1', 'agent-2'], now).values():
+        assert page_engine.get_report(start, end, filters)['overview']['total_calls'] > 0
+        assert page_engine.get_dashboard(start, end, filters)
+
+
+def test_rollup_report_reads_only_the_capped_clustering_sample(engine, monkeypatch):
+    monkeypatch.setitem(CACHE_CONFIG['call_clusters'], 'report_sample_size', 25)
+    reads = []
+    load_calls_frame = engine.load_calls_frame
+    monkeypatch.setattr(engine, 'load_calls_frame', lambda *args, **kwargs: reads.append(kwargs)
+                        or load_calls_frame(*args, **kwargs))
+
+    report = engine.generate_comprehensive_report(datetime(2026, 1, 1), datetime(2026, 1, 5))
+
+    assert [(read['columns'], read['limit']) for read in reads] == [(CLUSTER_FEATURES, 25)]
+    assert sum(pattern['size'] for pattern in report['predictive_insights']['call_patterns'].values()) == 25
@@ -0,0 +1,104 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from config.settings import APP_ROOT, app_path
+from utils import async_vapi_client
+from utils.artifact_store import FINAL_CALL_STATUSES, CallArtifactStore
+from utils.async_vapi_client import fetch_call_artifacts
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CallArtifactStore(root=str(tmp_path / 'artifacts'))
+
+
+def stored_files(store):
+    return sorted(entry.path for entry in store._iter_files())
+
+
+def test_relative_paths_resolve_against_the_app_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert app_path('cache/artifacts') == os.path.join(APP_ROOT, 'cache', 'artifacts')
+    assert app_path(str(tmp_path / 'artifacts')) == str(tmp_path / 'artifacts')
+    assert CallArtifactStore(root=str(tmp_path / 'artifacts')).root == tmp_path / 'artifacts'
+
+
+def test_artifacts_round_trip_through_gzip(store):
+    transcript = {'messages': [{'role': 'assistant', 'message': 'héllo ' * 200}]}
+    store.put('call-1', 'transcript', transcript)
+
+    [path] = stored_files(store)
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        assert json.load(handle) == transcript
+    assert os.path.getsize(path) < len(json.dumps(transcript))
+    assert store.get('call-1', 'transcript') == transcript
+    assert store.get('call-1', 'recording') is None
+
+
+def test_hit_and_miss_counters(store):
+    store.put('call-1', 'recording', 'https://example.com/1.wav')
+    store.get('call-1', 'recording')
+    store.get('call-2', 'recording')
+    store.get('call-1', 'recording')
+
+    stats = store.stats()
+    assert (stats['hits'], stats['misses']) == (2, 1)
+    assert stats['hit_rate'] == pytest.approx(200 / 3)
+
+
+def test_eviction_drops_least_recently_used_down_to_90_percent(tmp_path):
+    payload = os.urandom(1000).hex()  # incompressible, so every entry has about the same size
+    probe = CallArtifactStore(root=str(tmp_path / 'probe'))
+    probe.put('probe', 'transcript', payload)
+    entry_size = probe.stats()['size_bytes']
+
+    store = CallArtifactStore(root=str(tmp_path / 'artifacts'), max_bytes=entry_size * 10)
+    for index in range(10):
+        store.put(f'call-{index}', 'transcript', payload)
+        path = store._path(f'call-{index}', 'transcript')
+        os.utime(path, (1_000_000 + index, 1_000_000 + index))
+    # Reading the oldest entry makes it the most recently used
+    assert store.get('call-0', 'transcript') == payload
+
+    store.put('call-10', 'transcript', payload)
+
+    assert store.stats()['size_bytes'] <= store.max_bytes * 0.9
+    assert store.stats()['size_bytes'] == sum(os.path.getsize(path) for path in stored_files(store))
+    assert not store._path('call-1', 'transcript').exists()
+    assert not store._path('call-2', 'transcript').exists()
+    assert store._path('call-0', 'transcript').exists()
+    assert store._path('call-10', 'transcript').exists()
+
+
+def test_size_is_recovered_from_disk(store):
+    store.put('call-1', 'transcript', {'messages': []})
+    reopened = CallArtifactStore(root=str(store.root))
+    assert reopened.stats()['size_bytes'] == store.stats()['size_bytes']
+
+
+def test_only_final_calls_are_persisted(store, monkeypatch):
+    fetched = []
+
+    async def fetch_transcripts(client, call_ids):
+        fetched.extend(call_ids)
+        return {call_id: {'messages': [{'role': 'user', 'message': call_id}]} for call_id in call_ids}
+
+    monkeypatch.setitem(async_vapi_client.BATCH_FETCHERS, 'transcript', fetch_transcripts)
+    statuses = {'call-ended': 'ended', 'call-live': 'in-progress', 'call-queued': 'queued'}
+    final_ids = {call_id for call_id, status in statuses.items() if status in FINAL_CALL_STATUSES}
+
+    first = fetch_call_artifacts('test-key', list(statuses), 'transcript', 'http://vapi.test',
+                                 artifact_store=store, persist_ids=final_ids)
+    assert set(first) == set(statuses)
+    assert store._path('call-ended', 'transcript').exists()
+    assert not store._path('call-live', 'transcript').exists()
+    assert not store._path('call-queued', 'transcript').exists()
+
+    fetched.clear()
+    second = fetch_call_artifacts('test-key', list(statuses), 'transcript', 'http://vapi.test',
+                                  artifact_store=store, persist_ids=final_ids)
+    assert second == first
+    assert sorted(fetched) == ['call-live', 'call-queued']
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.database import DatabaseManager
+from utils.call_clustering import CallClusterModel
+
+
+def calls(first, count, created_at):
+    return [{'id': f'call-{n}', 'agent_id': 'agent-1', 'agent_name': 'Neo', 'status': 'completed',
+             'started_at': created_at, 'created_at': created_at, 'duration': 30.0 + n, 'cost': 0.1 * (n % 5 + 1),
+             'quality_score': 3.0 + n % 4, 'sentiment_score': 0.5} for n in range(first, first + count)]
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(f"sqlite:///{tmp_path / 'matrix.db'}")
+
+
+def test_update_learns_calls_inserted_later_with_older_timestamps(db, tmp_path):
+    model = CallClusterModel(path=str(tmp_path / 'clusters.joblib'), n_clusters=2)
+    db.bulk_upsert_call_records(calls(0, 10, datetime(2026, 3, 1)))
+    assert model.update(db) == 10
+
+    # An import of older calls lands after the model has seen newer ones
+    db.bulk_upsert_call_records(calls(10, 5, datetime(2026, 3, 1) - timedelta(days=30)))
+    assert model.update(db) == 5
+    assert model.update(db) == 0
+
+    # Scores filled in later are learned too
+    db.update_call_record('call-3', {'quality_score': 9.0})
+    db.bulk_upsert_call_records([{'id': 'call-4', 'sentiment_score': 0.9}])
+    assert model.update(db) == 2
+
+    # Another process picks the saved model up, watermark included
+    reloaded = CallClusterModel(path=str(tmp_path / 'clusters.joblib'), n_clusters=2)
+    assert reloaded.is_fitted and reloaded.samples_seen == 17
+    assert reloaded.update(db) == 0
+
+
+def test_refresh_picks_up_a_model_saved_by_another_process(db, tmp_path):
+    path = str(tmp_path / 'clusters.joblib')
+    reader = CallClusterModel(path=path, n_clusters=2)
+    assert not reader.refresh()
+
+    db.bulk_upsert_call_records(calls(0, 10, datetime(2026, 3, 1)))
+    CallClusterModel(path=path, n_clusters=2).update(db)
+
+    assert reader.refresh() and reader.is_fitted
+
+
+def test_existing_databases_gain_the_write_version_column(tmp_path):
+    path = tmp_path / 'matrix.db'
+    db = DatabaseManager(f"sqlite:///{path}")
+    db.bulk_upsert_call_records(calls(0, 3, datetime(2026, 3, 1)))
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_call_records_write_version")
+        connection.exec_driver_sql("ALTER TABLE call_records DROP COLUMN write_version")
+
+    migrated = DatabaseManager(f"sqlite:///{path}")
+    [(version, batch)] = migrated.call_record_batches_written_after(['duration'])
+    assert version == 0 and len(batch['duration']) == 3
+    migrated.bulk_upsert_call_records(calls(3, 2, datetime(2026, 3, 1)))
+    assert [len(batch['duration']) for _, batch in migrated.call_record_batches_written_after(['duration'], 0)] == [2]
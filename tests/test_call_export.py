@@ -0,0 +1,47 @@
+import csv
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from models.database import DatabaseManager
+from utils.call_export import CALL_COLUMNS, CallExporter, metadata_path, open_export, read_backup
+
+
+@pytest.fixture
+def exporter(tmp_path):
+    db = DatabaseManager(f"sqlite:///{tmp_path / 'matrix.db'}")
+    db.bulk_upsert_call_records([{'id': f'call-{n}', 'agent_id': 'agent-1', 'agent_name': 'Neo',
+                                  'status': 'completed', 'started_at': datetime(2026, 1, 1, 9, n)}
+                                 for n in range(3)])
+    return CallExporter(db, path=str(tmp_path / 'exports'), keep_files=1)
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_csv_export_is_plain_csv_with_a_metadata_sidecar(exporter, compress):
+    path, written = exporter.export_calls('csv', compress, metadata={'filters_applied': {'status': 'All'}})
+
+    with open_export(path) as stream:
+        rows = list(csv.reader(stream))
+    assert written == 3 and rows[0] == CALL_COLUMNS and len(rows) == 4
+    with open(metadata_path(path)) as sidecar:
+        assert json.load(sidecar)['filters_applied'] == {'status': 'All'}
+
+
+def test_ndjson_export_keeps_metadata_inline(exporter):
+    path, _ = exporter.export_calls('ndjson', metadata={'source': 'test'})
+
+    with open_export(path) as stream:
+        metadata, _, calls = read_backup(stream)
+        assert metadata['source'] == 'test' and len(list(calls)) == 3
+    assert not os.path.exists(metadata_path(path))
+
+
+def test_prune_removes_sidecars_with_their_exports(exporter):
+    first, _ = exporter.export_calls('csv', prefix='first')
+    second, _ = exporter.export_calls('csv', prefix='second')
+
+    assert sorted(os.listdir(exporter.path)) == sorted(os.path.basename(name)
+                                                        for name in (second, metadata_path(second)))
+    assert not os.path.exists(metadata_path(first))
@@ -0,0 +1,50 @@
+import random
+from datetime import datetime, timedelta
+
+from utils.call_index import CallFilterIndex
+
+STATUSES = ['completed', 'failed', 'in-progress']
+AGENTS = ['Neo', 'Trinity', 'Morpheus']
+
+
+def random_change(rng, call_id):
+    change = {'id': call_id}
+    if rng.random() < 0.7:
+        change['started_at'] = datetime(2026, 1, 1) + timedelta(minutes=rng.randrange(50))
+    if rng.random() < 0.7:
+        change['status'] = rng.choice(STATUSES)
+    if rng.random() < 0.5:
+        change['agent_name'] = rng.choice(AGENTS)
+    return change
+
+
+def test_incremental_writes_match_a_full_rebuild():
+    rng = random.Random(7)
+    index = CallFilterIndex()
+    for _ in range(40):
+        index.apply([random_change(rng, f'call-{rng.randrange(60)}') for _ in range(rng.randrange(1, 15))])
+
+    rebuilt = CallFilterIndex()
+    rebuilt._calls = dict(index._calls)
+    rebuilt._sort_all()
+    assert list(index._epochs) == sorted(index._epochs)
+    for status in [None] + STATUSES:
+        for agent_name in [None] + AGENTS:
+            window = {'status': status, 'agent_name': agent_name,
+                      'start_date': datetime(2026, 1, 1, 0, 10), 'end_date': datetime(2026, 1, 1, 0, 40)}
+            total, ids = index.query(**window)
+            assert index.count(**window) == total
+            assert sorted(ids) == sorted(rebuilt.query(**window)[1])
+
+
+def test_query_page_clamps_to_the_last_page():
+    index = CallFilterIndex()
+    index.apply([{'id': f'call-{n}', 'started_at': datetime(2026, 1, 1) + timedelta(minutes=n),
+                  'status': 'completed', 'agent_name': 'Neo'} for n in range(25)])
+
+    assert index.query_page(0, 10) == (25, 0, [f'call-{n}' for n in range(24, 14, -1)])
+    assert index.query_page(7, 10, newest_first=False) == (25, 2, [f'call-{n}' for n in range(20, 25)])
+    assert index.query_page(3, 10, status='failed') == (0, 0, [])
+
+    index.apply(None)
+    assert len(index) == 0 and index.count() == 0
@@ -0,0 +1,76 @@
+import pytest
+
+from config.settings import API_CONFIG
+from models.database import DatabaseManager
+from utils.call_sync import HIGH_WATER_MARK_KEY, CallSyncEngine
+
+
+class FakeVapiClient:
+    """Serves list_calls from an in-memory call list, honoring VAPI's filters and newest-first order"""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def list_calls(self, limit=100, created_at_gt=None, created_at_le=None, updated_at_gt=None, priority=None,
+                   created_at_lt=None):
+        calls = [call for call in self.calls
+                 if (not created_at_gt or call['createdAt'] > created_at_gt)
+                 and (not created_at_le or call['createdAt'] <= created_at_le)
+                 and (not created_at_lt or call['createdAt'] < created_at_lt)
+                 and (not updated_at_gt or call['updatedAt'] > updated_at_gt)]
+        return sorted(calls, key=lambda call: call['createdAt'], reverse=True)[:limit]
+
+
+def vapi_call(call_id, created_at, updated_at, status, **fields):
+    return {'id': call_id, 'assistantId': 'agent-1', 'createdAt': created_at, 'updatedAt': updated_at,
+            'startedAt': created_at, 'status': status, **fields}
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(f"sqlite:///{tmp_path / 'matrix.db'}")
+
+
+def test_calls_in_progress_at_sync_time_are_completed_by_a_later_sync(db):
+    client = FakeVapiClient([
+        vapi_call('call-1', '2026-01-01T09:00:00Z', '2026-01-01T09:05:00Z', 'ended', cost=0.4),
+        vapi_call('call-2', '2026-01-01T10:00:00Z', '2026-01-01T10:00:01Z', 'in-progress'),
+    ])
+    engine = CallSyncEngine(client, db)
+    assert engine.sync()['synced'] == 2
+
+    client.calls[1] = vapi_call('call-2', '2026-01-01T10:00:00Z', '2026-01-01T10:07:00Z', 'ended',
+                                endedAt='2026-01-01T10:07:00Z', cost=1.5, transcript='User: hello')
+    result = engine.sync()
+
+    assert result['synced'] == 1
+    call = {record['id']: record for record in db.query_call_history()}['call-2']
+    assert (call['status'], call['cost'], call['transcript'], call['duration']) == ('ended', 1.5, 'User: hello', 420.0)
+    assert engine.sync()['synced'] == 0
+
+
+def tied_calls(count, created_at='2026-01-01T09:00:00Z'):
+    return [vapi_call(f'tied-{n}', created_at, '2026-01-01T09:30:00Z', 'ended') for n in range(count)]
+
+
+def test_calls_sharing_a_created_at_beyond_one_page_are_all_synced(db):
+    client = FakeVapiClient(tied_calls(7) + [
+        vapi_call('newer', '2026-01-01T10:00:00Z', '2026-01-01T10:00:00Z', 'ended'),
+        vapi_call('older', '2026-01-01T08:00:00Z', '2026-01-01T08:00:00Z', 'ended'),
+    ])
+    result = CallSyncEngine(client, db, page_size=2).sync()
+
+    assert result['synced'] == 9 and db.count_call_records() == 9
+    assert result['high_water_mark'] == '2026-01-01T10:00:00Z'
+
+
+def test_high_water_mark_holds_when_a_created_at_outgrows_the_largest_page(db, monkeypatch):
+    monkeypatch.setitem(API_CONFIG, 'sync_max_page_size', 4)
+    client = FakeVapiClient(tied_calls(6) + [
+        vapi_call('older', '2026-01-01T08:00:00Z', '2026-01-01T08:00:00Z', 'ended'),
+    ])
+    result = CallSyncEngine(client, db, page_size=2).sync()
+
+    # The calls past the skipped createdAt are still synced, but the next sync starts from the old mark
+    assert {record['id'] for record in result['records']} >= {'older'}
+    assert result['high_water_mark'] is None and db.get_sync_state(HIGH_WATER_MARK_KEY) is None
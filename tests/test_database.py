@@ -0,0 +1,142 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from config.settings import DATABASE_CONFIG
+from models.database import DatabaseManager
+from utils.transcript_search import TranscriptSearchIndex
+
+
+def call_row(call_id, **overrides):
+    row = {'id': call_id, 'agent_id': 'agent-1', 'agent_name': 'Neo', 'status': 'completed',
+           'started_at': datetime(2026, 1, 1, 9, 30), 'duration': 60.0, 'cost': 0.5}
+    row.update(overrides)
+    return row
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(f"sqlite:///{tmp_path / 'matrix.db'}")
+
+
+def test_bulk_upsert_partial_rows_update_existing_calls(db):
+    db.bulk_upsert_call_records([call_row('call-1')])
+    db.bulk_upsert_call_records([{'id': 'call-1', 'transcript': 'hello'},
+                                 {'id': 'missing', 'transcript': 'ignored'},
+                                 {'id': 'call-1', 'duration': 90.0}])
+
+    [call] = db.query_call_history()
+    assert (call['id'], call['transcript'], call['duration'], call['agent_name']) == ('call-1', 'hello', 90.0, 'Neo')
+    [rollup] = db.get_call_rollups('day', datetime(2026, 1, 1), datetime(2026, 1, 2))
+    assert rollup['call_count'] == 1 and rollup['duration_sum'] == 90.0
+
+
+def test_bulk_upsert_partial_rows_need_primary_key(db):
+    with pytest.raises(ValueError):
+        db.bulk_upsert_call_records([{'transcript': 'orphan'}])
+
+
+def test_create_call_record_notifies_listeners_after_releasing_the_writer(db):
+    search_index = TranscriptSearchIndex(db)
+
+    call = db.create_call_record(call_row('call-1', transcript='User: where is the oracle'))
+
+    assert call.created_at is not None and call.agent_name == 'Neo'
+    assert [result['call_id'] for result in search_index.search('oracle')] == ['call-1']
+
+
+def test_agent_writes_bump_the_data_version(db):
+    agent = {'id': 'agent-1', 'name': 'Neo', 'category': 'Operator', 'system_prompt': 'You are the one'}
+    versions = [db.get_data_version()]
+    db.create_agent(agent)
+    versions.append(db.get_data_version())
+    db.update_agent('agent-1', {'status': 'inactive'})
+    versions.append(db.get_data_version())
+    db.bulk_upsert_agents([{**agent, 'name': 'Thomas Anderson'}])
+    versions.append(db.get_data_version())
+    db.delete_agent('agent-1')
+    versions.append(db.get_data_version())
+
+    assert versions == sorted(set(versions))
+
+
+def test_writes_without_on_conflict_support_update_then_insert(db, monkeypatch):
+    monkeypatch.setattr(db, '_upsert_dialect', lambda: None)
+
+    db.create_call_record(call_row('call-1'))
+    db.create_call_record(call_row('call-2', duration=30.0))
+    db.update_call_record('call-1', {'duration': 90.0})
+    db.record_metric(datetime(2026, 1, 1), 'agent-1', 'calls', 2.0)
+
+    assert db.get_data_version() == 4
+    [rollup] = db.get_call_rollups('day', datetime(2026, 1, 1), datetime(2026, 1, 2))
+    assert rollup['call_count'] == 2 and rollup['duration_sum'] == 120.0
+
+
+@pytest.mark.parametrize('on_conflict', [True, False])
+def test_bulk_upsert_keeps_the_last_write_of_a_repeated_call(db, monkeypatch, on_conflict):
+    if not on_conflict:
+        monkeypatch.setattr(db, '_upsert_dialect', lambda: None)
+    db.bulk_upsert_call_records([call_row('call-1'), call_row('call-2')])
+
+    # A partial row then a full row for call-1, and the reverse for call-2; column names sort either way
+    db.bulk_upsert_call_records([{'id': 'call-1', 'summary': 'partial'}, call_row('call-1', summary='full'),
+                                 call_row('call-2', summary='full'), {'id': 'call-2', 'summary': 'partial'},
+                                 call_row('call-3', duration=15.0)])
+
+    calls = {call['id']: call for call in db.query_call_history()}
+    assert (calls['call-1']['summary'], calls['call-2']['summary']) == ('full', 'partial')
+    assert calls['call-3']['duration'] == 15.0
+    [rollup] = db.get_call_rollups('day', datetime(2026, 1, 1), datetime(2026, 1, 2))
+    assert rollup['call_count'] == 3
+
+
+def test_bulk_upsert_notifies_listeners_in_bounded_batches(db, monkeypatch):
+    monkeypatch.setitem(DATABASE_CONFIG, 'stream_batch_size', 4)
+    notified = []
+    db.add_call_listener(notified.append, ['status'])
+
+    db.bulk_upsert_call_records([call_row(f'call-{n}') for n in range(10)], chunk_size=3)
+    db.bulk_upsert_call_records([{'id': 'call-2', 'status': 'failed'}])
+
+    assert [len(changes) for changes in notified] == [4, 4, 2, 1]
+    assert notified[-1] == [{'id': 'call-2', 'status': 'failed'}]
+    assert sorted(change['id'] for changes in notified[:3] for change in changes) == sorted(
+        f'call-{n}' for n in range(10))
+
+
+def test_call_record_batches_are_typed_across_chunk_boundaries(db):
+    db.bulk_upsert_call_records([call_row(f'call-{n}', started_at=datetime(2026, 1, 1, 9, n),
+                                          duration=None if n == 4 else 10.0 * n) for n in range(7)])
+
+    batches = list(db.call_record_batches(['id', 'started_at', 'duration'], batch_size=3))
+
+    assert [len(batch['id']) for batch in batches] == [3, 3, 1]
+    for batch in batches:
+        assert batch['id'].dtype == object
+        assert batch['started_at'].dtype == np.dtype('datetime64[us]')
+        assert batch['duration'].dtype == np.float64
+    ids = np.concatenate([batch['id'] for batch in batches])
+    durations = np.concatenate([batch['duration'] for batch in batches])
+    assert list(ids) == [f'call-{n}' for n in range(7)]
+    np.testing.assert_array_equal(durations, [0.0, 10.0, 20.0, 30.0, np.nan, 50.0, 60.0])
+    assert batches[1]['started_at'][0] == np.datetime64('2026-01-01T09:03')
+
+    newest = list(db.call_record_batches(['id'], batch_size=2, newest_first=True, limit=3))
+    assert [list(batch['id']) for batch in newest] == [['call-6', 'call-5'], ['call-4']]
+
+
+def test_call_record_batches_as_arrow(db):
+    pyarrow = pytest.importorskip('pyarrow')
+    db.bulk_upsert_call_records([call_row(f'call-{n}', started_at=datetime(2026, 1, 1, 9, n),
+                                          duration=10.0 * n) for n in range(5)])
+
+    batches = list(db.call_record_batches(['id', 'started_at', 'duration'], batch_size=2, as_arrow=True))
+
+    assert [batch.num_rows for batch in batches] == [2, 2, 1]
+    table = pyarrow.Table.from_batches(batches)
+    assert table.schema.field('id').type == pyarrow.string()
+    assert pyarrow.types.is_timestamp(table.schema.field('started_at').type)
+    assert table.schema.field('duration').type == pyarrow.float64()
+    assert table.column('duration').to_pylist() == [0.0, 10.0, 20.0, 30.0, 40.0]
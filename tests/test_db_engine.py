@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models.database import DatabaseManager
+from utils.db_engine import is_file_sqlite
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(f"sqlite:///{tmp_path / 'matrix.db'}")
+
+
+def test_file_databases_get_a_separate_read_engine(db, tmp_path):
+    assert is_file_sqlite(f"sqlite:///{tmp_path / 'matrix.db'}")
+    assert not is_file_sqlite("sqlite://") and not is_file_sqlite("sqlite:///:memory:")
+    assert db.read_engine is not db.engine
+    with db.engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == 'wal'
+
+    memory_db = DatabaseManager("sqlite://")
+    assert memory_db.read_engine is memory_db.engine
+
+
+def test_read_engine_rejects_writes(db):
+    with db.read_engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA query_only").scalar() == 1
+        with pytest.raises(OperationalError, match="readonly"):
+            connection.execute(text("INSERT INTO sync_state (key, value) VALUES ('probe', '1')"))
+    assert db.get_sync_state('probe') is None
+
+
+def test_writer_pool_holds_a_single_connection(db):
+    acquired = threading.Event()
+
+    def second_writer():
+        with db.engine.connect():
+            acquired.set()
+
+    with db.engine.connect():
+        writer = threading.Thread(target=second_writer)
+        writer.start()
+        # The second writer queues for the pooled connection instead of opening another
+        assert not acquired.wait(0.2)
+        # Readers are not held up by the busy writer
+        with db.read_engine.connect() as reader:
+            assert reader.exec_driver_sql("SELECT 1").scalar() == 1
+    assert acquired.wait(5)
+    writer.join()
@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from utils.figure_budget import MIN_POINTS, OTHER_LABEL, figure_json, lttb_indices, top_n_labels, top_n_other
+
+
+def test_lttb_keeps_endpoints_and_threshold_points():
+    x = np.arange(1000)
+    y = np.sin(x / 25.0)
+    y[500] = 10.0
+
+    keep = lttb_indices(x, y, 100)
+
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == 999
+    assert np.all(np.diff(keep) > 0)
+    # The spike is the largest triangle of its bucket
+    assert 500 in keep
+
+
+def test_lttb_handles_dates_and_short_series():
+    dates = pd.date_range('2026-01-01', periods=200, freq='h')
+    keep = lttb_indices(dates, np.random.default_rng(0).random(200), 20)
+    assert len(keep) == 20 and keep[0] == 0 and keep[-1] == 199
+
+    assert list(lttb_indices([1, 2, 3], [1, 2, 3], 10)) == [0, 1, 2]
+    assert list(lttb_indices(range(5), range(5), 2)) == [0, 1, 2, 3, 4]
+
+
+def test_top_n_other_folds_the_rest_into_one_row():
+    frame = pd.DataFrame({'calls': [5, 50, 1, 20, 2], 'cost': [0.5, 5.0, 0.1, 2.0, 0.2]},
+                         index=pd.Index(['a', 'b', 'c', 'd', 'e'], name='agent'))
+
+    folded = top_n_other(frame, 'calls', 2)
+
+    assert list(folded.index) == ['b', 'd', OTHER_LABEL]
+    assert folded.index.name == 'agent'
+    assert folded.loc[OTHER_LABEL, 'calls'] == 8
+    assert folded.loc[OTHER_LABEL, 'cost'] == pytest.approx(0.8)
+    assert top_n_other(frame, 'calls', 5) is frame
+
+
+def test_top_n_other_uses_combine_for_non_additive_columns():
+    frame = pd.DataFrame({'calls': [10, 30, 20, 40], 'rate': [0.5, 0.9, 0.7, 0.1]},
+                         index=['a', 'b', 'c', 'd'])
+
+    folded = top_n_other(frame, 'calls', 2, combine=lambda rest: pd.Series({
+        'calls': rest['calls'].sum(),
+        'rate': (rest['rate'] * rest['calls']).sum() / rest['calls'].sum()}))
+
+    assert folded.loc[OTHER_LABEL, 'calls'] == 30
+    assert folded.loc[OTHER_LABEL, 'rate'] == pytest.approx((0.5 * 10 + 0.7 * 20) / 30)
+
+
+def test_top_n_labels_merges_repeated_labels():
+    labels, values = top_n_labels(['x', 'y', 'x', 'z', 'w'], [1, 5, 4, 2, 1], 2)
+    assert labels == ['x', 'y', OTHER_LABEL]
+    assert values == [5, 5, 3]
+
+
+def test_figure_json_stays_within_the_byte_budget():
+    x = pd.date_range('2026-01-01', periods=20000, freq='min')
+    fig = go.Figure(go.Scatter(x=x, y=np.random.default_rng(1).random(20000)))
+    unbounded = len(go.Figure(fig).to_json())
+
+    payload = figure_json(fig, max_points=5000, max_bytes=40000)
+
+    assert len(payload) <= 40000 < unbounded
+    trace = json.loads(payload)['data'][0]
+    assert MIN_POINTS <= len(trace['x']) < 5000
+    assert trace['x'][0].startswith('2026-01-01T00:00')
+
+
+def test_figure_json_folds_pie_slices():
+    fig = go.Figure(go.Pie(labels=[f'agent-{n}' for n in range(15)], values=list(range(1, 16))))
+
+    trace = json.loads(figure_json(fig, top_n=3))['data'][0]
+
+    assert trace['labels'] == ['agent-14', 'agent-13', 'agent-12', OTHER_LABEL]
+    assert trace['values'] == [15, 14, 13, sum(range(1, 13))]
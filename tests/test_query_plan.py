@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import inspect, text
+
+from models.database import Base, DatabaseManager
+from utils.query_plan import QUERY_PROBES, assert_indexed_queries
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(f"sqlite:///{tmp_path / 'matrix.db'}")
+
+
+def drop_secondary_indexes(db):
+    inspector = inspect(db.engine)
+    names = [index['name'] for table in Base.metadata.tables for index in inspector.get_indexes(table)]
+    # The writer pool has one connection, so list the indexes before taking it
+    with db.engine.begin() as connection:
+        for name in names:
+            connection.execute(text(f'DROP INDEX "{name}"'))
+
+
+def test_migrated_schema_serves_every_probe_from_an_index(db):
+    drop_secondary_indexes(db)
+    with pytest.raises(AssertionError, match="Full table scans"):
+        assert_indexed_queries(db)
+
+    assert db.migrate_schema()
+    plans = assert_indexed_queries(db)
+
+    assert set(plans) == set(QUERY_PROBES)
+    assert db.migrate_schema() == []
@@ -0,0 +1,30 @@
+import pytest
+
+from utils.rate_limiter import RateLimitScheduler, RateLimitTimeout
+
+
+def exhaust_minute_bucket(scheduler, calls):
+    for _ in range(calls):
+        assert scheduler.acquire(timeout=0.1) < 0.1
+
+
+def test_reapplying_the_same_limit_does_not_refill_the_buckets():
+    scheduler = RateLimitScheduler(calls_per_minute=3, calls_per_hour=100)
+    exhaust_minute_bucket(scheduler, 3)
+
+    assert scheduler.update_limits(calls_per_minute=3) is False
+    with pytest.raises(RateLimitTimeout):
+        scheduler.acquire(timeout=0.1)
+
+
+def test_resizing_keeps_the_current_token_level():
+    scheduler = RateLimitScheduler(calls_per_minute=3, calls_per_hour=100)
+    exhaust_minute_bucket(scheduler, 3)
+
+    assert scheduler.update_limits(calls_per_minute=600) is True
+    assert scheduler.minute_bucket.tokens < 1
+    # 600/minute refills a token every 0.1s
+    assert 0 < scheduler.acquire(timeout=1) < 0.5
+
+    scheduler.update_limits(calls_per_minute=2)
+    assert scheduler.minute_bucket.tokens <= 2
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.async_vapi_client import AsyncMatrixVAPIClient
+from utils.rate_limiter import RateLimitScheduler, RateLimitTimeout
+from utils.resilience import CircuitBreaker, CircuitBreakerRegistry, RetryPolicy
+
+
+def half_open(breaker):
+    """Trip the breaker and wait out its recovery timeout"""
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    time.sleep(breaker.recovery_timeout + 0.01)
+
+
+@pytest.fixture
+def breaker():
+    return CircuitBreaker('/call', failure_threshold=2, recovery_timeout=0.05)
+
+
+def test_breaker_opens_after_threshold_and_rejects_until_recovery(breaker):
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_half_open_lets_a_single_probe_through(breaker):
+    half_open(breaker)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+
+def test_probe_success_closes_the_breaker(breaker):
+    half_open(breaker)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_probe_failure_reopens_the_breaker(breaker):
+    half_open(breaker)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_released_probe_without_outcome_allows_the_next_probe(breaker):
+    half_open(breaker)
+    assert breaker.allow_request()
+    breaker.release_probe()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+
+def run_against(handler, request):
+    """Run request(client) against a local server answering every path with handler"""
+    async def scenario():
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', handler)
+        async with TestServer(app) as server:
+            client = AsyncMatrixVAPIClient('test-key', base_url=str(server.make_url('')).rstrip('/'),
+                                           scheduler=RateLimitScheduler(1000, 10000))
+            client.retry_policy = RetryPolicy(max_retries=0)
+            client.breakers = CircuitBreakerRegistry()
+            breaker = client.breakers.get('/call')
+            breaker.failure_threshold, breaker.recovery_timeout = 1, 0.05
+            half_open(breaker)
+            async with client:
+                try:
+                    await request(client)
+                except Exception as e:
+                    return breaker, e
+            return breaker, None
+    return asyncio.run(scenario())
+
+
+def test_throttled_probe_counts_as_endpoint_alive():
+    async def throttled(request):
+        return web.Response(status=429, headers={'Retry-After': '0'})
+
+    breaker, error = run_against(throttled, lambda client: client._request("GET", "/call"))
+    assert isinstance(error, aiohttp.ClientResponseError) and error.status == 429
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_probe_ending_before_any_outcome_is_released():
+    async def ok(request):
+        return web.json_response({})
+
+    class NoSlotScheduler:
+        def acquire(self, priority):
+            raise RateLimitTimeout("no slot")
+
+    async def request(client):
+        client.scheduler = NoSlotScheduler()
+        await client._request("GET", "/call")
+
+    breaker, error = run_against(ok, request)
+    assert isinstance(error, RateLimitTimeout)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
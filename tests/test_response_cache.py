@@ -0,0 +1,153 @@
+import pytest
+
+from utils import response_cache
+from utils.rate_limiter import RateLimitScheduler
+from utils.response_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, 'monotonic', clock)
+    return clock
+
+
+def test_entries_expire_after_their_endpoint_ttl(clock):
+    cache = ResponseCache(ttls={'/assistant': 300, '/call': 30})
+    cache.store('/assistant', '/assistant', [{'id': 'a1'}])
+    cache.store('/call/c1', '/call/c1', {'id': 'c1'})
+
+    clock.now += 31
+    assert not cache.lookup('/call/c1').is_fresh()
+    assert cache.lookup('/assistant').is_fresh()
+
+    clock.now += 270
+    assert not cache.lookup('/assistant').is_fresh()
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+
+def test_endpoints_without_a_ttl_are_not_cached(clock):
+    cache = ResponseCache(ttls={'/assistant': 300})
+    cache.store('/phone-number', '/phone-number', [])
+    assert cache.lookup('/phone-number') is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResponseCache(max_entries=2, ttls={'/assistant': 300})
+    cache.store('/assistant/a1', '/assistant/a1', {'id': 'a1'})
+    cache.store('/assistant/a2', '/assistant/a2', {'id': 'a2'})
+    cache.lookup('/assistant/a1')
+    cache.store('/assistant/a3', '/assistant/a3', {'id': 'a3'})
+
+    assert cache.lookup('/assistant/a2') is None
+    assert cache.lookup('/assistant/a1') is not None
+    assert cache.lookup('/assistant/a3') is not None
+
+
+def test_cached_values_are_copied_out(clock):
+    cache = ResponseCache(ttls={'/assistant': 300})
+    cache.store('/assistant', '/assistant', [{'id': 'a1'}])
+    cache.value_of(cache.lookup('/assistant'))[0]['id'] = 'changed'
+    assert cache.value_of(cache.lookup('/assistant')) == [{'id': 'a1'}]
+
+
+class StubResponse:
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        pass
+
+
+class StubSession:
+    """Stands in for the pooled requests session, replaying queued responses"""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+
+    def queue(self, *responses):
+        self.responses.extend(responses)
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        return self.responses.pop(0)
+
+    def gets(self, path):
+        return [kwargs for method, url, kwargs in self.requests if method == 'GET' and url.endswith(path)]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(clock):
+    pytest.importorskip('streamlit')
+    from matrix_vapi_client import MatrixVAPIClient
+
+    client = MatrixVAPIClient('test-key', base_url='http://vapi.test',
+                              scheduler=RateLimitScheduler(calls_per_minute=10_000, calls_per_hour=100_000),
+                              artifact_store=object())
+    client.cache = ResponseCache(ttls={'/assistant': 300, '/phone-number': 600})
+    client.session = StubSession()
+    return client
+
+
+def test_stale_entry_is_revalidated_and_304_returns_cached_body(client, clock):
+    headers = {'ETag': '"v1"', 'Last-Modified': 'Wed, 01 Jan 2025 00:00:00 GMT'}
+    client.session.queue(StubResponse(body=[{'id': 'a1'}], headers=headers), StubResponse(status_code=304))
+
+    assert client.get_assistants() == [{'id': 'a1'}]
+    assert client.get_assistants() == [{'id': 'a1'}]
+    assert len(client.session.gets('/assistant')) == 1
+
+    clock.now += 301
+    assert client.get_assistants() == [{'id': 'a1'}]
+    revalidation = client.session.gets('/assistant')[-1]['headers']
+    assert revalidation == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 01 Jan 2025 00:00:00 GMT'}
+    assert client.cache.stats()['revalidations'] == 1
+
+    # The 304 renewed the entry, so the next read is served locally
+    assert client.get_assistants() == [{'id': 'a1'}]
+    assert len(client.session.gets('/assistant')) == 2
+
+
+@pytest.mark.parametrize('write', [
+    lambda client: client.create_assistant({'name': 'new'}),
+    lambda client: client.update_assistant('a1', {'name': 'renamed'}),
+    lambda client: client.delete_assistant('a1'),
+])
+def test_assistant_writes_invalidate_cached_assistants(client, write):
+    client.session.queue(StubResponse(body=[{'id': 'a1'}]), StubResponse(body={'id': 'a1'}))
+    client.get_assistant('a1')
+    client.get_assistants()
+    client.session.queue(StubResponse(body={'id': 'a1'}))
+
+    write(client)
+
+    assert client.cache.lookup('/assistant') is None
+    assert client.cache.lookup('/assistant/a1') is None
+
+
+def test_creating_a_phone_number_invalidates_cached_phone_numbers(client):
+    client.session.queue(StubResponse(body=[{'id': 'p1'}]), StubResponse(body={'id': 'p2'}),
+                         StubResponse(body=[{'id': 'p1'}, {'id': 'p2'}]))
+    assert client.get_phone_numbers() == [{'id': 'p1'}]
+
+    client.create_phone_number({'number': '+15550000002'})
+
+    assert client.get_phone_numbers() == [{'id': 'p1'}, {'id': 'p2'}]
+    assert len(client.session.gets('/phone-number')) == 2
@@ -0,0 +1,55 @@
+import json
+
+from utils.transcript_renderer import TranscriptRenderer, transcript_fragments
+
+
+def messages(count):
+    return [{'role': 'user' if n % 2 else 'assistant', 'message': f'line {n}', 'timestamp': n} for n in range(count)]
+
+
+def test_role_and_text_are_escaped():
+    [fragment] = transcript_fragments([{'role': '<script>alert(1)</script>', 'message': 'a & b <b>bold</b>',
+                                        'timestamp': '"now"'}])
+
+    assert '<script>' not in fragment and '<b>bold' not in fragment
+    assert '&lt;script&gt;alert(1)&lt;/script&gt;' in fragment
+    assert 'a &amp; b &lt;b&gt;bold&lt;/b&gt;' in fragment
+    assert '[&quot;now&quot;]' in fragment
+
+
+def test_json_and_plain_text_transcripts():
+    stored = json.dumps({'messages': [{'role': 'user', 'text': 'hi'}]})
+    [entry] = transcript_fragments(stored)
+    assert 'user:' in entry and 'hi' in entry
+
+    lines = transcript_fragments('AI: hello <there>\n\nUser: bye\n')
+    assert lines == ['<div>AI: hello &lt;there&gt;</div>', '<div>User: bye</div>']
+
+
+def test_render_shows_the_window_and_reports_the_total():
+    renderer = TranscriptRenderer()
+
+    page, total = renderer.render('call-1', messages(25), limit=10)
+
+    assert total == 25
+    assert page.count('<strong') == 10
+    assert 'line 9' in page and 'line 10' not in page
+    full, total = renderer.render('call-1', messages(25))
+    assert full.count('<strong') == total == 25
+
+
+def test_fragments_are_cached_per_transcript_version_with_lru_eviction():
+    renderer = TranscriptRenderer(max_calls=2)
+    first = renderer.fragments('call-1', messages(3))
+    assert renderer.fragments('call-1', messages(3)) is first
+    # An edited transcript is rendered again
+    assert renderer.fragments('call-1', messages(4)) is not first
+
+    renderer = TranscriptRenderer(max_calls=2)
+    one = renderer.fragments('call-1', messages(3))
+    two = renderer.fragments('call-2', messages(3))
+    renderer.fragments('call-1', messages(3))
+    renderer.fragments('call-3', messages(3))
+
+    assert renderer.fragments('call-1', messages(3)) is one
+    assert renderer.fragments('call-2', messages(3)) is not two
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+import pytest
+
+from models.database import DatabaseManager
+from utils.transcript_search import TranscriptSearchIndex
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(f"sqlite:///{tmp_path / 'matrix.db'}")
+
+
+def test_bulk_writes_are_indexed_from_stored_transcripts(db):
+    search_index = TranscriptSearchIndex(db)
+    db.bulk_upsert_call_records([
+        {'id': f'call-{n}', 'agent_id': 'agent-1', 'agent_name': 'Neo', 'status': 'completed',
+         'started_at': datetime(2026, 1, 1, 9, n), 'transcript': f'User: red pill {n}\nAI: follow the white rabbit'}
+        for n in range(5)
+    ], chunk_size=2)
+    assert len(search_index.search('rabbit', role='assistant')) == 5
+
+    db.bulk_upsert_call_records([{'id': 'call-0', 'transcript': 'User: blue pill'}])
+    assert [result['call_id'] for result in search_index.search('blue')] == ['call-0']
+    assert len(search_index.search('rabbit')) == 4
+
+    db.delete_all_call_records()
+    assert search_index.search('pill') == []
@@ -13,8 +13,71 @@ from typing import Dict, List, Optional, Tuple, Any
 from collections import defaultdict
 import json
 from scipy import stats
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
+
+from config.settings import CACHE_CONFIG
+from models.database import QUALITY_BINS, ROLLUP_MEASURES
+from utils.report_cache import ReportCache
+from utils.call_clustering import CLUSTER_FEATURES, CallClusterModel
+from utils.figure_budget import figure_json, top_n_other
+
+# Call record columns the report sections read
+REPORT_CALL_COLUMNS = ['id', 'agent_id', 'agent_name', 'duration', 'cost', 'status',
+                       'started_at', 'ended_at', 'sentiment_score', 'quality_score']
+QUALITY_BIN_EDGES = [0] + [upper for _, upper, _ in QUALITY_BINS]
+QUALITY_BIN_LABELS = [label for label, _, _ in QUALITY_BINS]
+CATEGORICAL_CALL_COLUMNS = ['agent_name', 'status']
+FLOAT32_CALL_COLUMNS = ['duration', 'cost', 'sentiment_score', 'quality_score']
+
+# Named aggregations computed in the single groupby pass for each key
+GROUP_AGGREGATIONS = {
+    'calls': ('id', 'size'),
+    'call_count': ('duration', 'count'),
+    'avg_duration': ('duration', 'mean'),
+    'total_duration': ('duration', 'sum'),
+    'avg_cost': ('cost', 'mean'),
+    'total_cost': ('cost', 'sum'),
+    'avg_quality': ('quality_score', 'mean'),
+    'avg_sentiment': ('sentiment_score', 'mean'),
+    'avg_cost_efficiency': ('cost_efficiency', 'mean')
+}
+
+
+class ReportAggregates:
+    """Per-report groupby cache: each key is aggregated once, for every metric, on first use"""
+    
+    def __init__(self, calls_df: pd.DataFrame):
+        self.calls_df = calls_df
+        if 'cost_efficiency' not in calls_df.columns:
+            # Cost efficiency (cost per minute of quality interaction); zero duration or quality has none
+            calls_df['cost_efficiency'] = (calls_df['cost'] / (calls_df['duration'] * calls_df['quality_score'])) \
+                .replace([np.inf, -np.inf], np.nan)
+        self._groups: Dict[str, pd.DataFrame] = {}
+    
+    def _grouped(self, name: str, keys) -> pd.DataFrame:
+        if name not in self._groups:
+            self._groups[name] = self.calls_df.groupby(keys, observed=True).agg(**GROUP_AGGREGATIONS)
+        return self._groups[name]
+    
+    @property
+    def by_agent(self) -> pd.DataFrame:
+        return self._grouped('agent', 'agent_name')
+    
+    @property
+    def by_date(self) -> pd.DataFrame:
+        return self._grouped('date', 'date')
+    
+    @property
+    def by_weekday_hour(self) -> pd.DataFrame:
+        return self._grouped('weekday_hour', ['day_of_week', 'hour'])
+    
+    @property
+    def calls_by_hour(self) -> pd.Series:
+        return self.by_weekday_hour['calls'].groupby(level='hour').sum()
+    
+    @property
+    def calls_by_weekday(self) -> pd.Series:
+        return self.by_weekday_hour['calls'].groupby(level='day_of_week').sum()
+
 
 class MatrixAnalyticsEngine:
     def __init__(self, database_manager):
@@ -27,52 +90,211 @@ class MatrixAnalyticsEngine:
             'background': '#0a0a0a',
             'surface': '#1a1a2e'
         }
+        self.report_cache = ReportCache()
+        self.cluster_model = CallClusterModel()
+    
+    def get_report(self, start_date: datetime, end_date: datetime, filters: Dict[str, str] = None) -> Dict[str, Any]:
+        """Comprehensive report, recomputed only when the window, filters or underlying data change"""
+        return self.report_cache.get_or_compute(
+            start_date, end_date, filters, self.db.get_data_version(),
+            lambda: self.generate_comprehensive_report(start_date, end_date, filters)
+        )
     
-    def generate_comprehensive_report(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    def get_dashboard(self, start_date: datetime, end_date: datetime,
+                      filters: Dict[str, str] = None) -> Dict[str, str]:
+        """Performance dashboard for the window as budgeted Plotly JSON payloads, cached like get_report"""
+        def compute():
+            calls_df = self.load_calls_frame(start_date, end_date, **(filters or {}))
+            figures = self.create_performance_dashboard(calls_df, self._agents_frame())
+            return {name: figure_json(fig) for name, fig in figures.items()}
+        return self.report_cache.get_or_compute(start_date, end_date, filters, self.db.get_data_version(),
+                                                compute, kind='dashboard_json')
+    
+    def generate_comprehensive_report(self, start_date: datetime, end_date: datetime,
+                                      filters: Dict[str, str] = None) -> Dict[str, Any]:
         """Generate comprehensive analytics report"""
+        agents_df = self._agents_frame()
+        
+        sample_size = CACHE_CONFIG.get('call_clusters', {}).get('report_sample_size', 20000)
+        # Aggregate sections come from the rollup tables when the window lines up with their buckets
+        # (rollups are per agent and category, so call filters need the raw rows); then only the
+        # clustering sample is read row by row
+        if not filters and self._rollup_window_aligned(start_date, end_date):
+            sections = self._rollup_sections(start_date, end_date, agents_df)
+            cluster_df = self.load_calls_frame(start_date, end_date, columns=CLUSTER_FEATURES,
+                                               newest_first=True, limit=sample_size)
+        else:
+            calls_df = self.load_calls_frame(start_date, end_date, **(filters or {}))
+            groups = ReportAggregates(calls_df)
+            sections = {
+                'overview': self._generate_overview_metrics(calls_df, agents_df),
+                'agent_performance': self._analyze_agent_performance(calls_df, agents_df, groups),
+                'cost_analysis': self._analyze_costs(calls_df, agents_df, groups),
+                'quality_metrics': self._analyze_quality_metrics(calls_df, groups),
+                'usage_patterns': self._analyze_usage_patterns(calls_df, groups),
+                'recommendations': self._generate_recommendations(calls_df, agents_df, groups)
+            }
+            cluster_df = calls_df.tail(sample_size)
         
-        # Get data
-        call_records = self.db.get_call_records(limit=1000)
+        # Generate report sections
+        report = {
+            'overview': sections['overview'],
+            'agent_performance': sections['agent_performance'],
+            'cost_analysis': sections['cost_analysis'],
+            'quality_metrics': sections['quality_metrics'],
+            'usage_patterns': sections['usage_patterns'],
+            'predictive_insights': self._generate_predictive_insights(cluster_df),
+            'recommendations': sections['recommendations']
+        }
+        
+        return report
+    
+    def _agents_frame(self) -> pd.DataFrame:
+        """All agents as a DataFrame"""
         agents = self.db.get_all_agents()
-        metrics = self.db.get_metrics(start_date, end_date)
-        
-        # Convert to DataFrames
-        calls_df = pd.DataFrame([{
-            'id': call.id,
-            'agent_id': call.agent_id,
-            'agent_name': call.agent_name,
-            'duration': call.duration,
-            'cost': call.cost,
-            'status': call.status,
-            'started_at': call.started_at,
-            'ended_at': call.ended_at,
-            'sentiment_score': call.sentiment_score,
-            'quality_score': call.quality_score
-        } for call in call_records])
-        
-        agents_df = pd.DataFrame([{
+        return pd.DataFrame([{
             'id': agent.id,
             'name': agent.name,
             'category': agent.category,
+            'status': agent.status,
             'matrix_level': agent.matrix_level,
             'cost_per_minute': agent.cost_per_minute,
             'usage_count': agent.usage_count,
             'avg_call_duration': agent.avg_call_duration,
             'success_rate': agent.success_rate
         } for agent in agents])
+    
+    def load_calls_frame(self, start_date: datetime, end_date: datetime, columns: List[str] = None,
+                         newest_first: bool = False, limit: int = None, **filters) -> pd.DataFrame:
+        """Typed call frame for [start_date, end_date), built column-wise from streamed SQL batches"""
+        columns = columns or REPORT_CALL_COLUMNS
+        batches = list(self.db.call_record_batches(columns, newest_first=newest_first, limit=limit,
+                                                   start_date=start_date, end_date=end_date, **filters))
+        if not batches:
+            return pd.DataFrame(columns=columns)
+        
+        calls_df = pd.DataFrame({column: np.concatenate([batch[column] for batch in batches]) for column in columns})
+        categorical = [column for column in CATEGORICAL_CALL_COLUMNS if column in columns]
+        calls_df[categorical] = calls_df[categorical].astype('category')
+        float32 = [column for column in FLOAT32_CALL_COLUMNS if column in columns]
+        calls_df[float32] = calls_df[float32].astype(np.float32)
+        return self._add_time_columns(calls_df) if 'started_at' in columns else calls_df
+    
+    @staticmethod
+    def _add_time_columns(calls_df: pd.DataFrame) -> pd.DataFrame:
+        """Derive hour, weekday and date from started_at once, for every analyzer to share"""
+        started_at = calls_df['started_at']
+        calls_df['hour'] = started_at.dt.hour
+        calls_df['day_of_week'] = started_at.dt.day_name()
+        calls_df['date'] = started_at.dt.date
+        return calls_df
+    
+    @staticmethod
+    def _rollup_window_aligned(start_date: datetime, end_date: datetime) -> bool:
+        """Hourly rollups cover any window whose bounds fall on the hour"""
+        return all(moment.minute == 0 and moment.second == 0 and moment.microsecond == 0
+                   for moment in (start_date, end_date))
+    
+    def _load_rollups(self, granularity: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        rollups_df = pd.DataFrame(self.db.get_call_rollups(granularity, start_date, end_date))
+        if rollups_df.empty:
+            return rollups_df
+        rollups_df['bucket_start'] = pd.to_datetime(rollups_df['bucket_start'])
+        return rollups_df
+    
+    def _rollup_sections(self, start_date: datetime, end_date: datetime, agents_df: pd.DataFrame) -> Dict[str, Any]:
+        """Every aggregate report section from hourly/daily rollups, without reading call rows"""
+        empty_df = pd.DataFrame()
+        hourly_df = self._load_rollups('hour', start_date, end_date)
+        # Whole days use the daily rollups; partial days at either end fall back to hourly buckets
+        first_day = start_date if start_date.hour == 0 else (start_date + timedelta(days=1)).replace(hour=0)
+        last_day = end_date.replace(hour=0)
+        daily_df = self._load_rollups('day', first_day, last_day) if first_day < last_day else empty_df
+        edge_hours = hourly_df[(hourly_df['bucket_start'] < first_day) | (hourly_df['bucket_start'] >= last_day)] \
+            if not hourly_df.empty else hourly_df
+        day_df = pd.concat([daily_df, edge_hours], ignore_index=True)
+        
+        if day_df.empty:
+            return {
+                'overview': self._generate_overview_metrics(empty_df, agents_df),
+                'agent_performance': self._analyze_agent_performance(empty_df, agents_df),
+                'cost_analysis': self._analyze_costs(empty_df, agents_df),
+                'quality_metrics': self._analyze_quality_metrics(empty_df),
+                'usage_patterns': self._analyze_usage_patterns(empty_df),
+                'recommendations': self._generate_recommendations(empty_df, agents_df)
+            }
         
-        # Generate report sections
-        report = {
-            'overview': self._generate_overview_metrics(calls_df, agents_df),
-            'agent_performance': self._analyze_agent_performance(calls_df, agents_df),
-            'cost_analysis': self._analyze_costs(calls_df, agents_df),
-            'quality_metrics': self._analyze_quality_metrics(calls_df),
-            'usage_patterns': self._analyze_usage_patterns(calls_df),
-            'predictive_insights': self._generate_predictive_insights(calls_df),
-            'recommendations': self._generate_recommendations(calls_df, agents_df)
+        active_agents = len(agents_df[agents_df['status'] == 'active']) if not agents_df.empty else 0        
+        totals = day_df[list(ROLLUP_MEASURES)].sum()
+        overview = {
+            'total_calls': int(totals['call_count']),
+            'total_duration': totals['duration_sum'],
+            'total_cost': totals['cost_sum'],
+            'avg_call_duration': totals['duration_sum'] / totals['call_count'],
+            'success_rate': totals['completed_calls'] / totals['call_count'] * 100,
+            'active_agents': active_agents,
+            'avg_quality_score': totals['quality_sum'] / totals['quality_count'] if totals['quality_count'] else np.nan,
+            'avg_sentiment_score': totals['sentiment_sum'] / totals['sentiment_count'] if totals['sentiment_count'] else np.nan
         }
         
-        return report
+        by_agent = day_df.groupby('dimension_value')[list(ROLLUP_MEASURES)].sum()
+        avg_quality_by_agent = by_agent['quality_sum'] / by_agent['quality_count'].replace(0, np.nan)
+        agent_stats = pd.DataFrame({
+            'agent_name': by_agent.index,
+            'call_count': by_agent['call_count'].values,
+            'avg_duration': (by_agent['duration_sum'] / by_agent['call_count']).values,
+            'total_duration': by_agent['duration_sum'].values,
+            'total_cost': by_agent['cost_sum'].values,
+            'avg_quality': avg_quality_by_agent.values,
+            'avg_sentiment': (by_agent['sentiment_sum'] / by_agent['sentiment_count'].replace(0, np.nan)).values
+        }).round(2)
+        agent_stats['performance_score'] = (
+            agent_stats['avg_quality'] * 0.4 +
+            agent_stats['avg_sentiment'] * 0.3 +
+            (agent_stats['call_count'] / agent_stats['call_count'].max()) * 100 * 0.3
+        )
+        
+        hour_counts = hourly_df.groupby(hourly_df['bucket_start'].dt.hour)['call_count'].sum()
+        by_day = day_df.groupby(day_df['bucket_start'].dt.date)[['call_count', 'quality_sum', 'quality_count']].sum()
+        by_day = by_day[by_day['call_count'] > 0]
+        date_counts = by_day['call_count']
+        weekday_counts = date_counts.groupby(pd.to_datetime(date_counts.index).day_name()).sum()
+        
+        # Cost per minute of quality interaction is a per-call ratio; the rollups keep its sum and count
+        cost_efficiency = (by_agent['efficiency_sum'] / by_agent['efficiency_count'].replace(0, np.nan)) \
+            .sort_values()
+        quality_distribution = pd.Series({label: int(totals[measure]) for label, _, measure in QUALITY_BINS}) \
+            .sort_values(ascending=False, kind='stable')
+        
+        return {
+            'overview': overview,
+            'agent_performance': {
+                'agent_stats': agent_stats.to_dict('records'),
+                'top_performers': agent_stats.nlargest(3, 'performance_score')[['agent_name', 'performance_score']].to_dict('records'),
+                'improvement_needed': agent_stats.nsmallest(3, 'performance_score')[['agent_name', 'performance_score']].to_dict('records')
+            },
+            'cost_analysis': {
+                'total_cost': overview['total_cost'],
+                'cost_per_call': overview['total_cost'] / overview['total_calls'],
+                'cost_by_agent': by_agent['cost_sum'].sort_values(ascending=False).to_dict(),
+                'most_efficient_agents': cost_efficiency.head(5).to_dict(),
+                'least_efficient_agents': cost_efficiency.tail(5).to_dict()
+            },
+            'quality_metrics': {
+                'avg_quality': overview['avg_quality_score'],
+                'quality_distribution': quality_distribution.to_dict(),
+                'quality_trends': (by_day['quality_sum'] / by_day['quality_count'].replace(0, np.nan)).to_dict(),
+                'quality_by_agent': avg_quality_by_agent.to_dict()
+            },
+            'usage_patterns': {
+                'peak_hours': hour_counts.sort_values(ascending=False, kind='stable').head(5).to_dict(),
+                'peak_days': weekday_counts.sort_values(ascending=False, kind='stable').to_dict(),
+                'daily_usage': date_counts.to_dict(),
+                'avg_calls_per_day': date_counts.mean()
+            },
+            'recommendations': self._recommend(by_agent['cost_sum'] / by_agent['call_count'], avg_quality_by_agent,
+                                               hour_counts, by_agent['call_count'], agents_df)
+        }
     
     def _generate_overview_metrics(self, calls_df: pd.DataFrame, agents_df: pd.DataFrame) -> Dict[str, Any]:
         """Generate overview metrics"""
@@ -97,20 +319,18 @@ class MatrixAnalyticsEngine:
             'avg_sentiment_score': calls_df['sentiment_score'].mean() if 'sentiment_score' in calls_df.columns else 0
         }
     
-    def _analyze_agent_performance(self, calls_df: pd.DataFrame, agents_df: pd.DataFrame) -> Dict[str, Any]:
+    def _analyze_agent_performance(self, calls_df: pd.DataFrame, agents_df: pd.DataFrame,
+                                   groups: ReportAggregates = None) -> Dict[str, Any]:
         """Analyze individual agent performance"""
         if calls_df.empty:
             return {'agent_stats': [], 'top_performers': [], 'improvement_needed': []}
+        groups = groups or ReportAggregates(calls_df)
         
         # Group by agent
-        agent_stats = calls_df.groupby('agent_name').agg({
-            'duration': ['count', 'mean', 'sum'],
-            'cost': 'sum',
-            'quality_score': 'mean',
-            'sentiment_score': 'mean'
-        }).round(2)
-        
-        agent_stats.columns = ['call_count', 'avg_duration', 'total_duration', 'total_cost', 'avg_quality', 'avg_sentiment']
+        agent_stats = groups.by_agent[['call_count', 'avg_duration', 'total_duration', 'total_cost',
+                                       'avg_quality', 'avg_sentiment']]
+        # float32 sums/means come back as float64 so the rounded figures print cleanly
+        agent_stats = agent_stats.astype({column: np.float64 for column in agent_stats.columns[1:]}).round(2)
         agent_stats = agent_stats.reset_index()
         
         # Calculate performance scores
@@ -130,21 +350,22 @@ class MatrixAnalyticsEngine:
             'improvement_needed': improvement_needed
         }
     
-    def _analyze_costs(self, calls_df: pd.DataFrame, agents_df: pd.DataFrame) -> Dict[str, Any]:
+    def _analyze_costs(self, calls_df: pd.DataFrame, agents_df: pd.DataFrame,
+                       groups: ReportAggregates = None) -> Dict[str, Any]:
         """Analyze cost patterns and efficiency"""
         if calls_df.empty:
             return {'total_cost': 0, 'cost_per_call': 0, 'cost_trends': []}
+        groups = groups or ReportAggregates(calls_df)
         
         # Cost analysis
         total_cost = calls_df['cost'].sum()
         cost_per_call = calls_df['cost'].mean()
         
         # Cost by agent
-        cost_by_agent = calls_df.groupby('agent_name')['cost'].sum().sort_values(ascending=False)
+        cost_by_agent = groups.by_agent['total_cost'].sort_values(ascending=False)
         
         # Cost efficiency (cost per minute of quality interaction)
-        calls_df['cost_efficiency'] = calls_df['cost'] / (calls_df['duration'] * calls_df['quality_score'])
-        cost_efficiency = calls_df.groupby('agent_name')['cost_efficiency'].mean().sort_values()
+        cost_efficiency = groups.by_agent['avg_cost_efficiency'].sort_values()
         
         return {
             'total_cost': total_cost,
@@ -154,47 +375,44 @@ class MatrixAnalyticsEngine:
             'least_efficient_agents': cost_efficiency.tail(5).to_dict()
         }
     
-    def _analyze_quality_metrics(self, calls_df: pd.DataFrame) -> Dict[str, Any]:
+    def _analyze_quality_metrics(self, calls_df: pd.DataFrame, groups: ReportAggregates = None) -> Dict[str, Any]:
         """Analyze call quality and satisfaction metrics"""
         if calls_df.empty or 'quality_score' not in calls_df.columns:
             return {'avg_quality': 0, 'quality_distribution': {}}
+        groups = groups or ReportAggregates(calls_df)
         
         # Quality distribution
-        quality_bins = pd.cut(calls_df['quality_score'], bins=[0, 2, 4, 6, 8, 10], labels=['Poor', 'Fair', 'Good', 'Very Good', 'Excellent'])
+        quality_bins = pd.cut(calls_df['quality_score'], bins=QUALITY_BIN_EDGES, labels=QUALITY_BIN_LABELS)
         quality_distribution = quality_bins.value_counts().to_dict()
         
         # Quality trends over time
-        calls_df['date'] = pd.to_datetime(calls_df['started_at']).dt.date
-        quality_trends = calls_df.groupby('date')['quality_score'].mean().to_dict()
+        quality_trends = groups.by_date['avg_quality'].to_dict()
         
         return {
             'avg_quality': calls_df['quality_score'].mean(),
             'quality_distribution': quality_distribution,
             'quality_trends': quality_trends,
-            'quality_by_agent': calls_df.groupby('agent_name')['quality_score'].mean().to_dict()
+            'quality_by_agent': groups.by_agent['avg_quality'].to_dict()
         }
     
-    def _analyze_usage_patterns(self, calls_df: pd.DataFrame) -> Dict[str, Any]:
+    def _analyze_usage_patterns(self, calls_df: pd.DataFrame, groups: ReportAggregates = None) -> Dict[str, Any]:
         """Analyze usage patterns and trends"""
         if calls_df.empty:
             return {'peak_hours': [], 'peak_days': [], 'seasonal_trends': {}}
-        
-        calls_df['hour'] = pd.to_datetime(calls_df['started_at']).dt.hour
-        calls_df['day_of_week'] = pd.to_datetime(calls_df['started_at']).dt.day_name()
-        calls_df['date'] = pd.to_datetime(calls_df['started_at']).dt.date
+        groups = groups or ReportAggregates(calls_df)
         
         # Peak usage analysis
-        peak_hours = calls_df['hour'].value_counts().head(5).to_dict()
-        peak_days = calls_df['day_of_week'].value_counts().to_dict()
+        peak_hours = groups.calls_by_hour.sort_values(ascending=False, kind='stable').head(5).to_dict()
+        peak_days = groups.calls_by_weekday.sort_values(ascending=False, kind='stable').to_dict()
         
         # Daily trends
-        daily_usage = calls_df.groupby('date').size().to_dict()
+        daily_calls = groups.by_date['calls']
         
         return {
             'peak_hours': peak_hours,
             'peak_days': peak_days,
-            'daily_usage': daily_usage,
-            'avg_calls_per_day': calls_df.groupby('date').size().mean()
+            'daily_usage': daily_calls.to_dict(),
+            'avg_calls_per_day': daily_calls.mean()
         }
     
     def _generate_predictive_insights(self, calls_df: pd.DataFrame) -> Dict[str, Any]:
@@ -210,24 +428,18 @@ class MatrixAnalyticsEngine:
             if len(available_features) < 2:
                 return {'predictions': 'Insufficient feature data for analysis'}
             
-            # Perform clustering to identify call patterns
-            scaler = StandardScaler()
-            scaled_data = scaler.fit_transform(calls_df[available_features].fillna(0))
+            # Pick up the report scheduler's latest save, learn whatever it has not seen yet, then assign
+            # this window's calls to call patterns
+            self.cluster_model.refresh()
+            self.cluster_model.update(self.db)
+            if not self.cluster_model.is_fitted:
+                return {'predictions': 'Insufficient data for call pattern analysis'}
+            clusters = self.cluster_model.predict(calls_df)
             
-            # Determine optimal number of clusters
-            n_clusters = min(4, len(calls_df) // 3)
-            if n_clusters < 2:
-                n_clusters = 2
-            
-            kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-            clusters = kmeans.fit_predict(scaled_data)
-            
-            # Analyze clusters
-            calls_df['cluster'] = clusters
+            # Analyze clusters (labels stay outside calls_df, which other sections share)
             cluster_analysis = {}
             
-            for cluster_id in range(n_clusters):
-                cluster_data = calls_df[calls_df['cluster'] == cluster_id]
+            for cluster_id, cluster_data in calls_df.groupby(clusters):
                 cluster_analysis[f'Cluster_{cluster_id}'] = {
                     'size': len(cluster_data),
                     'avg_duration': cluster_data['duration'].mean(),
@@ -282,43 +494,45 @@ class MatrixAnalyticsEngine:
         
         return insights
     
-    def _generate_recommendations(self, calls_df: pd.DataFrame, agents_df: pd.DataFrame) -> List[str]:
+    def _generate_recommendations(self, calls_df: pd.DataFrame, agents_df: pd.DataFrame,
+                                  groups: ReportAggregates = None) -> List[str]:
         """Generate actionable recommendations"""
-        recommendations = []
-        
         if calls_df.empty:
-            recommendations.append("Start making calls to generate analytics data")
-            return recommendations
+            return ["Start making calls to generate analytics data"]
+        groups = groups or ReportAggregates(calls_df)
+        return self._recommend(groups.by_agent['avg_cost'], groups.by_agent['avg_quality'], groups.calls_by_hour,
+                               groups.by_agent['calls'], agents_df)
+    
+    @staticmethod
+    def _recommend(avg_cost_by_agent: pd.Series, avg_quality_by_agent: pd.Series, calls_by_hour: pd.Series,
+                   calls_by_agent: pd.Series, agents_df: pd.DataFrame) -> List[str]:
+        """Recommendations from per-agent and per-hour aggregates, whether from call rows or rollups"""
+        recommendations = []
         
         # Cost optimization recommendations
-        if 'cost' in calls_df.columns:
-            high_cost_agents = calls_df.groupby('agent_name')['cost'].mean().sort_values(ascending=False).head(3)
-            if not high_cost_agents.empty:
-                recommendations.append(f"Consider optimizing usage of high-cost agents: {', '.join(high_cost_agents.index)}")
+        high_cost_agents = avg_cost_by_agent.sort_values(ascending=False).head(3)
+        if not high_cost_agents.empty:
+            recommendations.append(f"Consider optimizing usage of high-cost agents: {', '.join(high_cost_agents.index)}")
         
         # Quality improvement recommendations
-        if 'quality_score' in calls_df.columns:
-            low_quality_agents = calls_df.groupby('agent_name')['quality_score'].mean().sort_values().head(3)
-            if not low_quality_agents.empty and low_quality_agents.iloc[0] < 7:
-                recommendations.append(f"Focus on improving quality for: {', '.join(low_quality_agents.index)}")
+        low_quality_agents = avg_quality_by_agent.sort_values().head(3)
+        if not low_quality_agents.empty and low_quality_agents.iloc[0] < 7:
+            recommendations.append(f"Focus on improving quality for: {', '.join(low_quality_agents.index)}")
         
         # Usage pattern recommendations
-        if 'started_at' in calls_df.columns:
-            calls_df['hour'] = pd.to_datetime(calls_df['started_at']).dt.hour
-            peak_hour = calls_df['hour'].mode().iloc[0] if not calls_df['hour'].mode().empty else 12
-            recommendations.append(f"Peak usage is around {peak_hour}:00 - consider scaling resources accordingly")
+        peak_hour = calls_by_hour.idxmax() if not calls_by_hour.empty else 12
+        recommendations.append(f"Peak usage is around {peak_hour}:00 - consider scaling resources accordingly")
         
         # Agent utilization recommendations
         if len(agents_df) > 0:
-            total_calls = len(calls_df)
-            calls_per_agent = calls_df['agent_name'].value_counts()
-            underutilized = calls_per_agent[calls_per_agent < total_calls * 0.1].index.tolist()
+            underutilized = calls_by_agent[calls_by_agent < calls_by_agent.sum() * 0.1].index.tolist()
             if underutilized:
                 recommendations.append(f"Consider promoting underutilized agents: {', '.join(underutilized[:3])}")
         
         return recommendations
     
-    def create_performance_dashboard(self, calls_df: pd.DataFrame, agents_df: pd.DataFrame) -> Dict[str, go.Figure]:
+    def create_performance_dashboard(self, calls_df: pd.DataFrame, agents_df: pd.DataFrame,
+                                     groups: ReportAggregates = None) -> Dict[str, go.Figure]:
         """Create comprehensive performance dashboard"""
         figures = {}
         
@@ -329,10 +543,14 @@ class MatrixAnalyticsEngine:
             fig.update_layout(title="No Data Available", template="plotly_dark")
             return {"placeholder": fig}
         
+        if 'date' not in calls_df.columns:
+            calls_df = self._add_time_columns(calls_df.assign(started_at=pd.to_datetime(calls_df['started_at'])))
+            groups = None
+        groups = groups or ReportAggregates(calls_df)
+        
         # 1. Call Volume Over Time
         if 'started_at' in calls_df.columns:
-            calls_df['date'] = pd.to_datetime(calls_df['started_at']).dt.date
-            daily_calls = calls_df.groupby('date').size().reset_index(name='call_count')
+            daily_calls = groups.by_date['calls'].rename('call_count').reset_index()
             
             fig_volume = px.line(daily_calls, x='date', y='call_count', 
                                title='📈 Call Volume Over Time',
@@ -344,14 +562,19 @@ class MatrixAnalyticsEngine:
         
         # 2. Agent Performance Comparison
         if 'agent_name' in calls_df.columns:
-            agent_metrics = calls_df.groupby('agent_name').agg({
-                'duration': ['count', 'mean'],
-                'cost': 'sum',
-                'quality_score': 'mean'
-            }).round(2)
+            agent_metrics = groups.by_agent[['call_count', 'avg_duration', 'total_cost', 'avg_quality']]
+            agent_metrics.index = agent_metrics.index.astype(str)
+            
+            def other_agents(rest: pd.DataFrame) -> pd.Series:
+                # Averages of the folded agents come from their calls, not from averaging averages
+                rest_calls = calls_df[calls_df['agent_name'].isin(rest.index)]
+                return pd.Series({'call_count': rest_calls['duration'].count(),
+                                  'avg_duration': rest_calls['duration'].mean(),
+                                  'total_cost': rest_calls['cost'].sum(),
+                                  'avg_quality': rest_calls['quality_score'].mean()})
             
-            agent_metrics.columns = ['call_count', 'avg_duration', 'total_cost', 'avg_quality']
-            agent_metrics = agent_metrics.reset_index()
+            agent_metrics = top_n_other(agent_metrics, 'call_count', combine=other_agents).round(2)
+            agent_metrics = agent_metrics.reset_index(names='agent_name')
             
             fig_performance = make_subplots(
                 rows=2, cols=2,
@@ -400,7 +623,7 @@ class MatrixAnalyticsEngine:
         
         # 3. Cost Analysis
         if 'cost' in calls_df.columns and 'agent_name' in calls_df.columns:
-            cost_by_agent = calls_df.groupby('agent_name')['cost'].sum().sort_values(ascending=False)
+            cost_by_agent = groups.by_agent['total_cost'].sort_values(ascending=False)
             
             fig_cost = px.pie(values=cost_by_agent.values, names=cost_by_agent.index,
                             title='💰 Cost Distribution by Agent',
@@ -411,8 +634,7 @@ class MatrixAnalyticsEngine:
         
         # 4. Quality Trends
         if 'quality_score' in calls_df.columns and 'started_at' in calls_df.columns:
-            calls_df['date'] = pd.to_datetime(calls_df['started_at']).dt.date
-            quality_trends = calls_df.groupby('date')['quality_score'].mean().reset_index()
+            quality_trends = groups.by_date['avg_quality'].rename('quality_score').reset_index()
             
             fig_quality = px.line(quality_trends, x='date', y='quality_score',
                                 title='⭐ Quality Score Trends',
@@ -424,10 +646,7 @@ class MatrixAnalyticsEngine:
         
         # 5. Usage Patterns Heatmap
         if 'started_at' in calls_df.columns:
-            calls_df['hour'] = pd.to_datetime(calls_df['started_at']).dt.hour
-            calls_df['day_of_week'] = pd.to_datetime(calls_df['started_at']).dt.day_name()
-            
-            usage_heatmap = calls_df.groupby(['day_of_week', 'hour']).size().unstack(fill_value=0)
+            usage_heatmap = groups.by_weekday_hour['calls'].unstack(fill_value=0)
             
             fig_heatmap = px.imshow(usage_heatmap.values,
                                   x=usage_heatmap.columns,
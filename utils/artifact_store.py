@@ -0,0 +1,101 @@
+"""
+Call Artifact Store for Matrix VAPI Client
+Compressed, size-bounded on-disk cache of transcripts and recording URLs
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config.settings import CACHE_CONFIG, app_path
+
+# Artifacts of calls in these states no longer change
+FINAL_CALL_STATUSES = {'ended', 'completed', 'disconnected', 'failed'}
+
+
+class CallArtifactStore:
+    def __init__(self, root: str = None, max_bytes: int = None, compression_level: int = None):
+        store_config = CACHE_CONFIG['artifact_store']
+        self.root = Path(app_path(root or store_config['path']))
+        self.max_bytes = max_bytes or store_config['max_bytes']
+        self.compression_level = compression_level or store_config.get('compression_level', 6)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._size = sum(entry.stat().st_size for entry in self._iter_files())
+
+    def _iter_files(self):
+        for shard in os.scandir(self.root):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith('.json.gz'):
+                        yield entry
+
+    def _path(self, call_id: str, kind: str) -> Path:
+        digest = hashlib.sha256(f"{kind}:{call_id}".encode()).hexdigest()
+        return self.root / digest[:2] / f"{digest[2:]}.json.gz"
+
+    def get(self, call_id: str, kind: str) -> Optional[Any]:
+        """Load a stored artifact, or None on a miss"""
+        path = self._path(call_id, kind)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as handle:
+                value = json.load(handle)
+            # Reads refresh the mtime so eviction drops the least recently used entries
+            os.utime(path)
+        except (FileNotFoundError, OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, call_id: str, kind: str, value: Any):
+        """Store an artifact atomically and evict old entries if over budget"""
+        if value is None:
+            return
+        path = self._path(call_id, kind)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = gzip.compress(json.dumps(value).encode('utf-8'), self.compression_level)
+
+        previous = path.stat().st_size if path.exists() else 0
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(payload)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._size += len(payload) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used files until the store is back under 90% of its budget"""
+        target = self.max_bytes * 0.9
+        for entry in sorted(self._iter_files(), key=lambda entry: entry.stat().st_mtime):
+            if self._size <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._size -= size
+            except FileNotFoundError:
+                continue
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups * 100) if lookups else 0.0,
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes
+            }
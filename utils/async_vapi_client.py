@@ -0,0 +1,281 @@
+"""
+Async VAPI Client for Matrix VAPI Client
+aiohttp twin of MatrixVAPIClient with bounded concurrent batch fetches
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from config.settings import API_CONFIG
+from utils.rate_limiter import (RateLimitScheduler, get_shared_scheduler, parse_retry_after,
+                                PRIORITY_BACKGROUND)
+from utils.resilience import RetryPolicy, get_shared_breakers
+from utils.artifact_store import CallArtifactStore
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMatrixVAPIClient:
+    def __init__(self, api_key: str, base_url: str = None, timeout: float = None,
+                 max_concurrency: int = None, scheduler: RateLimitScheduler = None,
+                 priority: int = PRIORITY_BACKGROUND):
+        self.api_key = api_key
+        self.base_url = base_url or API_CONFIG['vapi_base_url']
+        self.timeout = timeout or API_CONFIG['timeout']
+        self.max_concurrency = max_concurrency or API_CONFIG.get('max_concurrency', 10)
+        self.retry_policy = RetryPolicy()
+        # Shares buckets and breakers with MatrixVAPIClient; batch work yields to interactive lookups
+        self.scheduler = scheduler or get_shared_scheduler()
+        self.breakers = get_shared_breakers()
+        self.priority = priority
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AsyncMatrixVAPIClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        """Open the pooled aiohttp session"""
+        if self.session is None or self.session.closed:
+            pool_config = API_CONFIG.get('connection_pool', {})
+            connector = aiohttp.TCPConnector(
+                limit=pool_config.get('pool_maxsize', 20),
+                limit_per_host=pool_config.get('pool_maxsize', 20)
+            )
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+
+    async def close(self):
+        """Release pooled connections"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        """Send a rate-limited, retried request through the pooled session and return decoded JSON"""
+        await self.open()
+        breaker = self.breakers.get(path)
+        attempt = 0
+        while True:
+            if not breaker.allow_request():
+                raise breaker.open_error()
+            try:
+                await asyncio.to_thread(self.scheduler.acquire, self.priority)
+                async with self.session.request(method, f"{self.base_url}{path}", **kwargs) as response:
+                    if response.status >= 500:
+                        breaker.record_failure()
+                        if self.retry_policy.should_retry(method, attempt, status=response.status):
+                            retry_after = response.headers.get('Retry-After')
+                            await asyncio.sleep(self.retry_policy.backoff(
+                                attempt, parse_retry_after(retry_after) if retry_after else None))
+                            attempt += 1
+                            continue
+                    else:
+                        # Any 4xx, 429 included, means the endpoint is up
+                        breaker.record_success()
+                        if response.status == 429 and self.retry_policy.should_retry(method, attempt, status=429):
+                            self.scheduler.penalize(parse_retry_after(response.headers.get('Retry-After')))
+                            attempt += 1
+                            continue
+                    response.raise_for_status()
+                    if response.content_length == 0:
+                        return None
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                breaker.record_failure()
+                request_sent = not isinstance(e, aiohttp.ClientConnectorError)
+                if not self.retry_policy.should_retry(method, attempt, request_sent=request_sent):
+                    raise
+                await asyncio.sleep(self.retry_policy.backoff(attempt))
+                attempt += 1
+            finally:
+                # Exits that recorded no outcome (e.g. a JSON decode error) must not strand a half-open probe
+                breaker.release_probe()
+
+    async def get_assistants(self) -> List[Dict]:
+        """Get all assistants from VAPI"""
+        try:
+            return await self._request("GET", "/assistant")
+        except Exception as e:
+            logger.error(f"Matrix Error - Failed to access assistant network: {e}")
+            return []
+
+    async def get_assistant(self, assistant_id: str) -> Optional[Dict]:
+        """Get specific assistant details"""
+        try:
+            return await self._request("GET", f"/assistant/{assistant_id}")
+        except Exception as e:
+            logger.error(f"Matrix Error - Agent {assistant_id} not found in network: {e}")
+            return None
+
+    async def create_assistant(self, assistant_data: Dict) -> Optional[Dict]:
+        """Create new assistant"""
+        try:
+            return await self._request("POST", "/assistant", json=assistant_data)
+        except Exception as e:
+            logger.error(f"Matrix Error - Failed to create new agent: {e}")
+            return None
+
+    async def update_assistant(self, assistant_id: str, assistant_data: Dict) -> Optional[Dict]:
+        """Update existing assistant"""
+        try:
+            return await self._request("PATCH", f"/assistant/{assistant_id}", json=assistant_data)
+        except Exception as e:
+            logger.error(f"Matrix Error - Failed to update agent {assistant_id}: {e}")
+            return None
+
+    async def delete_assistant(self, assistant_id: str) -> bool:
+        """Delete assistant"""
+        try:
+            await self._request("DELETE", f"/assistant/{assistant_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Matrix Error - Failed to delete agent {assistant_id}: {e}")
+            return False
+
+    async def get_calls(self, limit: int = 100) -> List[Dict]:
+        """Get call history"""
+        try:
+            return await self._request("GET", "/call", params={'limit': limit})
+        except Exception as e:
+            logger.error(f"Matrix Error - Failed to access call logs: {e}")
+            return []
+
+    async def get_call_details(self, call_id: str) -> Optional[Dict]:
+        """Get specific call details"""
+        try:
+            return await self._request("GET", f"/call/{call_id}")
+        except Exception as e:
+            logger.error(f"Matrix Error - Call {call_id} not found in logs: {e}")
+            return None
+
+    async def get_call_recording(self, call_id: str) -> Optional[str]:
+        """Get call recording URL"""
+        try:
+            data = await self._request("GET", f"/call/{call_id}/recording")
+            return (data or {}).get('recordingUrl')
+        except Exception as e:
+            logger.error(f"Matrix Error - Recording for call {call_id} not found: {e}")
+            return None
+
+    async def get_call_transcript(self, call_id: str) -> Optional[Dict]:
+        """Get call transcript"""
+        try:
+            return await self._request("GET", f"/call/{call_id}/transcript")
+        except Exception as e:
+            logger.error(f"Matrix Error - Transcript for call {call_id} not found: {e}")
+            return None
+
+    async def get_phone_numbers(self) -> List[Dict]:
+        """Get available phone numbers"""
+        try:
+            return await self._request("GET", "/phone-number")
+        except Exception as e:
+            logger.error(f"Matrix Error - Failed to access phone network: {e}")
+            return []
+
+    async def create_phone_number(self, phone_data: Dict) -> Optional[Dict]:
+        """Create new phone number"""
+        try:
+            return await self._request("POST", "/phone-number", json=phone_data)
+        except Exception as e:
+            logger.error(f"Matrix Error - Failed to create phone number: {e}")
+            return None
+
+    async def get_analytics(self, start_date: str = None, end_date: str = None) -> Optional[Dict]:
+        """Get analytics data"""
+        try:
+            params = {}
+            if start_date:
+                params['startDate'] = start_date
+            if end_date:
+                params['endDate'] = end_date
+
+            return await self._request("GET", "/analytics", params=params)
+        except Exception as e:
+            logger.error(f"Matrix Error - Failed to access analytics: {e}")
+            return None
+
+    # Batch operations
+    async def _gather_bounded(self, fetch: Callable[[str], Awaitable[Any]],
+                              call_ids: Iterable[str]) -> Dict[str, Any]:
+        """Run fetch for every call id with at most max_concurrency requests in flight"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        unique_ids = list(dict.fromkeys(call_ids))
+
+        async def bounded(call_id: str):
+            async with semaphore:
+                return await fetch(call_id)
+
+        results = await asyncio.gather(*(bounded(call_id) for call_id in unique_ids))
+        return dict(zip(unique_ids, results))
+
+    async def get_call_details_batch(self, call_ids: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """Get details for many calls concurrently"""
+        return await self._gather_bounded(self.get_call_details, call_ids)
+
+    async def get_call_transcripts_batch(self, call_ids: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """Get transcripts for many calls concurrently"""
+        return await self._gather_bounded(self.get_call_transcript, call_ids)
+
+    async def get_call_recordings_batch(self, call_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Get recording URLs for many calls concurrently"""
+        return await self._gather_bounded(self.get_call_recording, call_ids)
+
+
+STORABLE_ARTIFACTS = {'transcript', 'recording'}
+
+BATCH_FETCHERS = {
+    'details': AsyncMatrixVAPIClient.get_call_details_batch,
+    'transcript': AsyncMatrixVAPIClient.get_call_transcripts_batch,
+    'recording': AsyncMatrixVAPIClient.get_call_recordings_batch
+}
+
+
+def fetch_call_artifacts(api_key: str, call_ids: Iterable[str], artifact: str = 'transcript',
+                         base_url: str = None, max_concurrency: int = None,
+                         artifact_store: CallArtifactStore = None,
+                         persist_ids: Iterable[str] = None) -> Dict[str, Any]:
+    """Blocking entry point for Streamlit pages: fetch one artifact type for many calls.
+
+    With an artifact_store, stored artifacts are served from disk and only the
+    rest are fetched; fetched results for persist_ids (default: all) are stored.
+    """
+    if artifact not in BATCH_FETCHERS:
+        raise ValueError(f"Unknown call artifact '{artifact}', expected one of {list(BATCH_FETCHERS)}")
+
+    results: Dict[str, Any] = {}
+    pending = list(dict.fromkeys(call_ids))
+    storable = artifact_store is not None and artifact in STORABLE_ARTIFACTS
+    if storable:
+        for call_id in pending:
+            stored = artifact_store.get(call_id, artifact)
+            if stored:
+                results[call_id] = stored
+        pending = [call_id for call_id in pending if call_id not in results]
+
+    async def run() -> Dict[str, Any]:
+        async with AsyncMatrixVAPIClient(api_key, base_url, max_concurrency=max_concurrency) as client:
+            return await BATCH_FETCHERS[artifact](client, pending)
+
+    fetched = asyncio.run(run()) if pending else {}
+    if storable:
+        persist_ids = set(pending if persist_ids is None else persist_ids)
+        for call_id, value in fetched.items():
+            if value and call_id in persist_ids:
+                artifact_store.put(call_id, artifact, value)
+
+    results.update(fetched)
+    return results
@@ -0,0 +1,139 @@
+"""
+Call Clustering for Matrix VAPI Client
+Persistent MiniBatchKMeans call-pattern model trained incrementally on new calls
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from config.settings import CACHE_CONFIG, app_path
+
+logger = logging.getLogger(__name__)
+
+# Fixed feature space so a persisted model stays valid across reports
+CLUSTER_FEATURES = ['duration', 'cost', 'quality_score', 'sentiment_score']
+
+
+class CallClusterModel:
+    def __init__(self, path: str = None, n_clusters: int = None, batch_size: int = None):
+        model_config = CACHE_CONFIG.get('call_clusters', {})
+        self.path = Path(app_path(path or model_config.get('path', 'cache/models/call_clusters.joblib')))
+        self.n_clusters = n_clusters or model_config.get('n_clusters', 4)
+        self.batch_size = batch_size or model_config.get('batch_size', 1024)
+        self._lock = threading.Lock()
+        self.scaler = StandardScaler()
+        self.kmeans = MiniBatchKMeans(n_clusters=self.n_clusters, random_state=42, n_init=3,
+                                      batch_size=self.batch_size)
+        # Write version of the newest call already learned; calls inserted or updated later are the increment
+        self.learned_through: Optional[int] = None
+        self.samples_seen = 0
+        self._pending = np.empty((0, len(CLUSTER_FEATURES)))
+        self._loaded_mtime: Optional[float] = None
+        self._load()
+
+    @property
+    def is_fitted(self) -> bool:
+        return hasattr(self.kmeans, 'cluster_centers_')
+
+    @staticmethod
+    def feature_matrix(calls: Dict[str, np.ndarray]) -> np.ndarray:
+        """(n, features) float matrix with missing values as 0, from a frame or column batch"""
+        return np.column_stack([
+            np.nan_to_num(np.asarray(calls[feature], dtype=np.float64), nan=0.0) for feature in CLUSTER_FEATURES
+        ])
+
+    def _load(self):
+        try:
+            mtime = self.path.stat().st_mtime
+            state = joblib.load(self.path)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.error(f"Failed to load call cluster model from {self.path}, retraining: {e}")
+            return
+        self._loaded_mtime = mtime
+        # Models from before the write version watermark are retrained from scratch
+        if (state.get('n_clusters') != self.n_clusters or state.get('features') != CLUSTER_FEATURES
+                or 'learned_through' not in state):
+            return
+        self.scaler = state['scaler']
+        self.kmeans = state['kmeans']
+        self.learned_through = state['learned_through']
+        self.samples_seen = state['samples_seen']
+        self._pending = state['pending']
+
+    def refresh(self) -> bool:
+        """Reload the model if another process saved a newer one; returns whether it did"""
+        with self._lock:
+            try:
+                mtime = self.path.stat().st_mtime
+            except FileNotFoundError:
+                return False
+            if mtime == self._loaded_mtime:
+                return False
+            self._load()
+            return True
+
+    def save(self):
+        """Write the model atomically so other processes never load a partial file"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            'n_clusters': self.n_clusters,
+            'features': CLUSTER_FEATURES,
+            'scaler': self.scaler,
+            'kmeans': self.kmeans,
+            'learned_through': self.learned_through,
+            'samples_seen': self.samples_seen,
+            'pending': self._pending
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as handle:
+            joblib.dump(state, handle)
+        os.replace(tmp_path, self.path)
+        self._loaded_mtime = self.path.stat().st_mtime
+
+    def partial_fit(self, features: np.ndarray):
+        """Fold a batch of calls into the running scaler and cluster centers"""
+        features = np.vstack([self._pending, features])
+        # MiniBatchKMeans needs at least n_clusters samples for its first step
+        if not self.is_fitted and len(features) < self.n_clusters:
+            self._pending = features
+            return
+        self._pending = features[:0]
+        self.scaler.partial_fit(features)
+        self.kmeans.partial_fit(self.scaler.transform(features))
+        self.samples_seen += len(features)
+
+    def update(self, database_manager) -> int:
+        """Train on calls written since the last update, persist, and return how many were learned.
+
+        The watermark is the calls' write version rather than created_at, so synced or imported calls with
+        older timestamps are learned, and so are calls whose scores were filled in later.
+        """
+        with self._lock:
+            learned = 0
+            for learned_through, batch in database_manager.call_record_batches_written_after(
+                    CLUSTER_FEATURES, self.learned_through, self.batch_size):
+                self.partial_fit(self.feature_matrix(batch))
+                self.learned_through = learned_through
+                learned += len(batch[CLUSTER_FEATURES[0]])
+            if learned:
+                self.save()
+            return learned
+
+    def predict(self, calls: pd.DataFrame) -> np.ndarray:
+        """Cluster label per call; a transform and nearest-center lookup, no refit"""
+        with self._lock:
+            if not self.is_fitted:
+                raise ValueError("Call cluster model has not been trained yet")
+            return self.kmeans.predict(self.scaler.transform(self.feature_matrix(calls)))
@@ -0,0 +1,180 @@
+"""
+Call Export for Matrix VAPI Client
+Streaming NDJSON/CSV exports of the call history and full backups, written chunk by chunk and optionally gzip'd
+"""
+
+import csv
+import gzip
+import json
+import logging
+import os
+import tempfile
+from datetime import date, datetime
+from itertools import chain
+from typing import Any, Callable, Dict, Iterator, Optional, TextIO, Tuple
+
+from config.settings import EXPORT_CONFIG, app_path
+from models.database import CallRecord
+
+logger = logging.getLogger(__name__)
+
+# format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'ndjson': ('.ndjson', 'application/x-ndjson'),
+    'csv': ('.csv', 'text/csv'),
+}
+
+# write_version is local bookkeeping, restamped by whichever database imports the calls
+CALL_COLUMNS = [column.name for column in CallRecord.__table__.columns if column.name != 'write_version']
+
+# The first NDJSON line is {"_export": metadata}; CSV exports stay plain CSV, with the metadata in a sidecar file
+META_KEY = '_export'
+META_SUFFIX = '.meta.json'
+# Backup lines for non-call data, e.g. {"_section": "agents", "data": {...}}; they precede the calls
+SECTION_KEY = '_section'
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return value
+
+
+def metadata_path(path: str) -> str:
+    """Sidecar JSON file holding the metadata of a CSV export, e.g. call_history_<stamp>.meta.json"""
+    stem = path[:-len('.gz')] if path.endswith('.gz') else path
+    return os.path.splitext(stem)[0] + META_SUFFIX
+
+
+def export_mime(fmt: str, compress: bool = False) -> str:
+    return 'application/gzip' if compress else EXPORT_FORMATS[fmt][1]
+
+
+def open_export(path: str, mode: str = 'rt', compress: bool = None) -> TextIO:
+    """Open an export file as text, through gzip when compressed (judged by the .gz suffix by default)"""
+    if compress is None:
+        compress = path.endswith('.gz')
+    if compress:
+        return gzip.open(path, mode, compresslevel=EXPORT_CONFIG.get('compression_level', 6),
+                         encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def write_call_rows(db, stream: TextIO, fmt: str = 'ndjson', metadata: Dict[str, Any] = None,
+                    newest_first: bool = False, **filters) -> int:
+    """Stream the filtered call history into an open text file; returns calls written.
+
+    Metadata leads NDJSON exports only; CSV has nowhere standard to put it, see metadata_path().
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    rows = db.iter_call_record_rows(CALL_COLUMNS, newest_first=newest_first, **filters)
+    written = 0
+    if fmt == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(CALL_COLUMNS)
+        for row in rows:
+            writer.writerow([_csv_value(value) for value in row])
+            written += 1
+    else:
+        if metadata is not None:
+            stream.write(json.dumps({META_KEY: metadata}, default=_json_default) + '\n')
+        for row in rows:
+            stream.write(json.dumps(dict(zip(CALL_COLUMNS, row)), default=_json_default) + '\n')
+            written += 1
+    return written
+
+
+def write_backup(db, stream: TextIO, sections: Dict[str, Any], metadata: Dict[str, Any] = None) -> int:
+    """Stream a complete backup as NDJSON: metadata, one line per section, then every call; returns calls written"""
+    stream.write(json.dumps({META_KEY: metadata or {}}, default=_json_default) + '\n')
+    for name, data in sections.items():
+        stream.write(json.dumps({SECTION_KEY: name, 'data': data}, default=_json_default) + '\n')
+    return write_call_rows(db, stream, 'ndjson')
+
+
+def read_backup(stream: TextIO) -> Tuple[Dict[str, Any], Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """(metadata, sections, calls) of an NDJSON export; calls are parsed lazily as they are consumed"""
+    records = (json.loads(line) for line in stream if line.strip())
+    metadata, sections = {}, {}
+    for record in records:
+        if META_KEY in record:
+            metadata = record[META_KEY]
+        elif SECTION_KEY in record:
+            sections[record[SECTION_KEY]] = record.get('data')
+        else:
+            return metadata, sections, chain([record], records)
+    return metadata, sections, iter(())
+
+
+class CallExporter:
+    def __init__(self, database_manager, path: str = None, keep_files: int = None):
+        self.db = database_manager
+        self.path = app_path(path or EXPORT_CONFIG.get('path', 'exports'))
+        self.keep_files = max(1, keep_files or EXPORT_CONFIG.get('keep_files', 10))
+
+    def _write_atomic(self, target: str, write: Callable[[TextIO], Any], compress: bool = False) -> Any:
+        """Write to a temporary file, then move it into place so a failed export never leaves a partial file"""
+        fd, temp_path = tempfile.mkstemp(dir=self.path, suffix='.part')
+        os.close(fd)
+        try:
+            with open_export(temp_path, 'wt', compress) as stream:
+                result = write(stream)
+            os.replace(temp_path, target)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+        return result
+
+    def _export(self, prefix: str, extension: str, compress: bool, write: Callable[[TextIO], int],
+                sidecar: Dict[str, Any] = None) -> Tuple[str, int]:
+        """(path, calls written) of a new timestamped export, then prune the old ones"""
+        os.makedirs(self.path, exist_ok=True)
+        filename = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{extension}{'.gz' if compress else ''}"
+        target = os.path.join(self.path, filename)
+        written = self._write_atomic(target, write, compress)
+        if sidecar is not None:
+            self._write_atomic(metadata_path(target),
+                               lambda stream: json.dump(sidecar, stream, indent=2, default=_json_default))
+        self.prune()
+        return target, written
+
+    def export_calls(self, fmt: str = 'ndjson', compress: bool = False, metadata: Dict[str, Any] = None,
+                     newest_first: bool = False, prefix: str = 'call_history', **filters) -> Tuple[str, int]:
+        """(path, calls written) of a new call history export; CSV metadata goes to metadata_path(path)"""
+        metadata = {'export_timestamp': datetime.now().isoformat(), **(metadata or {})}
+        return self._export(prefix, EXPORT_FORMATS[fmt][0], compress,
+                            lambda stream: write_call_rows(self.db, stream, fmt, metadata, newest_first, **filters),
+                            sidecar=metadata if fmt == 'csv' else None)
+
+    def export_backup(self, sections: Dict[str, Any], compress: bool = True, metadata: Dict[str, Any] = None,
+                      prefix: str = 'matrix_complete_backup') -> Tuple[str, int]:
+        """(path, calls written) of a new complete backup"""
+        metadata = {'export_timestamp': datetime.now().isoformat(), **(metadata or {})}
+        return self._export(prefix, EXPORT_FORMATS['ndjson'][0], compress,
+                            lambda stream: write_backup(self.db, stream, sections, metadata))
+
+    def prune(self) -> Optional[int]:
+        """Delete all but the newest keep_files exports, with their metadata sidecars; returns exports deleted"""
+        try:
+            exports = sorted((entry for entry in os.scandir(self.path) if entry.is_file()
+                              and not entry.name.endswith(('.part', META_SUFFIX))),
+                             key=lambda entry: entry.stat().st_mtime, reverse=True)
+            for entry in exports[self.keep_files:]:
+                os.unlink(entry.path)
+                if os.path.exists(metadata_path(entry.path)):
+                    os.unlink(metadata_path(entry.path))
+            return len(exports[self.keep_files:])
+        except OSError as e:
+            logger.error(f"Failed to prune exports in {self.path}: {e}")
+            return None
@@ -0,0 +1,182 @@
+"""
+Call Filter Index for Matrix VAPI Client
+In-memory time-sorted index resolving call history filters to call ids
+"""
+
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Call record columns the index keeps per call
+INDEX_COLUMNS = ['id', 'started_at', 'status', 'agent_name']
+
+
+def to_epoch_us(value: datetime) -> int:
+    return int(np.datetime64(value, 'us').astype(np.int64))
+
+
+class CallFilterIndex:
+    """Filter index over the call history, kept current through DatabaseManager call listeners.
+
+    Calls are held in one array sorted by start time with a status code and an
+    agent code per position, so a date window is a binary search and status or
+    agent filters are vectorized comparisons over that window.
+    """
+
+    def __init__(self, database_manager=None):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Tuple[int, str, str]] = {}
+        self._ids = np.empty(0, dtype=object)
+        self._epochs = np.empty(0, dtype=np.int64)
+        self._status_codes = np.empty(0, dtype=np.int32)
+        self._agent_codes = np.empty(0, dtype=np.int32)
+        self._status_lookup: Dict[str, int] = {}
+        self._agent_lookup: Dict[str, int] = {}
+        if database_manager is not None:
+            # Listen first so a write landing during the initial load is not lost
+            database_manager.add_call_listener(self.apply, INDEX_COLUMNS)
+            self.rebuild(database_manager)
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def rebuild(self, database_manager):
+        """Load every call from the database"""
+        calls = {}
+        for batch in database_manager.call_record_batches(INDEX_COLUMNS):
+            epochs = batch['started_at'].astype('datetime64[us]').astype(np.int64).tolist()
+            calls.update(zip(batch['id'], zip(epochs, batch['status'], batch['agent_name'])))
+        with self._lock:
+            self._calls = calls
+            self._sort_all()
+
+    @staticmethod
+    def _code(lookup: Dict[str, int], value: str) -> int:
+        """Code of a status or agent name; codes are only compared for equality, so new values are appended"""
+        return lookup.setdefault(value, len(lookup))
+
+    def _sort_all(self):
+        """Rebuild the sorted arrays from every call; used for full loads only"""
+        ids = np.array(list(self._calls), dtype=object)
+        values = list(self._calls.values())
+        epochs = np.fromiter((value[0] for value in values), dtype=np.int64, count=len(values))
+        self._status_lookup, self._agent_lookup = {}, {}
+        status_codes = np.fromiter((self._code(self._status_lookup, value[1]) for value in values),
+                                   dtype=np.int32, count=len(values))
+        agent_codes = np.fromiter((self._code(self._agent_lookup, value[2]) for value in values),
+                                  dtype=np.int32, count=len(values))
+
+        order = np.argsort(epochs, kind='stable')
+        self._ids = ids[order]
+        self._epochs = epochs[order]
+        self._status_codes = status_codes[order]
+        self._agent_codes = agent_codes[order]
+
+    def _position(self, call_id: str, epoch: int) -> int:
+        """Array position of an indexed call, found by binary search on its start time"""
+        low = np.searchsorted(self._epochs, epoch, 'left')
+        high = np.searchsorted(self._epochs, epoch, 'right')
+        return low + self._ids[low:high].tolist().index(call_id)
+
+    def apply(self, changes: Optional[List[Dict[str, Any]]]):
+        """Fold committed call record writes into the index; None clears it.
+
+        Moved and new calls are removed and bisected back into the sorted arrays in one pass per
+        write batch, instead of re-sorting the whole index.
+        """
+        with self._lock:
+            if changes is None:
+                self._calls = {}
+                self._sort_all()
+                return
+            removed, inserted = [], {}
+            for change in changes:
+                call_id = change.get('id')
+                current = self._calls.get(call_id)
+                if current is None and not all(change.get(column) is not None for column in INDEX_COLUMNS[1:]):
+                    continue
+                epoch, status, agent_name = current or (None, None, None)
+                if change.get('started_at') is not None:
+                    epoch = to_epoch_us(change['started_at'])
+                value = (epoch, change.get('status', status), change.get('agent_name', agent_name))
+                if value == current:
+                    continue
+                self._calls[call_id] = value
+                if call_id in inserted:
+                    inserted[call_id] = value
+                elif current is not None and current[0] == epoch:
+                    # Same start time: recode in place
+                    position = self._position(call_id, epoch)
+                    self._status_codes[position] = self._code(self._status_lookup, value[1])
+                    self._agent_codes[position] = self._code(self._agent_lookup, value[2])
+                else:
+                    if current is not None:
+                        removed.append(self._position(call_id, current[0]))
+                    inserted[call_id] = value
+            if not removed and not inserted:
+                return
+
+            if removed:
+                self._ids, self._epochs, self._status_codes, self._agent_codes = (
+                    np.delete(array, removed) for array in
+                    (self._ids, self._epochs, self._status_codes, self._agent_codes))
+            new_ids = sorted(inserted, key=lambda call_id: inserted[call_id][0])
+            epochs = np.array([inserted[call_id][0] for call_id in new_ids], dtype=np.int64)
+            positions = np.searchsorted(self._epochs, epochs, 'right')
+            self._ids = np.insert(self._ids, positions, np.array(new_ids, dtype=object))
+            self._epochs = np.insert(self._epochs, positions, epochs)
+            self._status_codes = np.insert(self._status_codes, positions, np.array(
+                [self._code(self._status_lookup, inserted[call_id][1]) for call_id in new_ids], dtype=np.int32))
+            self._agent_codes = np.insert(self._agent_codes, positions, np.array(
+                [self._code(self._agent_lookup, inserted[call_id][2]) for call_id in new_ids], dtype=np.int32))
+
+    def _positions(self, status: str = None, agent_name: str = None, start_date: datetime = None,
+                   end_date: datetime = None) -> np.ndarray:
+        """Sorted array positions of the calls matching the filters; the caller holds the lock"""
+        low = np.searchsorted(self._epochs, to_epoch_us(start_date), 'left') if start_date else 0
+        high = np.searchsorted(self._epochs, to_epoch_us(end_date), 'left') if end_date else len(self._epochs)
+
+        mask = np.ones(max(high - low, 0), dtype=bool)
+        if status:
+            if status not in self._status_lookup:
+                return np.empty(0, dtype=np.intp)
+            mask &= self._status_codes[low:high] == self._status_lookup[status]
+        if agent_name:
+            if agent_name not in self._agent_lookup:
+                return np.empty(0, dtype=np.intp)
+            mask &= self._agent_codes[low:high] == self._agent_lookup[agent_name]
+        return np.flatnonzero(mask) + low
+
+    def count(self, **filters) -> int:
+        """Number of calls matching the filters, without materializing their ids"""
+        with self._lock:
+            return len(self._positions(**filters))
+
+    def query(self, status: str = None, agent_name: str = None, start_date: datetime = None,
+              end_date: datetime = None, newest_first: bool = True, limit: int = None,
+              offset: int = 0) -> Tuple[int, List[str]]:
+        """(total matches, ids of the requested page) for the filters, ordered by start time"""
+        with self._lock:
+            positions = self._positions(status, agent_name, start_date, end_date)
+            ids = self._ids
+
+        total = len(positions)
+        if newest_first:
+            positions = positions[::-1]
+        stop = offset + limit if limit else None
+        return total, ids[positions[offset:stop]].tolist()
+
+    def query_page(self, page: int, page_size: int, newest_first: bool = True,
+                   **filters) -> Tuple[int, int, List[str]]:
+        """(total matches, page, ids of that page) from one filter pass; page is clamped to the last one"""
+        with self._lock:
+            positions = self._positions(**filters)
+            ids = self._ids
+
+        total = len(positions)
+        page = max(0, min(page, -(-total // page_size) - 1))
+        if newest_first:
+            positions = positions[::-1]
+        return total, page, ids[positions[page * page_size:(page + 1) * page_size]].tolist()
@@ -0,0 +1,152 @@
+"""
+Incremental Call Sync Engine for Matrix VAPI Client
+Cursor-paginated sync of VAPI calls into the CallRecord table
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config.settings import API_CONFIG
+from utils.rate_limiter import PRIORITY_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+HIGH_WATER_MARK_KEY = "vapi_calls_updated_at"
+# Mark of earlier versions, which only followed createdAt; seeds the updatedAt mark once
+LEGACY_HIGH_WATER_MARK_KEY = "vapi_calls_created_at"
+
+
+def parse_vapi_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse a VAPI ISO-8601 timestamp into a naive UTC datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.replace(tzinfo=None) - parsed.utcoffset()
+    return parsed
+
+
+def vapi_call_to_record(vapi_call: Dict[str, Any], agent_names: Dict[str, str] = None) -> Dict[str, Any]:
+    """Map a VAPI call payload onto CallRecord columns"""
+    agent_names = agent_names or {}
+    assistant_id = vapi_call.get('assistantId') or 'unknown'
+    created_at = parse_vapi_timestamp(vapi_call.get('createdAt'))
+    started_at = parse_vapi_timestamp(vapi_call.get('startedAt')) or created_at or datetime.utcnow()
+    ended_at = parse_vapi_timestamp(vapi_call.get('endedAt'))
+
+    duration = vapi_call.get('duration')
+    if duration is None:
+        duration = (ended_at - started_at).total_seconds() if ended_at else 0.0
+
+    artifact = vapi_call.get('artifact') or {}
+    transcript = vapi_call.get('transcript') or artifact.get('transcript')
+    if transcript is not None and not isinstance(transcript, str):
+        transcript = json.dumps(transcript)
+
+    return {
+        'id': vapi_call['id'],
+        'agent_id': assistant_id,
+        'agent_name': agent_names.get(assistant_id, assistant_id),
+        'phone_number': vapi_call.get('phoneNumberId') or vapi_call.get('phoneNumber', ''),
+        'customer_number': (vapi_call.get('customer') or {}).get('number', ''),
+        'status': vapi_call.get('status', 'completed'),
+        'duration': float(duration or 0.0),
+        'cost': float(vapi_call.get('cost') or 0.0),
+        'recording_url': vapi_call.get('recordingUrl') or artifact.get('recordingUrl'),
+        'transcript': transcript,
+        'summary': vapi_call.get('summary') or (vapi_call.get('analysis') or {}).get('summary'),
+        'started_at': started_at,
+        'ended_at': ended_at,
+        'created_at': created_at or started_at,
+        'metadata': {
+            'source': 'vapi',
+            'type': vapi_call.get('type'),
+            'ended_reason': vapi_call.get('endedReason'),
+            'created_at_raw': vapi_call.get('createdAt')
+        }
+    }
+
+
+class CallSyncEngine:
+    def __init__(self, vapi_client, database_manager, agent_names: Dict[str, str] = None,
+                 page_size: int = None):
+        self.client = vapi_client
+        self.db = database_manager
+        self.agent_names = agent_names or {}
+        self.page_size = page_size or API_CONFIG.get('sync_page_size', 100)
+        self.max_page_size = max(self.page_size, API_CONFIG.get('sync_max_page_size', 1000))
+
+    def sync(self) -> Dict[str, Any]:
+        """Fetch every call created or updated since the stored high-water mark and upsert it.
+
+        The mark follows updatedAt, so calls stored while queued or in progress are fetched
+        again once VAPI adds their end time, cost and transcript.
+        """
+        high_water_mark = (self.db.get_sync_state(HIGH_WATER_MARK_KEY)
+                           or self.db.get_sync_state(LEGACY_HIGH_WATER_MARK_KEY))
+        cursor = None
+        skip_below = None
+        limit = self.page_size
+        complete = True
+        newest = high_water_mark
+        seen_ids = set()
+        synced: List[Dict[str, Any]] = []
+        pages = 0
+
+        # VAPI lists newest created first, so page backwards by createdAt through the calls updated since the mark.
+        # The cursor is inclusive, since more calls may share the oldest createdAt of a page.
+        while True:
+            page = self.client.list_calls(limit=limit,
+                                          updated_at_gt=high_water_mark,
+                                          created_at_le=cursor,
+                                          created_at_lt=skip_below,
+                                          priority=PRIORITY_BACKGROUND)
+            pages += 1
+            fresh = [call for call in page if call.get('id') and call['id'] not in seen_ids]
+            created = [call['createdAt'] for call in page if call.get('createdAt')]
+            last_page = len(page) < limit or not created
+            if not fresh:
+                if last_page:
+                    break
+                # A full page of calls already synced: more calls share its createdAt than the page holds
+                if limit < self.max_page_size:
+                    limit = min(limit * 2, self.max_page_size)
+                    continue
+                # Calls at this createdAt beyond the largest page stay unsynced, so the mark must not pass them
+                logger.warning(f"More than {limit} calls share createdAt {min(created)}; skipping past them")
+                complete = False
+                cursor, skip_below = None, min(created)
+                continue
+
+            records = [vapi_call_to_record(call, self.agent_names) for call in fresh]
+            self.db.bulk_upsert_call_records(records)
+            synced.extend(records)
+            seen_ids.update(call['id'] for call in fresh)
+
+            updated = [call.get('updatedAt') or call['createdAt'] for call in page
+                       if call.get('updatedAt') or call.get('createdAt')]
+            if updated:
+                newest = max([newest] + updated) if newest else max(updated)
+            if last_page:
+                break
+            cursor, skip_below = min(created), None
+            limit = self.page_size
+
+        # Only advance the mark once the whole window has been paged through
+        if not complete:
+            newest = high_water_mark
+        elif newest and newest != high_water_mark:
+            self.db.set_sync_state(HIGH_WATER_MARK_KEY, newest)
+
+        logger.info(f"Synced {len(synced)} calls from VAPI in {pages} pages")
+        return {
+            'synced': len(synced),
+            'pages': pages,
+            'high_water_mark': newest,
+            'records': synced
+        }
@@ -0,0 +1,62 @@
+"""
+Database Engine Factory for Matrix VAPI Client
+Pragma-tuned SQLite engines with a single writer and a read-only pool
+"""
+
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+
+from config.settings import DATABASE_CONFIG
+
+# Pragmas that change the database file rather than the connection; set by the writer only
+WRITER_ONLY_PRAGMAS = {"journal_mode"}
+
+
+def is_file_sqlite(database_url: str) -> bool:
+    """True for SQLite databases backed by a file that several connections can share"""
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Any], read_only: bool = False):
+    """Run the configured PRAGMAs on every new DBAPI connection of the engine"""
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                if read_only and name in WRITER_ONLY_PRAGMAS:
+                    continue
+                cursor.execute(f"PRAGMA {name}={value}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+
+def create_database_engine(database_url: Optional[str] = None, read_only: bool = False,
+                           config: Optional[Dict[str, Any]] = None) -> Engine:
+    """Create an engine honoring DATABASE_CONFIG.
+
+    File-backed SQLite gets the configured pragmas; its writer engine holds a
+    single connection so writes queue in-process instead of on the file lock,
+    while read-only engines get the full pool_size/max_overflow pool.
+    """
+    config = config or DATABASE_CONFIG
+    database_url = database_url or config["url"]
+    engine_options: Dict[str, Any] = {"echo": config.get("echo", False)}
+
+    file_sqlite = is_file_sqlite(database_url)
+    if file_sqlite and not read_only:
+        engine_options.update(pool_size=1, max_overflow=0)
+    elif file_sqlite or make_url(database_url).get_backend_name() != "sqlite":
+        engine_options.update(pool_size=config.get("pool_size", 10),
+                              max_overflow=config.get("max_overflow", 20))
+
+    engine = create_engine(database_url, **engine_options)
+    if file_sqlite:
+        apply_sqlite_pragmas(engine, config.get("sqlite_pragmas", {}), read_only=read_only)
+    return engine
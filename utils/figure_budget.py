@@ -0,0 +1,112 @@
+"""
+Figure Budget for Matrix VAPI Client
+Downsampling and top-N bucketing that keep serialized Plotly figures under a payload budget
+"""
+
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from config.settings import CHART_CONFIG
+
+OTHER_LABEL = "Other"
+
+# Smallest time-series resolution the payload loop will shrink to
+MIN_POINTS = 50
+
+
+def _numeric_axis(x: Sequence) -> np.ndarray:
+    """x values as float64 for area math: numbers as-is, dates as epoch ns, categories by position"""
+    values = np.asarray(x)
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype(np.float64)
+    try:
+        return pd.to_datetime(values).asi8.astype(np.float64)
+    except (TypeError, ValueError):
+        return np.arange(len(values), dtype=np.float64)
+
+
+def lttb_indices(x: Sequence, y: Sequence, threshold: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps to draw the series with threshold points"""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    xs = _numeric_axis(x)
+    ys = np.nan_to_num(np.asarray(y, dtype=np.float64))
+
+    # First and last points are always kept; the rest is split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x, next_y = xs[end:next_end].mean(), ys[end:next_end].mean()
+        areas = np.abs((xs[anchor] - next_x) * (ys[start:end] - ys[anchor])
+                       - (xs[anchor] - xs[start:end]) * (next_y - ys[anchor]))
+        anchor = start + int(np.argmax(areas))
+        selected[bucket + 1] = anchor
+    return selected
+
+
+def top_n_other(frame: pd.DataFrame, by: str, n: int = None,
+                combine: Optional[Callable[[pd.DataFrame], pd.Series]] = None) -> pd.DataFrame:
+    """Keep the n largest rows by a column and fold the rest into one "Other" row.
+
+    combine builds the Other row from the folded rows; the default sums them,
+    which is only right for additive columns.
+    """
+    n = n or CHART_CONFIG.get('top_n', 10)
+    if len(frame) <= n:
+        return frame
+    ranked = frame.sort_values(by, ascending=False)
+    rest = ranked.iloc[n:]
+    other = combine(rest) if combine else rest.sum(numeric_only=True)
+    other_frame = pd.DataFrame([other], index=pd.Index([OTHER_LABEL], name=frame.index.name))
+    return pd.concat([ranked.iloc[:n], other_frame])
+
+
+def top_n_labels(labels: Sequence, values: Sequence, n: int = None) -> Tuple[list, list]:
+    """(labels, values) of the n largest values plus the summed remainder as "Other\""""
+    frame = pd.DataFrame({'value': values}, index=pd.Index(list(labels)))
+    frame = top_n_other(frame.groupby(level=0).sum(), 'value', n)
+    return list(frame.index), frame['value'].tolist()
+
+
+def _downsample_traces(fig: go.Figure, max_points: int, top_n: int):
+    for trace in fig.data:
+        if trace.type in ('scatter', 'scattergl') and trace.y is not None and len(trace.y) > max_points:
+            keep = lttb_indices(trace.x if trace.x is not None else np.arange(len(trace.y)), trace.y, max_points)
+            updates = {'y': np.asarray(trace.y)[keep]}
+            if trace.x is not None:
+                updates['x'] = np.asarray(trace.x)[keep]
+            if trace.customdata is not None and len(trace.customdata) == len(trace.y):
+                updates['customdata'] = np.asarray(trace.customdata)[keep]
+            trace.update(updates)
+        elif trace.type == 'pie' and trace.values is not None and len(trace.values) > top_n:
+            labels, values = top_n_labels(trace.labels, trace.values, top_n)
+            trace.update(labels=labels, values=values)
+
+
+def figure_json(fig: go.Figure, max_points: int = None, top_n: int = None, max_bytes: int = None) -> str:
+    """Serialize a figure after downsampling it to fit the payload budget.
+
+    Line traces are reduced with LTTB and pie slices beyond top_n are folded into
+    "Other"; while the JSON is still over max_bytes the point budget is halved.
+    Bars are left alone: their top-N folding depends on whether values are
+    additive, so callers apply top_n_other to the data first.
+    """
+    max_points = max_points or CHART_CONFIG.get('max_points', 500)
+    top_n = top_n or CHART_CONFIG.get('top_n', 10)
+    max_bytes = max_bytes or CHART_CONFIG.get('max_payload_bytes', 262144)
+
+    _downsample_traces(fig, max_points, top_n)
+    payload = fig.to_json()
+    while len(payload) > max_bytes and max_points > MIN_POINTS:
+        max_points = max(MIN_POINTS, max_points // 2)
+        _downsample_traces(fig, max_points, top_n)
+        payload = fig.to_json()
+    return payload
@@ -0,0 +1,31 @@
+"""
+Pooled HTTP Session Factory for Matrix VAPI Client
+Keep-alive connection pooling driven by API_CONFIG
+"""
+
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import API_CONFIG
+
+
+def create_pooled_session(headers: Optional[Dict[str, str]] = None,
+                          pool_connections: Optional[int] = None,
+                          pool_maxsize: Optional[int] = None,
+                          pool_block: Optional[bool] = None) -> requests.Session:
+    """Create a keep-alive session with a bounded per-host connection pool"""
+    pool_config = API_CONFIG.get('connection_pool', {})
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections or pool_config.get('pool_connections', 10),
+        pool_maxsize=pool_maxsize or pool_config.get('pool_maxsize', 20),
+        pool_block=pool_config.get('pool_block', True) if pool_block is None else pool_block
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
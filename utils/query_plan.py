@@ -0,0 +1,91 @@
+"""
+Query Plan Checks for Matrix VAPI Client
+EXPLAIN QUERY PLAN harness asserting DatabaseManager queries use an index
+"""
+
+import re
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from sqlalchemy import event
+
+from models.database import DatabaseManager
+
+# "SCAN call_records" without "USING ... INDEX" is a full table scan
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+( AS \w+)?$")
+
+_PROBE_END = datetime(2024, 1, 31)
+_PROBE_START = _PROBE_END - timedelta(days=30)
+
+# One representative call per DatabaseManager read path
+QUERY_PROBES: Dict[str, Callable[[DatabaseManager], object]] = {
+    "get_agent": lambda db: db.get_agent("probe"),
+    "get_call_records": lambda db: db.get_call_records(limit=10),
+    "get_call_records by agent": lambda db: db.get_call_records(limit=10, agent_id="probe"),
+    "query_call_history": lambda db: db.query_call_history(limit=10),
+    "query_call_history by status": lambda db: db.query_call_history(status="completed", limit=10),
+    "query_call_history by agent": lambda db: db.query_call_history(agent_name="probe", limit=10),
+    "query_call_history window": lambda db: db.query_call_history(start_date=_PROBE_START, end_date=_PROBE_END),
+    "count_call_records by status": lambda db: db.count_call_records(status="completed"),
+    "call_summary window": lambda db: db.call_summary(start_date=_PROBE_START, end_date=_PROBE_END),
+    "call_stats_by_agent by agent": lambda db: db.call_stats_by_agent(agent_name="probe"),
+    "daily_call_stats window": lambda db: db.daily_call_stats(start_date=_PROBE_START, end_date=_PROBE_END),
+    "get_metrics window": lambda db: db.get_metrics(_PROBE_START, _PROBE_END),
+    "get_metrics by agent": lambda db: db.get_metrics(_PROBE_START, _PROBE_END, agent_id="probe"),
+    "get_metrics by metric": lambda db: db.get_metrics(_PROBE_START, _PROBE_END, metric_name="probe"),
+    "get_metrics by agent and metric": lambda db: db.get_metrics(_PROBE_START, _PROBE_END,
+                                                                 agent_id="probe", metric_name="probe"),
+    "get_call_rollups": lambda db: db.get_call_rollups("hour", _PROBE_START, _PROBE_END),
+    "call_record_batches_written_after": lambda db: list(db.call_record_batches_written_after(["duration"], 0)),
+    "get_sync_state": lambda db: db.get_sync_state("probe"),
+}
+
+
+@contextmanager
+def captured_selects(engine):
+    """Collect every SELECT statement (with parameters) the engine executes"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def explain(engine, statement: str, parameters=()) -> List[str]:
+    """Return the detail column of EXPLAIN QUERY PLAN for a statement"""
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def collect_query_plans(db: DatabaseManager) -> Dict[str, List[str]]:
+    """Run every probe and return the query plan of each SELECT it issued"""
+    plans = {}
+    for name, probe in QUERY_PROBES.items():
+        with captured_selects(db.read_engine) as statements:
+            probe(db)
+        plans[name] = [detail for statement, parameters in statements
+                       for detail in explain(db.read_engine, statement, parameters)]
+    return plans
+
+
+def assert_indexed_queries(db: DatabaseManager) -> Dict[str, List[str]]:
+    """Raise AssertionError if any probed query falls back to a full table scan"""
+    plans = collect_query_plans(db)
+    scans = {name: detail for name, details in plans.items() for detail in details if FULL_SCAN.match(detail)}
+    assert not scans, "Full table scans: " + "; ".join(f"{name}: {detail}" for name, detail in scans.items())
+    return plans
+
+
+if __name__ == "__main__":
+    database_url = sys.argv[1] if len(sys.argv) > 1 else "sqlite://"
+    for name, details in assert_indexed_queries(DatabaseManager(database_url)).items():
+        print(f"{name}: {' | '.join(details)}")
@@ -0,0 +1,157 @@
+"""
+Rate Limit Scheduler for Matrix VAPI Client
+Token buckets with priority lanes and Retry-After backoff
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from config.settings import API_CONFIG
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a request could not get a rate limit slot in time"""
+
+
+class TokenBucket:
+    def __init__(self, capacity: int, period: float):
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until_available(self, now: float) -> float:
+        """Seconds until one token can be taken"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def resize(self, capacity: int, period: float, now: float):
+        """Change the limit, keeping the current token level rather than granting a fresh burst"""
+        self._refill(now)
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.tokens = min(self.tokens, self.capacity)
+
+    def consume(self, now: float):
+        """Take one token"""
+        self._refill(now)
+        self.tokens -= 1
+
+
+class RateLimitScheduler:
+    def __init__(self, calls_per_minute: int = None, calls_per_hour: int = None):
+        limits = API_CONFIG['rate_limit']
+        self._condition = threading.Condition()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._blocked_until = 0.0
+        self.minute_bucket = TokenBucket(calls_per_minute or limits['calls_per_minute'], 60)
+        self.hour_bucket = TokenBucket(calls_per_hour or limits['calls_per_hour'], 3600)
+
+    def update_limits(self, calls_per_minute: int = None, calls_per_hour: int = None) -> bool:
+        """Resize the minute and hour buckets to changed limits; returns whether anything changed"""
+        with self._condition:
+            now = time.monotonic()
+            changed = False
+            for bucket, limit, period in ((self.minute_bucket, calls_per_minute, 60),
+                                          (self.hour_bucket, calls_per_hour, 3600)):
+                if limit and float(limit) != bucket.capacity:
+                    bucket.resize(limit, period, now)
+                    changed = True
+            if changed:
+                self._condition.notify_all()
+            return changed
+
+    def _wait_time(self, now: float) -> float:
+        return max(self._blocked_until - now,
+                   self.minute_bucket.time_until_available(now),
+                   self.hour_bucket.time_until_available(now))
+
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE, timeout: float = None) -> float:
+        """Block until a request slot is free; returns seconds waited"""
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+        ticket = (priority, next(self._sequence))
+
+        with self._condition:
+            heapq.heappush(self._waiters, ticket)
+            # A new head may have arrived ahead of a sleeping waiter
+            self._condition.notify_all()
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._waiters[0] == ticket:
+                        wait = self._wait_time(now)
+                        if wait <= 0:
+                            self.minute_bucket.consume(now)
+                            self.hour_bucket.consume(now)
+                            heapq.heappop(self._waiters)
+                            self._condition.notify_all()
+                            return now - started
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise RateLimitTimeout(f"No VAPI rate limit slot within {timeout}s")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._condition.wait(wait)
+            except BaseException:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self._condition.notify_all()
+                raise
+
+    def penalize(self, seconds: float):
+        """Hold every lane for the server-requested Retry-After period"""
+        with self._condition:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._condition.notify_all()
+
+
+def parse_retry_after(value: Optional[str], default: float = None) -> float:
+    """Convert a Retry-After header (seconds or HTTP date) into seconds"""
+    if default is None:
+        default = API_CONFIG['rate_limit'].get('default_retry_after', 5)
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_shared_scheduler() -> RateLimitScheduler:
+    """Process-wide scheduler shared by every VAPI client"""
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = RateLimitScheduler()
+        return _shared_scheduler
@@ -0,0 +1,150 @@
+"""
+Report Cache for Matrix VAPI Client
+LRU memo of analytics reports keyed by window, filters and data version, optionally backed by disk
+"""
+
+import copy
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from config.settings import CACHE_CONFIG, app_path
+
+logger = logging.getLogger(__name__)
+
+
+class ReportStore:
+    """Pickled results on disk, one directory per data version, shared between processes"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: Tuple) -> Path:
+        digest = hashlib.sha256(repr(key[:-1]).encode()).hexdigest()
+        return self.root / str(key[-1]) / f"{digest}.pkl"
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        try:
+            with open(self._path(key), 'rb') as handle:
+                return pickle.load(handle)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Failed to read stored report {key}: {e}")
+            return None
+
+    def put(self, key: Tuple, value: Any):
+        """Write atomically so a reader in another process never sees a partial file"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as handle:
+            pickle.dump(value, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def prune(self, data_version: int):
+        """Delete results of every other data version"""
+        for entry in os.scandir(self.root):
+            if entry.is_dir() and entry.name != str(data_version):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+class ReportCache:
+    def __init__(self, max_entries: int = None, store_path: str = None):
+        cache_config = CACHE_CONFIG.get('report_cache', {})
+        self.max_entries = max_entries or cache_config.get('max_entries', 32)
+        store_path = store_path or cache_config.get('path')
+        self.store = ReportStore(app_path(store_path)) if store_path else None
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per key being computed, so concurrent viewers of a window wait instead of recomputing
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.compute_seconds = 0.0
+        self.last_compute_seconds = 0.0
+
+    @staticmethod
+    def key_for(start_date: datetime, end_date: datetime, filters: Optional[Dict[str, Hashable]],
+                data_version: int, kind: str = 'report') -> Tuple:
+        return (kind, start_date, end_date, tuple(sorted((filters or {}).items())), data_version)
+
+    def get_or_compute(self, start_date: datetime, end_date: datetime, filters: Optional[Dict[str, Hashable]],
+                       data_version: int, compute: Callable[[], Any], kind: str = 'report') -> Any:
+        """Return the cached result for the key, computing (once) and storing it on a miss"""
+        key = self.key_for(start_date, end_date, filters, data_version, kind)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._entries[key])
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    # Another session finished computing it while we waited
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(self._entries[key])
+
+            # A result precomputed by another process (e.g. the report scheduler) counts as a hit
+            report = self.store.get(key) if self.store else None
+            if report is not None:
+                with self._lock:
+                    self.hits += 1
+            else:
+                with self._lock:
+                    self.misses += 1
+                started = time.perf_counter()
+                try:
+                    report = compute()
+                except Exception:
+                    with self._lock:
+                        self._key_locks.pop(key, None)
+                    raise
+                elapsed = time.perf_counter() - started
+                if self.store:
+                    try:
+                        self.store.put(key, report)
+                    except Exception as e:
+                        logger.error(f"Failed to store report {key}: {e}")
+                with self._lock:
+                    self.compute_seconds += elapsed
+                    self.last_compute_seconds = elapsed
+
+            with self._lock:
+                # Reports from older data versions can never be hit again
+                for stale_key in [cached for cached in self._entries if cached[-1] != data_version]:
+                    del self._entries[stale_key]
+                self._entries[key] = report
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                self._key_locks.pop(key, None)
+            return copy.deepcopy(report)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups * 100) if lookups else 0.0,
+                'compute_seconds': self.compute_seconds,
+                'last_compute_seconds': self.last_compute_seconds
+            }
@@ -0,0 +1,94 @@
+"""
+Report Scheduler for Matrix VAPI Client
+Separate process that precomputes the standard reports and dashboards into the shared report cache
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Tuple
+
+import schedule
+
+from config.settings import CACHE_CONFIG, DATABASE_CONFIG, LOGGING_CONFIG
+from models.database import DatabaseManager
+from utils.analytics_engine import MatrixAnalyticsEngine
+
+logger = logging.getLogger(__name__)
+
+
+def standard_report_windows(agent_ids: Iterable[str] = (),
+                            now: datetime = None) -> Dict[str, Tuple[datetime, datetime, Dict[str, str]]]:
+    """Named (start, end, filters) windows shared by the scheduler and the pages that read its results.
+
+    Ends are the next hour boundary, so keys stay stable for an hour; the unfiltered windows also
+    line up with the rollups, while the per-agent ones filter on agent_id and read the raw calls.
+    """
+    scheduler_config = CACHE_CONFIG.get('report_scheduler', {})
+    now = now or datetime.utcnow()
+    end = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+    windows = {}
+    for days in scheduler_config.get('window_days', [1, 7, 30]):
+        if days == 1:
+            windows['today'] = (now.replace(hour=0, minute=0, second=0, microsecond=0), end, {})
+        else:
+            windows[f'{days}d'] = (end - timedelta(days=days), end, {})
+
+    agent_days = scheduler_config.get('agent_window_days', 30)
+    for agent_id in agent_ids:
+        windows[f'{agent_days}d:agent:{agent_id}'] = (end - timedelta(days=agent_days), end, {'agent_id': agent_id})
+    return windows
+
+
+def precompute_reports(engine: MatrixAnalyticsEngine) -> int:
+    """Compute every standard report and dashboard that is not cached yet; return how many windows ran"""
+    started = time.perf_counter()
+    # Learn new calls up front, so the reports below (and the app's own reports) find little left to learn
+    try:
+        learned = engine.cluster_model.update(engine.db)
+        if learned:
+            logger.info(f"Call cluster model learned {learned} new calls")
+    except Exception as e:
+        logger.error(f"Failed to update the call cluster model: {e}")
+    agent_ids = [agent.id for agent in engine.db.get_all_agents()]
+    windows = standard_report_windows(agent_ids)
+    for name, (start_date, end_date, filters) in windows.items():
+        try:
+            engine.get_report(start_date, end_date, filters)
+            engine.get_dashboard(start_date, end_date, filters)
+        except Exception as e:
+            logger.error(f"Failed to precompute report '{name}': {e}")
+
+    if engine.report_cache.store:
+        engine.report_cache.store.prune(engine.db.get_data_version())
+    logger.info(f"Precomputed {len(windows)} report windows in {time.perf_counter() - started:.1f}s")
+    return len(windows)
+
+
+def run_scheduler(database_url: str = None, interval_minutes: int = None):
+    """Precompute now, then on every interval, until interrupted"""
+    interval_minutes = interval_minutes or CACHE_CONFIG.get('report_scheduler', {}).get('interval_minutes', 15)
+    engine = MatrixAnalyticsEngine(DatabaseManager(database_url or DATABASE_CONFIG['url']))
+
+    schedule.every(interval_minutes).minutes.do(precompute_reports, engine)
+    precompute_reports(engine)
+    logger.info(f"Report scheduler running every {interval_minutes} minutes")
+    while True:
+        schedule.run_pending()
+        time.sleep(max(1, min(schedule.idle_seconds() or 1, 60)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute analytics reports into the shared report cache")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--interval", type=int, default=None, help="minutes between runs")
+    parser.add_argument("--once", action="store_true", help="precompute a single time and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, LOGGING_CONFIG['level']), format=LOGGING_CONFIG['format'])
+    if args.once:
+        precompute_reports(MatrixAnalyticsEngine(DatabaseManager(args.database_url or DATABASE_CONFIG['url'])))
+    else:
+        run_scheduler(args.database_url, args.interval)
@@ -0,0 +1,138 @@
+"""
+Retry and Circuit Breaker Policies for Matrix VAPI Client
+Idempotency-aware jittered backoff and per-endpoint fail-fast
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+from config.settings import API_CONFIG
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+
+def endpoint_for(path: str) -> str:
+    """Group paths by resource, e.g. /call/123/transcript -> /call"""
+    return "/" + path.split('?')[0].strip('/').split('/')[0]
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open"""
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = None, backoff_base: float = None, backoff_max: float = None):
+        retry_config = API_CONFIG.get('retry', {})
+        self.max_retries = API_CONFIG['max_retries'] if max_retries is None else max_retries
+        self.backoff_base = backoff_base or retry_config.get('backoff_base', 0.5)
+        self.backoff_max = backoff_max or retry_config.get('backoff_max', 8.0)
+
+    def should_retry(self, method: str, attempt: int, status: int = None, request_sent: bool = True) -> bool:
+        """Decide whether a failed attempt may be sent again"""
+        if attempt >= self.max_retries:
+            return False
+        # Throttled or never-sent requests had no side effects on the server
+        if status == 429 or not request_sent:
+            return True
+        if method.upper() not in IDEMPOTENT_METHODS:
+            return False
+        return status is None or status in RETRYABLE_STATUSES
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """Full-jitter exponential delay, never shorter than a server Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = None, recovery_timeout: float = None):
+        breaker_config = API_CONFIG.get('circuit_breaker', {})
+        self.name = name
+        self.failure_threshold = failure_threshold or breaker_config.get('failure_threshold', 5)
+        self.recovery_timeout = recovery_timeout or breaker_config.get('recovery_timeout', 30)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Closed: allow. Open: reject until recovery_timeout, then let one probe through."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """End a half-open probe that recorded neither outcome, so the next request may probe again"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def retry_in(self) -> float:
+        """Seconds until the next probe is allowed"""
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+
+    def open_error(self) -> CircuitOpenError:
+        return CircuitOpenError(f"VAPI {self.name} is degraded; retrying in {self.retry_in():.0f}s")
+
+
+class CircuitBreakerRegistry:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> CircuitBreaker:
+        endpoint = endpoint_for(path)
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(endpoint)
+            return self._breakers[endpoint]
+
+    def states(self) -> Dict[str, str]:
+        with self._lock:
+            return {endpoint: breaker.state for endpoint, breaker in self._breakers.items()}
+
+
+_shared_breakers: Optional[CircuitBreakerRegistry] = None
+_shared_breakers_lock = threading.Lock()
+
+
+def get_shared_breakers() -> CircuitBreakerRegistry:
+    """Process-wide breakers so every session fails fast on the same outage"""
+    global _shared_breakers
+    with _shared_breakers_lock:
+        if _shared_breakers is None:
+            _shared_breakers = CircuitBreakerRegistry()
+        return _shared_breakers
@@ -0,0 +1,114 @@
+"""
+Response Cache for Matrix VAPI Client
+Read-through LRU cache with per-endpoint TTLs and conditional revalidation
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+
+from config.settings import API_CONFIG
+from utils.resilience import endpoint_for
+
+
+@dataclass
+class CachedResponse:
+    value: Any
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating a stale entry"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = None, ttls: Dict[str, float] = None):
+        cache_config = API_CONFIG.get('response_cache', {})
+        self.max_entries = max_entries or cache_config.get('max_entries', 512)
+        self.ttls = ttls if ttls is not None else cache_config.get('ttl', {})
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    @staticmethod
+    def key_for(path: str, params: Dict[str, Any] = None) -> str:
+        if not params:
+            return path
+        return f"{path}?{urlencode(sorted(params.items()))}"
+
+    def ttl_for(self, path: str) -> float:
+        """Configured TTL for the endpoint, 0 when it should not be cached"""
+        return self.ttls.get(endpoint_for(path), 0)
+
+    def lookup(self, key: str) -> Optional[CachedResponse]:
+        """Return the entry (fresh or stale) and mark it recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if entry.is_fresh():
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def value_of(self, entry: CachedResponse) -> Any:
+        """Copy out a cached payload so callers can't mutate the shared entry"""
+        return copy.deepcopy(entry.value)
+
+    def store(self, key: str, path: str, value: Any, etag: str = None, last_modified: str = None):
+        ttl = self.ttl_for(path)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = CachedResponse(copy.deepcopy(value), time.monotonic() + ttl, etag, last_modified)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def revalidated(self, key: str, path: str):
+        """A 304 came back: extend the entry's lifetime"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires_at = time.monotonic() + self.ttl_for(path)
+                self.revalidations += 1
+
+    def invalidate(self, prefix: str):
+        """Drop every entry whose path starts with prefix"""
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'hit_rate': (self.hits / lookups * 100) if lookups else 0.0
+            }
@@ -0,0 +1,61 @@
+"""
+Transcript Renderer for Matrix VAPI Client
+Escaped, cached HTML fragments of call transcripts, rendered a window at a time
+"""
+
+import html
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, List, Tuple
+
+from config.settings import CALL_HISTORY_CONFIG
+
+ENTRY_TEMPLATE = ('<div style="margin-bottom: 10px;"><strong style="color: #00ffff;">[{timestamp}] {speaker}:</strong>'
+                  '<br><span style="margin-left: 20px;">{text}</span></div>')
+LINE_TEMPLATE = '<div>{text}</div>'
+
+
+def transcript_fragments(transcript: Any) -> List[str]:
+    """One escaped HTML fragment per transcript entry (or per line of a plain-text transcript)"""
+    if isinstance(transcript, str) and transcript.lstrip().startswith(('[', '{')):
+        try:
+            transcript = json.loads(transcript)
+        except ValueError:
+            pass
+    if isinstance(transcript, dict):
+        transcript = transcript.get('messages') or transcript.get('transcript') or ''
+
+    if isinstance(transcript, list):
+        return [ENTRY_TEMPLATE.format(timestamp=html.escape(str(entry.get('timestamp', ''))),
+                                      speaker=html.escape(str(entry.get('role', 'Unknown'))),
+                                      text=html.escape(str(entry.get('message', entry.get('text', '')))))
+                for entry in transcript if isinstance(entry, dict)]
+    return [LINE_TEMPLATE.format(text=html.escape(line)) for line in str(transcript or '').splitlines() if line.strip()]
+
+
+class TranscriptRenderer:
+    def __init__(self, max_calls: int = None):
+        self.max_calls = max_calls or CALL_HISTORY_CONFIG.get('transcript_cache_entries', 64)
+        self._fragments: "OrderedDict[Tuple[str, int], List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fragments(self, call_id: str, transcript: Any) -> List[str]:
+        """Escaped fragments for the call, built once per transcript version"""
+        key = (call_id, hash(transcript if isinstance(transcript, str) else json.dumps(transcript, sort_keys=True)))
+        with self._lock:
+            if key in self._fragments:
+                self._fragments.move_to_end(key)
+                return self._fragments[key]
+        fragments = transcript_fragments(transcript)
+        with self._lock:
+            self._fragments[key] = fragments
+            while len(self._fragments) > self.max_calls:
+                self._fragments.popitem(last=False)
+        return fragments
+
+    def render(self, call_id: str, transcript: Any, limit: int = None) -> Tuple[str, int]:
+        """(HTML of the first limit entries, total entries) for the call"""
+        fragments = self.fragments(call_id, transcript)
+        limit = limit or len(fragments)
+        return f'<div class="transcript-container">{"".join(fragments[:limit])}</div>', len(fragments)
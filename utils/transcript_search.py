@@ -0,0 +1,220 @@
+"""
+Transcript Search for Matrix VAPI Client
+SQLite FTS5 index over call transcripts with ranked, role-filtered, highlighted search
+"""
+
+import html
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, text
+
+from config.settings import DATABASE_CONFIG
+from models.database import CallRecord, TranscriptEntry
+
+logger = logging.getLogger(__name__)
+
+# External-content FTS5 table over transcript_entries, kept in sync by triggers
+TRANSCRIPT_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5(
+        role, message, content='transcript_entries', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS transcript_entries_ai AFTER INSERT ON transcript_entries BEGIN
+        INSERT INTO transcript_fts(rowid, role, message) VALUES (new.id, new.role, new.message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transcript_entries_ad AFTER DELETE ON transcript_entries BEGIN
+        INSERT INTO transcript_fts(transcript_fts, rowid, role, message) VALUES ('delete', old.id, old.role, old.message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transcript_entries_au AFTER UPDATE ON transcript_entries BEGIN
+        INSERT INTO transcript_fts(transcript_fts, rowid, role, message) VALUES ('delete', old.id, old.role, old.message);
+        INSERT INTO transcript_fts(rowid, role, message) VALUES (new.id, new.role, new.message);
+    END""",
+]
+
+# VAPI speaker names folded onto the roles the search filters by
+ROLE_ALIASES = {'ai': 'assistant', 'bot': 'assistant', 'agent': 'assistant', 'customer': 'user', 'human': 'user'}
+
+# Plain-text transcripts are "Role: message" lines
+SPEAKER_LINE = re.compile(r"^\s*([A-Za-z]+)\s*:\s*(.*)$")
+
+# Private-use markers for snippet() so highlighting survives HTML escaping
+_MARK_OPEN, _MARK_CLOSE = "\ue000", "\ue001"
+
+_SEARCH_SQL = """
+    SELECT e.call_id, e.position, e.role, e.timestamp, c.agent_name, c.started_at,
+           snippet(transcript_fts, 1, :mark_open, :mark_close, '…', :snippet_tokens) AS snippet,
+           bm25(transcript_fts) AS rank
+    FROM transcript_fts
+    JOIN transcript_entries e ON e.id = transcript_fts.rowid
+    JOIN call_records c ON c.id = e.call_id
+    WHERE transcript_fts MATCH :match {filters}
+    ORDER BY rank
+    LIMIT :limit
+"""
+
+
+def normalize_role(role: Optional[str]) -> Optional[str]:
+    if not role:
+        return None
+    role = role.strip().lower()
+    return ROLE_ALIASES.get(role, role)
+
+
+def parse_transcript_entries(transcript: Any) -> List[Dict[str, Any]]:
+    """Split a stored transcript (JSON entries or plain "Role: text" lines) into role/message entries"""
+    if isinstance(transcript, str) and transcript.lstrip().startswith(('[', '{')):
+        try:
+            transcript = json.loads(transcript)
+        except ValueError:
+            pass
+    if isinstance(transcript, dict):
+        transcript = transcript.get('messages') or transcript.get('transcript') or ''
+
+    entries = []
+    if isinstance(transcript, list):
+        for entry in transcript:
+            if not isinstance(entry, dict):
+                continue
+            message = entry.get('message', entry.get('text', ''))
+            if message:
+                entries.append({'role': normalize_role(entry.get('role')), 'message': str(message),
+                                'timestamp': str(entry['timestamp']) if entry.get('timestamp') is not None else None})
+    elif isinstance(transcript, str):
+        for line in transcript.splitlines():
+            speaker = SPEAKER_LINE.match(line)
+            if speaker:
+                entries.append({'role': normalize_role(speaker.group(1)), 'message': speaker.group(2), 'timestamp': None})
+            elif line.strip() and entries:
+                # Continuation of the previous speaker's message
+                entries[-1]['message'] += f"\n{line.strip()}"
+            elif line.strip():
+                entries.append({'role': None, 'message': line.strip(), 'timestamp': None})
+    return entries
+
+
+def fts_query(query: str) -> str:
+    """Turn free text into an FTS5 expression: every word must match, a trailing * keeps prefix search"""
+    terms = re.findall(r"\w+\*?", query)
+    return " ".join(f'"{term.rstrip("*")}"*' if term.endswith('*') else f'"{term}"' for term in terms)
+
+
+class TranscriptSearchIndex:
+    def __init__(self, database_manager, listen: bool = True):
+        if database_manager.engine.dialect.name != 'sqlite':
+            raise NotImplementedError(f"Transcript search needs SQLite FTS5, not {database_manager.engine.dialect.name}")
+        self.db = database_manager
+        with self.db.engine.begin() as connection:
+            for statement in TRANSCRIPT_FTS_DDL:
+                connection.execute(text(statement))
+        if listen:
+            # Transcripts written through the DatabaseManager are indexed as soon as they commit; only ids
+            # are passed along, so bulk writes do not hold every transcript in memory until they finish
+            self.db.add_call_listener(self.apply, ['id'])
+
+    def apply(self, changes: Optional[List[Dict[str, Any]]]):
+        """Call listener: reindex the written calls, or empty the index after a delete-all"""
+        try:
+            if changes is None:
+                self.clear()
+            else:
+                self.reindex([change['id'] for change in changes])
+        except Exception as e:
+            logger.error(f"Failed to update the transcript search index: {e}")
+
+    def reindex(self, call_ids: List[str], batch_size: int = None) -> int:
+        """Read the stored transcripts of the calls back in batches and index them; returns calls indexed"""
+        batch_size = batch_size or DATABASE_CONFIG.get('stream_batch_size', 1000)
+        indexed = 0
+        for start in range(0, len(call_ids), batch_size):
+            session = self.db.get_read_session()
+            try:
+                transcripts = dict(session.query(CallRecord.id, CallRecord.transcript).filter(
+                    CallRecord.id.in_(call_ids[start:start + batch_size])).all())
+            finally:
+                self.db.close_session(session)
+            self.index_calls(transcripts)
+            indexed += len(transcripts)
+        return indexed
+
+    def index_calls(self, transcripts: Dict[str, Optional[str]]) -> int:
+        """Replace the indexed entries of each call with its parsed transcript; returns entries written"""
+        rows = [{'call_id': call_id, 'position': position, **entry}
+                for call_id, transcript in transcripts.items()
+                for position, entry in enumerate(parse_transcript_entries(transcript))]
+        session = self.db.get_session()
+        try:
+            call_ids = list(transcripts)
+            for start in range(0, len(call_ids), 500):
+                session.query(TranscriptEntry).filter(
+                    TranscriptEntry.call_id.in_(call_ids[start:start + 500])).delete(synchronize_session=False)
+            if rows:
+                session.execute(TranscriptEntry.__table__.insert(), rows)
+            session.commit()
+            return len(rows)
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            self.db.close_session(session)
+
+    def backfill(self, batch_size: int = None) -> int:
+        """Index stored transcripts of calls that have no entries yet; returns calls indexed"""
+        batch_size = batch_size or DATABASE_CONFIG.get('stream_batch_size', 1000)
+        session = self.db.get_read_session()
+        try:
+            pending = [call_id for (call_id,) in session.query(CallRecord.id).filter(
+                CallRecord.transcript.isnot(None), CallRecord.transcript != '',
+                CallRecord.id.not_in(select(TranscriptEntry.call_id))
+            )]
+        finally:
+            self.db.close_session(session)
+        return self.reindex(pending, batch_size)
+
+    def clear(self):
+        session = self.db.get_session()
+        try:
+            session.query(TranscriptEntry).delete()
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            self.db.close_session(session)
+
+    def search(self, query: str, role: str = None, agent_name: str = None, start_date: datetime = None,
+               end_date: datetime = None, limit: int = 50, snippet_tokens: int = 16) -> List[Dict[str, Any]]:
+        """Best-matching transcript entries (BM25), each with an HTML-escaped snippet whose hits are in <mark>"""
+        match = fts_query(query)
+        if not match:
+            return []
+        if role:
+            match = f'{{message}} : ({match}) AND {{role}} : "{normalize_role(role)}"'
+
+        filters, params = [], {'match': match, 'limit': limit, 'snippet_tokens': snippet_tokens,
+                               'mark_open': _MARK_OPEN, 'mark_close': _MARK_CLOSE}
+        if agent_name:
+            filters.append("AND c.agent_name = :agent_name")
+            params['agent_name'] = agent_name
+        if start_date:
+            filters.append("AND c.started_at >= :start_date")
+            params['start_date'] = start_date
+        if end_date:
+            filters.append("AND c.started_at < :end_date")
+            params['end_date'] = end_date
+
+        session = self.db.get_read_session()
+        try:
+            rows = session.execute(text(_SEARCH_SQL.format(filters=" ".join(filters))), params).mappings().all()
+        finally:
+            self.db.close_session(session)
+
+        results = []
+        for row in rows:
+            result = dict(row)
+            result['snippet'] = (html.escape(row['snippet'] or '')
+                                 .replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>'))
+            results.append(result)
+        return results